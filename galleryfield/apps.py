@@ -8,3 +8,8 @@ class GalleryConfig(AppConfig):
     def ready(self):
         from .checks import register_galleryfield_settings_checks
         register_galleryfield_settings_checks()
+
+        from .receivers import (register_image_data_cache_receivers,
+                                register_url_cache_receivers)
+        register_image_data_cache_receivers()
+        register_url_cache_receivers()
@@ -1,6 +1,8 @@
 from django.apps import apps
 from django.conf import settings
 from django.core import checks
+from django.utils.module_loading import import_string
+from PIL import Image
 
 from galleryfield import defaults
 from galleryfield.utils import (GENERIC_ERROR_PATTERN, INSTANCE_ERROR_PATTERN,
@@ -21,6 +23,8 @@ EXTRA_CSS = "extra_css"
 THUMBNAILS = "thumbnails"
 THUMBNAIL_SIZE = "size"
 THUMBNAIL_QUALITY = "quality"
+THUMBNAIL_GENERATE_ASYNC = "generate_async"
+THUMBNAIL_ASYNC_TASK_RUNNER = "async_task_runner"
 
 WIDGET_HIDDEN_INPUT_CSS_CLASS = "widget_hidden_input_css_class"
 
@@ -34,8 +38,25 @@ JQUERY_FILE_UPLOAD_UI_DEFAULT_OPTIONS = (
 JQUERY_FILE_UPLOAD_UI_DEFAULT_SORTABLE_OPTIONS = (
     "jquery_file_upload_ui_sortable_options")
 
+IN_MEMORY_ORDERING_THRESHOLD = "in_memory_ordering_threshold"
+
+IMAGE_DATA_CACHE = "image_data_cache"
+IMAGE_DATA_CACHE_ALIAS = "alias"
+IMAGE_DATA_CACHE_TIMEOUT = "timeout"
+
+NON_DESTRUCTIVE_CROP = "non_destructive_crop"
+
+CHUNKED_UPLOAD = "chunked_upload"
+CHUNKED_UPLOAD_TEMP_DIR = "temp_dir"
+CHUNKED_UPLOAD_EXPIRATION = "expiration"
+
+UPLOAD_NORMALIZATION = "upload_normalization"
+UPLOAD_NORMALIZATION_MAX_WIDTH = "max_width"
+UPLOAD_NORMALIZATION_MAX_HEIGHT = "max_height"
+UPLOAD_NORMALIZATION_FORMAT = "format"
+UPLOAD_NORMALIZATION_QUALITY = "quality"
+
 MAX_NUMBER_OF_FILES = "maxNumberOfFiles"
-SINGLE_FILE_UPLOADS = "singleFileUploads"
 PREVIEW_MAX_WIDTH = "previewMaxWidth"
 PREVIEW_MAX_HEIGHT = "previewMaxHeight"
 
@@ -233,6 +254,36 @@ def check_settings(app_configs, **kwargs):
                             id="django-galleryfield-thumbnails.E005"
                         ))
 
+            generate_async = thumbnails.get(THUMBNAIL_GENERATE_ASYNC, None)
+            if (generate_async is not None
+                    and not isinstance(generate_async, bool)):
+                errors.append(DJGalleryCriticalCheckMessage(
+                    msg=(INSTANCE_ERROR_PATTERN
+                         % {"location": f"'{THUMBNAIL_GENERATE_ASYNC}' in "
+                                        f"'{THUMBNAILS}' in "
+                                        f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                            "types": "bool"}),
+                    id="django-galleryfield-thumbnails.E006"
+                ))
+
+            async_task_runner = thumbnails.get(THUMBNAIL_ASYNC_TASK_RUNNER, None)
+            if async_task_runner is not None:
+                try:
+                    runner = import_string(async_task_runner)
+                    if not callable(runner):
+                        raise TypeError(f"'{async_task_runner}' is not callable")
+                except Exception as e:
+                    errors.append(DJGalleryCriticalCheckMessage(
+                        msg=(GENERIC_ERROR_PATTERN
+                             % {"location": f"'{THUMBNAIL_ASYNC_TASK_RUNNER}' in "
+                                            f"'{THUMBNAILS}' in "
+                                            f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                                "error_type": type(e).__name__,
+                                "error_str": str(e)}
+                             ),
+                        id="django-galleryfield-thumbnails.E007"
+                    ))
+
     jfu_options = conf.get(JQUERY_FILE_UPLOAD_UI_DEFAULT_OPTIONS, None)
     if jfu_options is not None:
         if not isinstance(jfu_options, dict):
@@ -255,18 +306,6 @@ def check_settings(app_configs, **kwargs):
                     id="django-galleryfield-jquery_file_upload_ui_options.W001"
                 ))
 
-            if (SINGLE_FILE_UPLOADS in jfu_options
-                    # Some user might use "false" string to represent False
-                    and str(jfu_options[SINGLE_FILE_UPLOADS]).lower() == "false"):
-                errors.append(checks.Warning(
-                    msg=("%(location)s set to False is not allowed and will"
-                         "be ignored. "
-                         % {"location": f"option '{SINGLE_FILE_UPLOADS}' in "
-                                        f"'{JQUERY_FILE_UPLOAD_UI_DEFAULT_OPTIONS}'"
-                                        f" in '{DJANGO_GALLERY_FIELD_CONFIG}'"}),
-                    id="django-galleryfield-jquery_file_upload_ui_options.W002"
-                ))
-
             if PREVIEW_MAX_WIDTH in jfu_options or PREVIEW_MAX_HEIGHT in jfu_options:
                 errors.append(checks.Warning(
                     msg=("%(location)s will be ignored. By preview size, we mean "
@@ -320,4 +359,156 @@ def check_settings(app_configs, **kwargs):
                    ".E001"
             ))
 
+    in_memory_ordering_threshold = conf.get(IN_MEMORY_ORDERING_THRESHOLD, None)
+
+    if in_memory_ordering_threshold is not None:
+        if (not isinstance(in_memory_ordering_threshold, int)
+                or isinstance(in_memory_ordering_threshold, bool)
+                or in_memory_ordering_threshold < 0):
+            errors.append(DJGalleryCriticalCheckMessage(
+                msg=(INSTANCE_ERROR_PATTERN
+                     % {"location": f"'{IN_MEMORY_ORDERING_THRESHOLD}' "
+                                    f"in '{DJANGO_GALLERY_FIELD_CONFIG}'",
+                        "types": "non-negative int"}),
+                id="django-galleryfield-in_memory_ordering_threshold.E001"
+            ))
+
+    image_data_cache = conf.get(IMAGE_DATA_CACHE, None)
+    if image_data_cache is not None:
+        if not isinstance(image_data_cache, dict):
+            errors.append(DJGalleryCriticalCheckMessage(
+                msg=(INSTANCE_ERROR_PATTERN
+                     % {"location": f"'{IMAGE_DATA_CACHE}' in "
+                                    f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                        "types": "dict"}),
+                id="django-galleryfield-image_data_cache.E001"
+            ))
+        else:
+            alias = image_data_cache.get(IMAGE_DATA_CACHE_ALIAS, None)
+            if alias is not None and alias not in settings.CACHES:
+                errors.append(DJGalleryCriticalCheckMessage(
+                    msg=(f"'{IMAGE_DATA_CACHE_ALIAS}' in '{IMAGE_DATA_CACHE}' "
+                         f"in '{DJANGO_GALLERY_FIELD_CONFIG}': '{alias}' "
+                         f"is not configured in settings.CACHES"),
+                    id="django-galleryfield-image_data_cache.E002"
+                ))
+
+            timeout = image_data_cache.get(IMAGE_DATA_CACHE_TIMEOUT, None)
+            if (timeout is not None
+                    and (not isinstance(timeout, int)
+                         or isinstance(timeout, bool))):
+                errors.append(DJGalleryCriticalCheckMessage(
+                    msg=(INSTANCE_ERROR_PATTERN
+                         % {"location": f"'{IMAGE_DATA_CACHE_TIMEOUT}' in "
+                                        f"'{IMAGE_DATA_CACHE}' in "
+                                        f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                            "types": "int"}),
+                    id="django-galleryfield-image_data_cache.E003"
+                ))
+
+    non_destructive_crop = conf.get(NON_DESTRUCTIVE_CROP, None)
+
+    if non_destructive_crop is not None:
+        if not isinstance(non_destructive_crop, bool):
+            errors.append(DJGalleryCriticalCheckMessage(
+                msg=(INSTANCE_ERROR_PATTERN
+                     % {"location": f"'{NON_DESTRUCTIVE_CROP}' "
+                                    f"in '{DJANGO_GALLERY_FIELD_CONFIG}'",
+                        "types": "bool"}),
+                id="django-galleryfield-non_destructive_crop.E001"
+            ))
+
+    chunked_upload = conf.get(CHUNKED_UPLOAD, None)
+    if chunked_upload is not None:
+        if not isinstance(chunked_upload, dict):
+            errors.append(DJGalleryCriticalCheckMessage(
+                msg=(INSTANCE_ERROR_PATTERN
+                     % {"location": f"'{CHUNKED_UPLOAD}' in "
+                                    f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                        "types": "dict"}),
+                id="django-galleryfield-chunked_upload.E001"
+            ))
+        else:
+            temp_dir = chunked_upload.get(CHUNKED_UPLOAD_TEMP_DIR, None)
+            if temp_dir is not None and not isinstance(temp_dir, str):
+                errors.append(DJGalleryCriticalCheckMessage(
+                    msg=(INSTANCE_ERROR_PATTERN
+                         % {"location": f"'{CHUNKED_UPLOAD_TEMP_DIR}' in "
+                                        f"'{CHUNKED_UPLOAD}' in "
+                                        f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                            "types": "str"}),
+                    id="django-galleryfield-chunked_upload.E002"
+                ))
+
+            expiration = chunked_upload.get(CHUNKED_UPLOAD_EXPIRATION, None)
+            if (expiration is not None
+                    and (not isinstance(expiration, int)
+                         or isinstance(expiration, bool)
+                         or expiration <= 0)):
+                errors.append(DJGalleryCriticalCheckMessage(
+                    msg=(INSTANCE_ERROR_PATTERN
+                         % {"location": f"'{CHUNKED_UPLOAD_EXPIRATION}' in "
+                                        f"'{CHUNKED_UPLOAD}' in "
+                                        f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                            "types": "positive int"}),
+                    id="django-galleryfield-chunked_upload.E003"
+                ))
+
+    upload_normalization = conf.get(UPLOAD_NORMALIZATION, None)
+    if upload_normalization is not None:
+        if not isinstance(upload_normalization, dict):
+            errors.append(DJGalleryCriticalCheckMessage(
+                msg=(INSTANCE_ERROR_PATTERN
+                     % {"location": f"'{UPLOAD_NORMALIZATION}' in "
+                                    f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                        "types": "dict"}),
+                id="django-galleryfield-upload_normalization.E001"
+            ))
+        else:
+            for key in [UPLOAD_NORMALIZATION_MAX_WIDTH,
+                        UPLOAD_NORMALIZATION_MAX_HEIGHT]:
+                value = upload_normalization.get(key, None)
+                if (value is not None
+                        and (not isinstance(value, int)
+                             or isinstance(value, bool)
+                             or value <= 0)):
+                    errors.append(DJGalleryCriticalCheckMessage(
+                        msg=(INSTANCE_ERROR_PATTERN
+                             % {"location": f"'{key}' in "
+                                            f"'{UPLOAD_NORMALIZATION}' in "
+                                            f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                                "types": "positive int"}),
+                        id="django-galleryfield-upload_normalization.E002"
+                    ))
+
+            image_format = upload_normalization.get(
+                UPLOAD_NORMALIZATION_FORMAT, None)
+            if image_format is not None:
+                Image.init()
+                if (not isinstance(image_format, str)
+                        or image_format.upper() not in Image.SAVE):
+                    errors.append(DJGalleryCriticalCheckMessage(
+                        msg=f"'{UPLOAD_NORMALIZATION_FORMAT}' in "
+                            f"'{UPLOAD_NORMALIZATION}' in "
+                            f"'{DJANGO_GALLERY_FIELD_CONFIG}': "
+                            f"'{image_format}' is not an image format which "
+                            f"Pillow can save, e.g., 'JPEG' or 'WEBP'",
+                        id="django-galleryfield-upload_normalization.E003"
+                    ))
+
+            quality = upload_normalization.get(
+                UPLOAD_NORMALIZATION_QUALITY, None)
+            if (quality is not None
+                    and (not isinstance(quality, int)
+                         or isinstance(quality, bool)
+                         or not 0 < quality <= 100)):
+                errors.append(DJGalleryCriticalCheckMessage(
+                    msg=(INSTANCE_ERROR_PATTERN
+                         % {"location": f"'{UPLOAD_NORMALIZATION_QUALITY}' in "
+                                        f"'{UPLOAD_NORMALIZATION}' in "
+                                        f"'{DJANGO_GALLERY_FIELD_CONFIG}'",
+                            "types": "int between 1 and 100"}),
+                    id="django-galleryfield-upload_normalization.E004"
+                ))
+
     return errors
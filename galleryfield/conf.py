@@ -15,12 +15,30 @@ DJANGO_GALLERY_FIELD_CONFIG = {
     },
     "thumbnails": {
         "size": 120,
-        "quality": 80
+        "quality": 80,
+        "generate_async": False,
+        "async_task_runner": None,
     },
     "jquery_file_upload_ui_options": {}
     "jquery_file_upload_ui_sortable_options": {}
     "widget_hidden_input_css_class": "django-galleryfield",
     "prompt_alert_if_changed_on_window_reload": True,
+    "in_memory_ordering_threshold": 100,
+    "image_data_cache": {
+        "alias": None,
+        "timeout": 3600,
+    },
+    "non_destructive_crop": False,
+    "chunked_upload": {
+        "temp_dir": None,
+        "expiration": 86400,
+    },
+    "upload_normalization": {
+        "max_width": None,
+        "max_height": None,
+        "format": None,
+        "quality": None,
+    },
 }
 """
 
@@ -45,6 +63,10 @@ DEFAULT_THUMBNAIL_SIZE = get_formatted_thumbnail_size(
         "size", defaults.DEFAULT_THUMBNAIL_SIZE))
 DEFAULT_THUMBNAIL_QUALITY = int(_APP_CONFIG_THUMBNAILS.get(
     "quality", defaults.DEFAULT_THUMBNAIL_QUALITY))
+THUMBNAIL_GENERATE_ASYNC = _APP_CONFIG_THUMBNAILS.get(
+    "generate_async", defaults.THUMBNAIL_GENERATE_ASYNC)
+THUMBNAIL_ASYNC_TASK_RUNNER = _APP_CONFIG_THUMBNAILS.get(
+    "async_task_runner", defaults.THUMBNAIL_ASYNC_TASK_RUNNER)
 
 
 _APP_CONFIG_WIDGET_INPUT_CSS_CLASS = _APP_CONFIG.get(
@@ -57,6 +79,37 @@ PROMPT_ALERT_ON_WINDOW_RELOAD_IF_CHANGED = _APP_CONFIG.get(
     defaults.PROMPT_ALERT_ON_WINDOW_RELOAD_IF_CHANGED
 )
 
+IN_MEMORY_ORDERING_THRESHOLD = int(_APP_CONFIG.get(
+    "in_memory_ordering_threshold", defaults.IN_MEMORY_ORDERING_THRESHOLD))
+
+_APP_CONFIG_IMAGE_DATA_CACHE = _APP_CONFIG.get("image_data_cache", {})
+IMAGE_DATA_CACHE_ALIAS = _APP_CONFIG_IMAGE_DATA_CACHE.get(
+    "alias", defaults.IMAGE_DATA_CACHE_ALIAS)
+IMAGE_DATA_CACHE_TIMEOUT = _APP_CONFIG_IMAGE_DATA_CACHE.get(
+    "timeout", defaults.IMAGE_DATA_CACHE_TIMEOUT)
+
+NON_DESTRUCTIVE_CROP = _APP_CONFIG.get(
+    "non_destructive_crop", defaults.NON_DESTRUCTIVE_CROP)
+
+_APP_CONFIG_CHUNKED_UPLOAD = _APP_CONFIG.get("chunked_upload", {})
+CHUNKED_UPLOAD_TEMP_DIR = _APP_CONFIG_CHUNKED_UPLOAD.get(
+    "temp_dir", defaults.CHUNKED_UPLOAD_TEMP_DIR)
+CHUNKED_UPLOAD_EXPIRATION = _APP_CONFIG_CHUNKED_UPLOAD.get(
+    "expiration", defaults.CHUNKED_UPLOAD_EXPIRATION)
+
+_APP_CONFIG_UPLOAD_NORMALIZATION = _APP_CONFIG.get("upload_normalization", {})
+UPLOAD_NORMALIZATION_MAX_WIDTH = _APP_CONFIG_UPLOAD_NORMALIZATION.get(
+    "max_width", defaults.UPLOAD_NORMALIZATION_MAX_WIDTH)
+UPLOAD_NORMALIZATION_MAX_HEIGHT = _APP_CONFIG_UPLOAD_NORMALIZATION.get(
+    "max_height", defaults.UPLOAD_NORMALIZATION_MAX_HEIGHT)
+UPLOAD_NORMALIZATION_FORMAT = (
+    _APP_CONFIG_UPLOAD_NORMALIZATION.get(
+        "format", defaults.UPLOAD_NORMALIZATION_FORMAT) or None)
+if UPLOAD_NORMALIZATION_FORMAT is not None:
+    UPLOAD_NORMALIZATION_FORMAT = UPLOAD_NORMALIZATION_FORMAT.upper()
+UPLOAD_NORMALIZATION_QUALITY = _APP_CONFIG_UPLOAD_NORMALIZATION.get(
+    "quality", defaults.UPLOAD_NORMALIZATION_QUALITY)
+
 JQUERY_FILE_UPLOAD_UI_DEFAULT_OPTIONS = _APP_CONFIG.get(
     "jquery_file_upload_ui_options",
     defaults.JQUERY_FILE_UPLOAD_UI_DEFAULT_OPTIONS
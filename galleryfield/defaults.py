@@ -3,7 +3,7 @@ JQUERY_FILE_UPLOAD_UI_DEFAULT_OPTIONS = {
     "imageMaxWidth": 1024,
     "imageMaxHeight": 1024,
     "loadImageFileTypes": r"/^image\/(gif|jpeg|png|bmp|webp|svg\+xml|x-icon)$/",
-    "sequentialUploads": True,
+    "limitConcurrentUploads": 4,
     "acceptFileTypes": r"/(\.|\/)(png|gif|bmp|jpe?g|tif|ico|webp)$/i",
     "imageOrientation": True,
     "maxFileSize": 1.5 * 1024 ** 2,  # 1.5Mb
@@ -43,6 +43,7 @@ here.
 DEFAULT_UPLOAD_URL_NAME = "galleryfield-builtingalleryimage-upload"
 DEFAULT_CROP_URL_NAME = "galleryfield-builtingalleryimage-crop"
 DEFAULT_FETCH_URL_NAME = "galleryfield-builtingalleryimage-fetch"
+DEFAULT_BATCH_CROP_URL_NAME = "galleryfield-builtingalleryimage-batch-crop"
 
 DEFAULT_TARGET_IMAGE_MODEL = "galleryfield.BuiltInGalleryImage"
 DEFAULT_TARGET_IMAGE_FIELD_NAME = "image"
@@ -58,9 +59,26 @@ EXTRA_CSS = []
 
 DEFAULT_THUMBNAIL_SIZE = "120x120"
 DEFAULT_THUMBNAIL_QUALITY = 80
+THUMBNAIL_GENERATE_ASYNC = False
+THUMBNAIL_ASYNC_TASK_RUNNER = None
 
 WIDGET_HIDDEN_INPUT_CSS_CLASS = "django-galleryfield"
 
+IN_MEMORY_ORDERING_THRESHOLD = 100
+
+IMAGE_DATA_CACHE_ALIAS = None
+IMAGE_DATA_CACHE_TIMEOUT = 3600
+
+NON_DESTRUCTIVE_CROP = False
+
+CHUNKED_UPLOAD_TEMP_DIR = None
+CHUNKED_UPLOAD_EXPIRATION = 86400
+
+UPLOAD_NORMALIZATION_MAX_WIDTH = None
+UPLOAD_NORMALIZATION_MAX_HEIGHT = None
+UPLOAD_NORMALIZATION_FORMAT = None
+UPLOAD_NORMALIZATION_QUALITY = None
+
 PROMPT_ALERT_ON_WINDOW_RELOAD_IF_CHANGED = True
 
 DEFAULT_BOOTSTRAP_VERSION = 3
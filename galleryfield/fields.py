@@ -1,8 +1,11 @@
+from functools import lru_cache
+
 from django import forms
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.core.validators import BaseValidator
 from django.db import models
 from django.db.models import Case, IntegerField, Value, When
+from django.db.models.query import ModelIterable
 from django.db.models.query_utils import DeferredAttribute
 from django.utils.deconstruct import deconstructible
 from django.utils.translation import gettext_lazy as _
@@ -10,7 +13,8 @@ from django.utils.translation import ngettext_lazy
 
 from galleryfield import conf
 from galleryfield import defaults as _defaults
-from galleryfield.utils import apps, get_or_check_image_field, logger
+from galleryfield.utils import (apps, get_or_check_image_field, logger,
+                                sort_objects_by_pks)
 from galleryfield.widgets import GalleryWidget
 
 
@@ -59,10 +63,27 @@ class GalleryImages(list):
         self.instance = instance
         self._value = field_value or []
 
+        # Filled by prefetch_gallery_images()
+        self._prefetched_objects = None
+
+    @property
+    def _in_memory_ordering(self):
+        in_memory_ordering = self._field.in_memory_ordering
+        if in_memory_ordering is None:
+            return len(self._value) > conf.IN_MEMORY_ORDERING_THRESHOLD
+        return in_memory_ordering
+
     @property
     def objects(self):
         model = apps.get_model(self._field.target_model)
 
+        if self._in_memory_ordering and self._prefetched_objects is None:
+            # The SQL of Case/When with one branch per image becomes huge
+            # for large galleries, so we fetch with plain pk__in and
+            # reorder the result in Python.
+            return _order_queryset_in_memory(
+                model.objects.filter(pk__in=self._value), self._value)
+
         # Preserving the order of image using id__in=pks
         # https://stackoverflow.com/a/37146498/3437454
         cases = [When(id=x, then=Value(i)) for i, x in enumerate(self._value)]
@@ -70,9 +91,115 @@ class GalleryImages(list):
         filter_kwargs = {"id__in": self._value}
         queryset = model.objects.filter(**filter_kwargs)
         queryset = queryset.annotate(_order=case).order_by('_order')
+
+        if self._prefetched_objects is not None:
+            return _get_evaluated_queryset(queryset, self._prefetched_objects)
+
         return queryset
 
 
+class GalleryOrderedQuerySetMixin:
+    """Order the result of the queryset by the pks of the gallery in Python
+    when it is evaluated, unless it is explicitly ordered by ``order_by()``.
+    The queryset is still lazy, e.g., ``count()`` and ``exists()`` are done
+    in SQL, while ``first()``, ``last()`` and slicing follow the order of the
+    gallery.
+    """
+    _gallery_pks = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._gallery_pks = self._gallery_pks
+        return clone
+
+    @property
+    def _gallery_ordered(self):
+        return (self._gallery_pks is not None
+                and not self.query.order_by
+                and not self.query.is_sliced
+                and self._iterable_class is ModelIterable)
+
+    @property
+    def ordered(self):
+        return self._gallery_ordered or super().ordered
+
+    def _fetch_all(self):
+        gallery_ordered = self._result_cache is None and self._gallery_ordered
+        super()._fetch_all()
+        if gallery_ordered:
+            self._result_cache = sort_objects_by_pks(
+                self._result_cache, self._gallery_pks)
+            if not self.query.standard_ordering:
+                self._result_cache.reverse()
+
+    def __getitem__(self, k):
+        # Slices can't be ordered in SQL, so they are taken from the result
+        if self._gallery_ordered:
+            self._fetch_all()
+        return super().__getitem__(k)
+
+
+@lru_cache(maxsize=None)
+def _get_gallery_ordered_queryset_class(queryset_class):
+    return type(f"GalleryOrdered{queryset_class.__name__}",
+                (GalleryOrderedQuerySetMixin, queryset_class), {})
+
+
+def _order_queryset_in_memory(queryset, pks):
+    queryset.__class__ = _get_gallery_ordered_queryset_class(queryset.__class__)
+    queryset._gallery_pks = list(pks)
+    return queryset
+
+
+def _get_evaluated_queryset(queryset, result):
+    # Mimic what Django does with querysets of prefetched related managers,
+    # i.e., the queryset is returned as already evaluated. ``all()`` is
+    # overridden because that is what is used in templates, e.g.,
+    # {% for obj in object.images.objects.all %}, while chained
+    # queries like ``filter()`` still hit the database.
+    queryset._result_cache = list(result)
+    queryset._prefetch_done = True
+    queryset.all = lambda: queryset
+    return queryset
+
+
+def prefetch_gallery_images(instances, *field_names):
+    """Fetch the images of :class:`GalleryField` ``field_names`` for all
+    ``instances`` with one query per field, rather than one query per
+    instance when accessing :attr:`GalleryImages.objects`.
+
+    :param instances: A queryset or an iterable of model instances.
+    :param field_names: Names of :class:`GalleryField` of the instances.
+    :return: A list of the instances, whose
+        :attr:`GalleryImages.objects` are evaluated querysets.
+    """
+    instances = list(instances)
+    if not instances:
+        return instances
+
+    for field_name in field_names:
+        field = instances[0]._meta.get_field(field_name)
+        if not isinstance(field, GalleryField):
+            raise ValueError(
+                f"'{field_name}' is not a GalleryField of "
+                f"{instances[0]._meta.model.__name__}.")
+
+        galleries = [getattr(instance, field_name) for instance in instances]
+
+        pks = set()
+        for gallery in galleries:
+            pks.update(map(int, gallery._value))
+
+        model = apps.get_model(field.target_model)
+        objects_by_pk = model.objects.in_bulk(pks)
+
+        for gallery in galleries:
+            gallery._prefetched_objects = (
+                sort_objects_by_pks(objects_by_pk, gallery._value))
+
+    return instances
+
+
 class GalleryField(models.JSONField):
     """This is a model field which saves the id of images.
 
@@ -84,6 +211,13 @@ class GalleryField(models.JSONField):
 
     :type target_model: str, optional.
 
+    :param in_memory_ordering: Whether :attr:`GalleryImages.objects` fetches
+           images with a plain ``pk__in`` filter and orders them in Python,
+           rather than ordering by a SQL ``CASE``/``WHEN`` expression, defaults
+           to `None`, which means ordering in memory only when the number of
+           images exceeds :setting:`in_memory_ordering_threshold`.
+    :type in_memory_ordering: bool, optional.
+
     """  # noqa
 
     attr_class = GalleryImages
@@ -95,8 +229,10 @@ class GalleryField(models.JSONField):
         super().contribute_to_class(cls, name, private_only)
         setattr(cls, self.attname, self.descriptor_class(self))
 
-    def __init__(self, target_model=None, *args, **kwargs):
+    def __init__(self, target_model=None, *args,
+                 in_memory_ordering=None, **kwargs):
         self._init_target_model = self.target_model = target_model
+        self.in_memory_ordering = in_memory_ordering
         if target_model is None:
             self.target_model = _defaults.DEFAULT_TARGET_IMAGE_MODEL
 
@@ -123,6 +259,8 @@ class GalleryField(models.JSONField):
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         kwargs['target_model'] = self.target_model
+        if self.in_memory_ordering is not None:
+            kwargs['in_memory_ordering'] = self.in_memory_ordering
         return name, path, args, kwargs
 
     def formfield(self, **kwargs):
@@ -210,6 +348,9 @@ class GalleryFormField(forms.JSONField):
                 kwargs.pop("model_field", None) or self.__class__.__name__)
 
         self._max_number_of_images = max_number_of_images
+
+        # Pks of existing image model instances, see to_python()
+        self._existing_pks = set()
         super().__init__(**kwargs)
 
     _widget = GalleryWidget
@@ -316,15 +457,24 @@ class GalleryFormField(forms.JSONField):
                     params={'value': converted},
                 )
 
-        # Make sure all pks exists
-        image_model = apps.get_model(self._image_model)
-        if (image_model.objects.filter(
-                pk__in=list(map(int, converted))).count()
-                != len(converted)):
-            converted_copy = converted[:]
-            converted = []
-            for pk in converted_copy:
-                if image_model.objects.filter(pk=pk).count():
-                    converted.append(pk)
-
-        return converted
+        # Make sure all pks exists, with a single query, while preserving
+        # the order. Pks which were already validated by this field (e.g.,
+        # has_changed() calls to_python() again in the same request) are not
+        # queried again.
+        pks = list(map(int, converted))
+        unvalidated_pks = set(pks) - self._existing_pks
+        if unvalidated_pks:
+            image_model = apps.get_model(self._image_model)
+            self._existing_pks.update(
+                image_model.objects.filter(
+                    pk__in=unvalidated_pks).values_list("pk", flat=True))
+
+        return [value for value, pk in zip(converted, pks)
+                if pk in self._existing_pks]
+
+    def __deepcopy__(self, memo):
+        result = super().__deepcopy__(memo)
+
+        # Each form instance validates with its own cache
+        result._existing_pks = set()
+        return result
@@ -1,15 +1,24 @@
 from django.core.exceptions import PermissionDenied
+from django.db import connections, router
 from django.views.generic import CreateView, UpdateView
 from django.views.generic.list import BaseListView
 
-from galleryfield.mixins import (BaseCreateMixin, BaseCropViewMixin,
-                                 BaseListViewMixin)
+from galleryfield.mixins import (BaseBatchCropViewMixin, BaseCreateMixin,
+                                 BaseCropViewMixin, BaseListViewMixin)
 
 
 class ImageCreateView(BaseCreateMixin, CreateView):
     """
     The Class-based view handling the saving of uploaded image.
 
+    Files can also be uploaded by chunks, each posted with a ``Content-Range``
+    header (see :setting:`chunked_upload`). A ``GET`` request with the
+    ``file`` name and the total ``size`` of the file responds the size
+    already uploaded, from which the upload can be resumed.
+
+    Uploaded images are downscaled and re-encoded before saving as
+    configured by :setting:`upload_normalization`.
+
     .. attribute:: target_model
 
        |view_target_model|
@@ -22,12 +31,44 @@ class ImageCreateView(BaseCreateMixin, CreateView):
 
        |view_disable_server_side_crop|
 
+    .. attribute:: max_chunked_upload_size
+
+       The max size (in bytes) of files uploaded by chunks. Defaults to 100MB.
+
+    .. attribute:: max_concurrent_uploads
+
+       The max number of upload requests of a user handled at the same time,
+       defaults to ``None`` (no limit). Requests beyond the limit are
+       responded with ``429 Too Many Requests``. The requests are counted in
+       the cache of :setting:`image_data_cache` (or the default cache), which
+       should be shared by all the processes serving the view.
+
     .. automethod:: create_instance_from_form
+    .. automethod:: create_instances_from_forms
+    .. automethod:: normalize_uploaded_file
     """
     def form_valid(self, form):
         self.create_instance_from_form(form)
         return super().form_valid(form)
 
+    def create_instances_from_forms(self, forms):
+        """Save the objects from the forms of multiple files uploaded in one
+        request. It is called in a transaction, with the valid forms only.
+        By default, :meth:`create_instance_from_form` is called for each form.
+        Override it to save the objects more efficiently, e.g., by
+        ``bulk_create``.
+
+        See :class:`galleryfield.image_views.BuiltInImageCreateView` for example.
+
+        :return: A list of the saved objects, in the order of ``forms``.
+        """
+        objects = []
+        for form in forms:
+            self.object = None
+            self.create_instance_from_form(form)
+            objects.append(self.object)
+        return objects
+
     def create_instance_from_form(self, form):
         """User should provide this method to save the object which will be used 
         in form_valid method. Typically, ``self.object`` is expected to be saved 
@@ -46,6 +87,17 @@ class ImageListView(BaseListViewMixin, BaseListView):
     """
     The Class-based view for fetching the existing images of the gallery instance.
 
+    The requested ``pks`` can be fetched by windows with the ``offset``
+    and ``limit`` query parameters, in which case the response also
+    includes the ``total`` number of requested pks and the ``nextOffset``
+    (``null`` if there are no more images).
+
+    For long lists of ``pks``, the request can also be sent by ``POST``, with
+    ``pks`` in the form data (in the same format as in the query string), in a
+    JSON body (a list, or an object with a ``pks`` list), or in a body of
+    packed unsigned 64-bit little-endian integers with content type
+    ``application/octet-stream``.
+
     .. attribute:: target_model
 
        |view_target_model|
@@ -58,7 +110,28 @@ class ImageListView(BaseListViewMixin, BaseListView):
 
        |view_disable_server_side_crop|
 
+    .. attribute:: in_memory_ordering
+
+       Whether to order the fetched images in Python rather than in SQL.
+       Defaults to ``None``, i.e., only when the number of requested images
+       exceeds :setting:`in_memory_ordering_threshold`.
+
+    .. attribute:: conditional_fetch
+
+       Whether to answer ``304 Not Modified`` if the ``ETag`` of the
+       requested images didn't change. Defaults to ``False``. Don't enable
+       it if the ``serialize_extra`` method of ``target_model`` returns
+       data which changes without changing the image file.
+
+    .. attribute:: stream_response
+
+       Whether to stream the JSON response, so that the images are serialized
+       while the response is being sent, in windows of ``stream_chunk_size``
+       (defaults to 100) images, rather than all at once before responding.
+       Defaults to ``False``.
+
     .. automethod:: get_queryset
+    .. automethod:: get_etag
     """
     def get_queryset(self):
         """
@@ -74,7 +147,8 @@ class ImageCropView(BaseCropViewMixin, UpdateView):
     """
     The Class-based view handling server side cropping of an image model
     instance. Note that a new image model instance will be created rather
-    than updating the cropped instance.
+    than updating the cropped instance, unless :setting:`non_destructive_crop`
+    is enabled, in which case only the crop operation is recorded.
 
     .. attribute:: target_model
 
@@ -118,21 +192,96 @@ class ImageCropView(BaseCropViewMixin, UpdateView):
             'a create_cropped_instance_from_form() method')
 
 
+class ImageBatchCropView(BaseBatchCropViewMixin, UpdateView):
+    """
+    The Class-based view handling server side cropping of multiple image model
+    instances in one request. The request posts ``crops``, a stringfied json
+    list of cropped results (in the same format as that posted to
+    :class:`ImageCropView`), each with the ``pk`` of the instance to crop.
+    The images are cropped concurrently in a thread pool, and the response
+    contains the serialized new instances, in the order of ``crops``.
+
+    .. attribute:: target_model
+
+       |view_target_model|
+
+    .. attribute:: crop_url_name
+
+       |view_crop_url_name|
+
+    .. attribute:: disable_server_side_crop
+
+       |view_disable_server_side_crop|
+
+    .. attribute:: max_batch_size
+
+       The max number of crops in a request. Defaults to ``50``.
+
+    .. attribute:: max_workers
+
+       The max number of threads cropping images concurrently in a request.
+       Defaults to ``4``.
+
+    .. automethod:: get_queryset
+    .. automethod:: create_cropped_instance_from_form
+    """
+    def get_queryset(self):
+        """
+        User need to override this method to do some basic filter in terms of
+        who can crop which images. Crops of images not in the queryset fail
+        with an error.
+
+        :return: A Queryset
+        """
+        return super().get_queryset()
+
+    def create_cropped_instance_from_form(self, form):
+        """The same as
+        :meth:`galleryfield.image_views.ImageCropView.create_cropped_instance_from_form`,
+        called for each crop.
+        """  # noqa
+
+        raise NotImplementedError(
+            'subclasses of ImageBatchCropView must provide '
+            'a create_cropped_instance_from_form() method')
+
+
 class BuiltInImageCreateView(ImageCreateView):
     target_model = "galleryfield.BuiltInGalleryImage"
     crop_url_name = "galleryfield-builtingalleryimage-crop"  # Can be omitted
     disable_server_side_crop = False
 
+    # Twice the default 'limitConcurrentUploads' of the widget, allowing
+    # a user uploading in two pages at the same time.
+    max_concurrent_uploads = 8
+
     def create_instance_from_form(self, form):
         self.object = form.save(commit=False)
         self.object.creator = self.request.user
         self.object.save()
 
+    def create_instances_from_forms(self, forms):
+        objects = []
+        for form in forms:
+            obj = form.save(commit=False)
+            obj.creator = self.request.user
+            objects.append(obj)
+
+        # The pks of the objects are needed in the response
+        connection = connections[router.db_for_write(self.model)]
+        if connection.features.can_return_rows_from_bulk_insert:
+            return self.model._default_manager.bulk_create(objects)
+
+        for obj in objects:
+            obj.save()
+        return objects
+
 
 class BuiltInImageListView(ImageListView):
     target_model = "galleryfield.BuiltInGalleryImage"
     crop_url_name = "galleryfield-builtingalleryimage-crop"  # Can be omitted
     disable_server_side_crop = False
+    conditional_fetch = True
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -156,3 +305,18 @@ class BuiltInImageCropView(ImageCropView):
         # we don't need to set self.object.creator here because
         # it's copied from the original instance.
         self.object = form.save()
+
+
+class BuiltInImageBatchCropView(ImageBatchCropView):
+    target_model = "galleryfield.BuiltInGalleryImage"
+    crop_url_name = "galleryfield-builtingalleryimage-crop"  # Can be commented
+    disable_server_side_crop = False
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(creator=self.request.user)
+        return queryset
+
+    def create_cropped_instance_from_form(self, form):
+        self.object = form.save()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from galleryfield import conf
+from galleryfield.uploads import (clear_stale_chunked_uploads,
+                                  get_chunked_upload_dir)
+
+
+class Command(BaseCommand):
+    help = ("Remove the partial files of chunked uploads which were not "
+            "finished in time.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age", type=int, default=None,
+            help="Remove partial files not modified in this number of "
+                 "seconds. Defaults to 'expiration' of 'chunked_upload' in "
+                 "settings.")
+
+    def handle(self, *args, **options):
+        max_age = options["max_age"]
+        if max_age is None:
+            max_age = conf.CHUNKED_UPLOAD_EXPIRATION
+        if max_age < 0:
+            raise CommandError("'--max-age' must be a non-negative integer.")
+
+        removed = clear_stale_chunked_uploads(max_age)
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {removed} stale chunked uploads from "
+            f"{get_chunked_upload_dir()}."))
@@ -0,0 +1,206 @@
+import multiprocessing
+import time
+from concurrent.futures import (FIRST_COMPLETED, Executor, Future,
+                                ProcessPoolExecutor, wait)
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from galleryfield import conf, defaults
+from galleryfield.thumbnails import (create_thumbnail, get_image,
+                                     is_thumbnail_url_cached,
+                                     prefetch_crop_operations)
+from galleryfield.utils import (get_formatted_thumbnail_size,
+                                get_or_check_image_field)
+
+
+def _init_worker():
+    # Worker processes are spawned, Django needs to be set up in them
+    import django
+    if not apps.ready:
+        django.setup()
+
+
+class InlineExecutor(Executor):
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def warm_thumbnails(target_model, image_field_name, rows, thumbnail_sizes,
+                    missing_only=False):
+    """Generate thumbnails of ``thumbnail_sizes`` for ``rows``, a list of
+    ``(pk, image name)`` tuples of ``target_model``.
+
+    :return: a tuple of the number of generated thumbnails and a list of
+      ``(pk, error string)``.
+    """
+    model = apps.get_model(target_model)
+    generated = 0
+    errors = []
+
+    # No need to query the image instances, the field files are all we need
+    objects = [model(pk=pk, **{image_field_name: image_name})
+               for pk, image_name in rows]
+    if conf.NON_DESTRUCTIVE_CROP:
+        prefetch_crop_operations(objects)
+
+    for obj in objects:
+        pk = obj.pk
+        try:
+            # The rendition if the image is cropped, see get_image
+            image = get_image(obj, image_field_name)
+        except Exception as e:
+            errors.append((pk, f"{type(e).__name__}: {str(e)}"))
+            continue
+
+        for thumbnail_size in thumbnail_sizes:
+            if missing_only and is_thumbnail_url_cached(image, thumbnail_size):
+                continue
+            try:
+                create_thumbnail(image, thumbnail_size)
+            except Exception as e:
+                errors.append((pk, f"{type(e).__name__}: {str(e)}"))
+                break
+            generated += 1
+    return generated, errors
+
+
+class Command(BaseCommand):
+    help = ("Generate thumbnails of the images of a target image model, so "
+            "that they won't be generated in the requests.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model", default=defaults.DEFAULT_TARGET_IMAGE_MODEL,
+            help="The target image model in the form of 'app_label.ModelName', "
+                 "defaults to '%s'." % defaults.DEFAULT_TARGET_IMAGE_MODEL)
+        parser.add_argument(
+            "--size", action="append", dest="sizes",
+            help="The thumbnail size, e.g., '120x120'. Can be used multiple "
+                 "times. Defaults to the size configured in settings.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=500,
+            help="Number of images processed in each chunk.")
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Number of worker processes. 1 means generating in the "
+                 "current process.")
+        parser.add_argument(
+            "--start-after", type=int, default=None,
+            help="Only process images with pk greater than this value, used "
+                 "to resume an interrupted run.")
+        parser.add_argument(
+            "--missing-only", action="store_true",
+            help="Only generate thumbnails whose URLs are not cached yet.")
+
+    def handle(self, *args, **options):
+        target_model = options["model"]
+        try:
+            model = apps.get_model(target_model)
+        except (LookupError, ValueError) as e:
+            raise CommandError(f"Invalid model '{target_model}': {str(e)}")
+
+        image_field = get_or_check_image_field(
+            obj=self, target_model=target_model,
+            check_id_prefix=self.__class__.__name__, is_checking=False)
+        if image_field is None:
+            raise CommandError(
+                f"Unable to find the image field of '{target_model}'.")
+
+        try:
+            thumbnail_sizes = [
+                get_formatted_thumbnail_size(size)
+                for size in options["sizes"] or [conf.DEFAULT_THUMBNAIL_SIZE]]
+        except Exception as e:
+            raise CommandError(f"Invalid thumbnail size: {str(e)}")
+
+        chunk_size = options["chunk_size"]
+        workers = options["workers"]
+        if chunk_size < 1 or workers < 1:
+            raise CommandError(
+                "'--chunk-size' and '--workers' must be positive integers.")
+
+        queryset = model.objects.order_by("pk")
+        if options["start_after"] is not None:
+            queryset = queryset.filter(pk__gt=options["start_after"])
+        rows = queryset.values_list(
+            "pk", image_field.name).iterator(chunk_size=chunk_size)
+
+        task_args = (target_model, image_field.name)
+        task_kwargs = {"thumbnail_sizes": thumbnail_sizes,
+                       "missing_only": options["missing_only"]}
+
+        if workers == 1:
+            executor = InlineExecutor()
+        else:
+            # Thumbnails are recorded in the key value store of sorl.thumbnail
+            # which might be the database, worker processes must not share
+            # the database connection with the current process. Forked
+            # workers are only started at the first submit, when the rows
+            # are already being read through the connection, so they are
+            # spawned instead.
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                mp_context=multiprocessing.get_context("spawn"))
+
+        self._start = time.monotonic()
+        self._n_images = self._n_generated = self._n_errors = 0
+
+        # Chunks might finish out of order, the pk to resume from is the
+        # last pk of the finished chunks before the first unfinished one.
+        submitted = []
+        resume_pk = options["start_after"]
+
+        with executor:
+            pending = set()
+            for chunk in self.iter_chunks(rows, chunk_size):
+                if len(pending) >= workers * 2:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    resume_pk = self.report(submitted, resume_pk)
+
+                future = executor.submit(
+                    warm_thumbnails, *task_args, chunk, **task_kwargs)
+                submitted.append((future, len(chunk), chunk[-1][0]))
+                pending.add(future)
+
+            wait(pending)
+            resume_pk = self.report(submitted, resume_pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {self._n_images} images, {self._n_generated} thumbnails "
+            f"generated, {self._n_errors} errors, "
+            f"in {time.monotonic() - self._start:.1f}s."))
+
+    @staticmethod
+    def iter_chunks(rows, chunk_size):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def report(self, submitted, resume_pk):
+        while submitted and submitted[0][0].done():
+            future, n_images, last_pk = submitted.pop(0)
+            generated, errors = future.result()
+            self._n_images += n_images
+            self._n_generated += generated
+            self._n_errors += len(errors)
+            for pk, error in errors:
+                self.stderr.write(f"Image {pk}: {error}")
+            resume_pk = last_pk
+
+            elapsed = time.monotonic() - self._start
+            self.stdout.write(
+                f"{self._n_images} images, {self._n_generated} thumbnails "
+                f"generated, {self._n_images / max(elapsed, 1e-6):.1f} "
+                f"images/s. Resume with --start-after={resume_pk}")
+        return resume_pk
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('galleryfield', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageCrop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_model', models.CharField(max_length=200, verbose_name='Target model')),
+                ('object_pk', models.PositiveBigIntegerField(verbose_name='Object pk')),
+                ('x', models.IntegerField()),
+                ('y', models.IntegerField()),
+                ('width', models.IntegerField()),
+                ('height', models.IntegerField()),
+                ('rotate', models.IntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('pk',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imagecrop',
+            index=models.Index(fields=['target_model', 'object_pk'], name='galleryfiel_target__fe5186_idx'),
+        ),
+    ]
@@ -1,18 +1,28 @@
+import copy
+import hashlib
 import json
 import mimetypes
 import os
-from io import BytesIO
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
 from urllib.parse import unquote
 
 from django import forms
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
 from django.core.exceptions import (ImproperlyConfigured, PermissionDenied,
-                                    SuspiciousOperation)
-from django.core.files.uploadedfile import InMemoryUploadedFile
+                                    SuspiciousOperation, ValidationError)
+from django.core.files.uploadedfile import UploadedFile
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models import Case, When
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.templatetags.static import static
 from django.urls import reverse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
 from django.utils.translation import gettext
 from django.views.generic import UpdateView
 from django.views.generic.list import BaseListView
@@ -20,8 +30,23 @@ from PIL import Image
 from sorl.thumbnail import get_thumbnail
 
 from galleryfield import conf, defaults
-from galleryfield.utils import (get_formatted_thumbnail_size,
-                                get_or_check_image_field)
+from galleryfield.thumbnails import (CROP_OPERATIONS_ATTR,
+                                     delete_image_rendition,
+                                     get_crop_operations, get_image,
+                                     get_image_rendition,
+                                     get_or_schedule_thumbnail_url,
+                                     prefetch_crop_operations)
+from galleryfield.uploads import (ChunkedUploadedFile, UploadedImageField,
+                                  get_chunked_upload_path,
+                                  get_chunked_upload_size, parse_content_range,
+                                  write_chunk)
+from galleryfield.utils import (ImageInfo, crop_image_file,
+                                get_downscaled_size,
+                                get_formatted_thumbnail_size,
+                                get_image_data_cache_key,
+                                get_image_data_cache_version,
+                                get_or_check_image_field, normalize_image_file,
+                                sort_objects_by_pks)
 
 # cropping gif not supported by cropperjs
 # https://github.com/fengyuanchen/cropperjs/issues/756
@@ -36,13 +61,45 @@ ALLOWED_CROP_MIMETYPES = (
     "image/webp",
 )
 
+# Pillow detects multi-picture JPEGs, e.g., photos taken by many cameras and
+# phones, as MPO, which are JPEGs named as such.
+CROP_MIMETYPE_ALIASES = {
+    "image/mpo": "image/jpeg",
+}
+
+THUMBNAIL_PLACEHOLDER = "img/loading.gif"
+
 
 def is_image_file_cropable(image_file):
     # Python mimetypes doesn't support image/webp until 3.10
     # https://github.com/python/cpython/issues/83083
     return (
-            mimetypes.guess_type(image_file.path)[0] in ALLOWED_CROP_MIMETYPES
-            or os.path.splitext(image_file.path)[1] in [".webp"])
+            mimetypes.guess_type(image_file.name)[0] in ALLOWED_CROP_MIMETYPES
+            or os.path.splitext(image_file.name)[1] in [".webp"])
+
+
+def get_validated_cropped_result(cropped_result):
+    try:
+        x = int(float(cropped_result['x']))
+        y = int(float(cropped_result['y']))
+        width = int(float(cropped_result['width']))
+        height = int(float(cropped_result['height']))
+        rotate = int(float(cropped_result['rotate']))
+
+        # todo: allow show resized image in model ui
+        try:
+            scale_x = float(cropped_result['scaleX'])
+        except KeyError:
+            scale_x = None
+        try:
+            scale_y = float(cropped_result['scaleY'])
+        except KeyError:
+            scale_y = None
+    except Exception:
+        raise SuspiciousOperation(
+            gettext('Wrong format of crop_result data.'))
+
+    return x, y, width, height, rotate, scale_x, scale_y
 
 
 class BaseImageModelMixin:
@@ -106,8 +163,36 @@ class BaseImageModelMixin:
 
         return obj.get_crop_url()
 
+    def get_uploaded_file(self, obj):
+        # The file uploaded in this request for obj, if any. See
+        # BaseCreateMixin.set_uploaded_file.
+        return getattr(self, "_uploaded_files", {}).get(obj.pk)
+
+    def get_image(self, obj):
+        # The field file of the image to be displayed, see
+        # galleryfield.thumbnails.get_image. The result for the last
+        # instance is kept since it's used several times when serializing
+        # the instance.
+        if self.get_uploaded_file(obj) is not None:
+            # Just uploaded, no crop operations yet
+            return getattr(obj, self._image_field_name)
+
+        memo = getattr(self, "_image_memo", None)
+        if memo is None or memo[0] is not obj:
+            memo = self._image_memo = (obj, get_image(obj, self._image_field_name))
+        return memo[1]
+
+    def is_image_cropable(self, obj):
+        uploaded_file = self.get_uploaded_file(obj)
+        if uploaded_file is not None:
+            # The real format of the image rather than guessing by its name
+            mime_type = uploaded_file.image_info.mime_type
+            return (CROP_MIMETYPE_ALIASES.get(mime_type, mime_type)
+                    in ALLOWED_CROP_MIMETYPES)
+        return is_image_file_cropable(getattr(obj, self._image_field_name))
+
     def get_default_image_url(self, obj):  # noqa
-        image = getattr(obj, self._image_field_name)
+        image = self.get_image(obj)
         return image.url
 
     def _get_image_url(self, obj):  # noqa
@@ -144,17 +229,23 @@ class BaseImageModelMixin:
                     "are handling different image models. This is prohibited."
             )
 
-    def get_and_validate_thumbnail_size_from_request(self):
-        # Get preview size from request
-        method = self.request.method.lower()
-
-        if method == "get":
+    def get_thumbnail_size_data_from_request(self):
+        # Return the requested thumbnail size, or None if not requested.
+        if self.request.method.lower() == "get":
             # If thumbnail_size is a list, request query string should be in
             # the form of &thumbnail_size=100&thumbnail_size=150, and the
             # 'get' method should be 'getlist'
             # Ref: https://stackoverflow.com/a/30107874/3437454
-            thumbnail_size = self.request.GET.getlist(
-                'thumbnail_size', conf.DEFAULT_THUMBNAIL_SIZE)
+            return self.request.GET.getlist('thumbnail_size') or None
+        return self.request.POST.get('thumbnail_size', None)
+
+    def get_and_validate_thumbnail_size_from_request(self):
+        # Get preview size from request
+        thumbnail_size = self.get_thumbnail_size_data_from_request()
+        if thumbnail_size is None:
+            thumbnail_size = conf.DEFAULT_THUMBNAIL_SIZE
+
+        if self.request.method.lower() == "get":
             error_msg = gettext(
                 "'thumbnail_size' must be an int, or a string of int, "
                 "or a string in the form of '80x60', or a list of"
@@ -162,8 +253,6 @@ class BaseImageModelMixin:
                 "Ref: https://stackoverflow.com/a/30107874/3437454"
             )
         else:
-            thumbnail_size = self.request.POST.get(
-                'thumbnail_size', conf.DEFAULT_THUMBNAIL_SIZE)
             error_msg = gettext(
                 "'thumbnail_size' must be an int, or a string of int, "
                 "or a string in the form of '80x60', or a list or tuple of "
@@ -182,6 +271,15 @@ class BaseImageModelMixin:
             crop="center",
             quality=conf.DEFAULT_THUMBNAIL_QUALITY)
 
+    def get_thumbnail_url(self, obj):
+        # Return None if the thumbnail is being generated asynchronously
+        if not conf.THUMBNAIL_GENERATE_ASYNC:
+            return self.get_thumbnail(self.get_image(obj)).url
+
+        return get_or_schedule_thumbnail_url(
+            self.target_model, self._image_field_name, obj,
+            self.thumbnail_size, image=self.get_image(obj))
+
     def get_default_image_data(self, obj):
         # This is used to construct return value file dict in
         # upload list and crop views.
@@ -189,7 +287,7 @@ class BaseImageModelMixin:
 
         image_data = {
             'pk': obj.pk,
-            'name': os.path.basename(image.path),
+            'name': os.path.basename(image.name),
         }
 
         errors = []
@@ -209,8 +307,12 @@ class BaseImageModelMixin:
                     gettext("crop url: %s: %s" % (type(e).__name__, str(e)))
                 )
 
+        uploaded_file = self.get_uploaded_file(obj)
         try:
-            image_size = image.size
+            if uploaded_file is not None:
+                image_size = uploaded_file.size
+            else:
+                image_size = self.get_image(obj).size
         except OSError:
             errors.append(gettext(
                 "image: The image was unexpectedly deleted from server"))
@@ -220,15 +322,58 @@ class BaseImageModelMixin:
             })
 
         try:
-            image_data['thumbnailUrl'] = self.get_thumbnail(image).url
+            thumbnail_url = self.get_thumbnail_url(obj)
         except Exception as e:
             errors.append(
                 gettext("thumbnail: %s: %s" % (type(e).__name__, str(e)))
             )
+        else:
+            if thumbnail_url is None:
+                # The widget needs a thumbnailUrl to render the image, it
+                # will poll for the real one by the pending flag.
+                thumbnail_url = static(THUMBNAIL_PLACEHOLDER)
+                image_data["thumbnailPending"] = True
+                self._thumbnail_pending = True
+            image_data["thumbnailUrl"] = thumbnail_url
 
         return image_data, errors
 
+    def get_image_data_cache(self):
+        # Return None to disable caching of serialized image data
+        if conf.IMAGE_DATA_CACHE_ALIAS is None:
+            return None
+        return caches[conf.IMAGE_DATA_CACHE_ALIAS]
+
+    def get_image_data_cache_variant(self, obj):
+        # Serialized data of an image instance are cached with one key per
+        # variant, i.e., the different thumbnail size and crop settings, all
+        # of which are invalidated at once by bumping the version of the
+        # instance when it is saved or deleted.
+        image = getattr(obj, self._image_field_name)
+        return ":".join(
+            [image.name, self.thumbnail_size,
+             str(int(not self.disable_server_side_crop))])
+
     def get_serialized_image_data(self, obj):
+        cache = self.get_image_data_cache()
+        if cache is None:
+            return self._get_serialized_image_data(obj)
+
+        cache_key = get_image_data_cache_key(
+            self.model, obj.pk,
+            get_image_data_cache_version(cache, self.model, obj.pk),
+            self.get_image_data_cache_variant(obj))
+
+        image_data = cache.get(cache_key)
+        if image_data is not None:
+            return image_data
+
+        image_data = self._get_serialized_image_data(obj)
+        if "error" not in image_data and "thumbnailPending" not in image_data:
+            cache.set(cache_key, image_data, conf.IMAGE_DATA_CACHE_TIMEOUT)
+        return image_data
+
+    def _get_serialized_image_data(self, obj):
         image_data, errors = self.get_default_image_data(obj)
 
         model_serialize_extra_method = (
@@ -260,8 +405,7 @@ class BaseImageModelMixin:
         # serialize_extra in model method.
         # todo: need tests
         if (self.disable_server_side_crop
-                or not is_image_file_cropable(
-                    getattr(obj, self._image_field_name))):
+                or not self.is_image_cropable(obj)):
             try:
                 del image_data["cropUrl"]
             except KeyError:
@@ -300,15 +444,245 @@ class ImageFormViewMixin:
 
 
 class BaseCreateMixin(ImageFormViewMixin, BaseImageModelMixin):
-    http_method_names = ['post']
+    """
+    :attr:`max_chunked_upload_size`: int, the max size (in bytes) of files
+       uploaded by chunks, defaults to 100MB.
+
+    :attr:`max_concurrent_uploads`: int, the max number of upload requests
+       of a user handled at the same time, defaults to None (no limit).
+       Requests beyond the limit are responded with ``429 Too Many Requests``.
+    """
+    http_method_names = ['get', 'post']
+    max_chunked_upload_size = 100 * 1024 ** 2
+    max_concurrent_uploads = None
+
+    # Counters of a user's concurrent uploads expire in case a request
+    # was killed before releasing its slot
+    concurrent_uploads_timeout = 300
 
     def setup(self, request, *args, **kwargs):
         super().setup(request, *args, **kwargs)
+        self._assembled_file = None
+        self._uploaded_files = {}
+
+    def set_uploaded_file(self, obj, form):
+        # Share what was read from the header of the uploaded file when
+        # validating the form, so that the file needn't be opened again
+        # when serializing obj.
+        uploaded_file = form.cleaned_data.get(self._image_field_name)
+        image_info = getattr(uploaded_file, "image_info", None)
+        if image_info is None:
+            return
+
+        self._uploaded_files[obj.pk] = uploaded_file
+
+        # Used by ImageFieldFile.width and ImageFieldFile.height
+        getattr(obj, self._image_field_name)._dimensions_cache = (
+            image_info.width, image_info.height)
+
+    def get_uploader_key(self):
+        # Identify the user uploading files, so that chunks of the same file
+        # uploaded by different users are assembled separately, and the
+        # concurrent uploads are limited per user
+        if self.request.user.is_authenticated:
+            return f"user-{self.request.user.pk}"
+
+        session = getattr(self.request, "session", None)
+        if session is None:
+            raise PermissionDenied(
+                gettext("Chunked uploads require a user or a session"))
+        if session.session_key is None:
+            session.save()
+        return f"session-{session.session_key}"
+
+    def get_chunked_upload_path(self, file_name, total):
+        return get_chunked_upload_path(
+            self.get_uploader_key(), file_name, total)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.max_concurrent_uploads is None or request.method != "POST":
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = caches[conf.IMAGE_DATA_CACHE_ALIAS or DEFAULT_CACHE_ALIAS]
+        key = (f"galleryfield-concurrent-uploads:"
+               f"{self.model._meta.label_lower}:{self.get_uploader_key()}")
+
+        cache.add(key, 0, self.concurrent_uploads_timeout)
+        try:
+            n_uploads = cache.incr(key)
+        except ValueError:
+            # Expired in between
+            cache.add(key, 1, self.concurrent_uploads_timeout)
+            n_uploads = 1
+
+        try:
+            if n_uploads > self.max_concurrent_uploads:
+                response = self.render_to_response(
+                    {"message": gettext("Too many uploads at the same time")},
+                    status=429)
+                response["Retry-After"] = "1"
+                return response
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            try:
+                cache.decr(key)
+            except ValueError:
+                pass
+
+    def get(self, request, *args, **kwargs):
+        # Respond the uploaded size of a chunked upload, so that the client
+        # can resume the upload from there
+        file_name = request.GET.get("file", None)
+        total = request.GET.get("size", None)
+        if not file_name or not str(total).isdigit():
+            raise SuspiciousOperation(
+                gettext("The request should contain 'file' and 'size'"))
+
+        path = self.get_chunked_upload_path(file_name, int(total))
+        return self.render_to_response(
+            {"file": {"name": file_name,
+                      "size": get_chunked_upload_size(path)}})
+
+    def post(self, request, *args, **kwargs):
+        content_range = request.META.get("HTTP_CONTENT_RANGE", None)
+        if content_range is None:
+            uploaded_files = request.FILES.getlist("files[]")
+            if len(uploaded_files) > 1:
+                return self.create_from_multiple_files(uploaded_files)
+            return super().post(request, *args, **kwargs)
+
+        start, end, total = parse_content_range(content_range)
+        if total > self.max_chunked_upload_size:
+            raise SuspiciousOperation(
+                gettext("The file size %d exceeds the limit %d"
+                        % (total, self.max_chunked_upload_size)))
+
+        try:
+            chunk = request.FILES["files[]"]
+        except KeyError:
+            raise SuspiciousOperation(
+                gettext("The request doesn't contain the file chunk"))
+        if chunk.size != end - start + 1:
+            raise SuspiciousOperation(
+                gettext("The size of the chunk doesn't match Content-Range"))
+
+        path = self.get_chunked_upload_path(chunk.name, total)
+        size = write_chunk(path, start, chunk)
+        if size < total:
+            response = self.render_to_response(
+                {"files": [{"name": chunk.name, "size": size}]})
+
+            # Used by jQuery-File-Upload as the uploaded bytes
+            response["Range"] = f"bytes=0-{size - 1}"
+            return response
+
+        # The instance is only created after the last chunk was uploaded
+        try:
+            with open(path, "rb") as f:
+                self._assembled_file = ChunkedUploadedFile(
+                    file=f, name=chunk.name, content_type=chunk.content_type,
+                    size=total, charset=None)
+                return super().post(request, *args, **kwargs)
+        finally:
+            self._assembled_file = None
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Moved to the storage
+                pass
+
+    def create_from_multiple_files(self, uploaded_files):
+        # Files uploaded in one request are validated separately, while the
+        # valid ones are saved together in a transaction.
+        self.object = None
+        form_class = self.get_form_class()
+        form_kwargs = self.get_form_kwargs()
+        forms = [form_class(**dict(form_kwargs, files={"files[]": uploaded_file}))
+                 for uploaded_file in uploaded_files]
+
+        objects = []
+        valid_forms = [form for form in forms if form.is_valid()]
+        if valid_forms:
+            with transaction.atomic():
+                objects = self.create_instances_from_forms(valid_forms)
+
+        for form, obj in zip(valid_forms, objects):
+            self.set_uploaded_file(obj, form)
+
+        files = []
+        objects = iter(objects)
+        for uploaded_file, form in zip(uploaded_files, forms):
+            if form.is_valid():
+                files.append(self.get_serialized_image_data(next(objects)))
+            else:
+                files.append({
+                    "name": uploaded_file.name,
+                    "error": "; ".join(
+                        str(error) for errors in form.errors.values()
+                        for error in errors)})
+
+        return self.render_to_response(
+            {"files": files, "message": gettext("Done")})
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        if self._assembled_file is not None:
+            kwargs["files"] = {"files[]": self._assembled_file}
+        return kwargs
+
+    def normalize_uploaded_file(self, uploaded_file):
+        """Downscale and re-encode the uploaded image as configured by
+        :setting:`upload_normalization`, before it is saved.
+
+        :return: The normalized uploaded file, or ``uploaded_file`` itself
+          if it needn't be normalized.
+        """
+        image_info = uploaded_file.image_info
+        size = get_downscaled_size(
+            (image_info.width, image_info.height),
+            conf.UPLOAD_NORMALIZATION_MAX_WIDTH,
+            conf.UPLOAD_NORMALIZATION_MAX_HEIGHT)
+        image_format = conf.UPLOAD_NORMALIZATION_FORMAT or image_info.format
+
+        # Images within the limits are not re-encoded for the quality only,
+        # which would lose quality without saving much.
+        if (size == (image_info.width, image_info.height)
+                and image_format == image_info.format):
+            return uploaded_file
+
+        # Spooled to disk for large images
+        normalized_io = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        uploaded_file.seek(0)
+        if not normalize_image_file(
+                uploaded_file, normalized_io, size, image_format,
+                conf.UPLOAD_NORMALIZATION_QUALITY):
+            normalized_io.close()
+            uploaded_file.seek(0)
+            return uploaded_file
+
+        mime_type = Image.MIME.get(image_format)
+        name = uploaded_file.name
+        if image_format != image_info.format:
+            name = (os.path.splitext(name)[0]
+                    + (mimetypes.guess_extension(mime_type or "") or ""))
+
+        normalized_file = UploadedFile(
+            file=normalized_io, name=name, content_type=mime_type,
+            size=normalized_io.tell(), charset=None)
+        normalized_file.seek(0)
+        normalized_file.image_info = ImageInfo(image_format, mime_type, *size)
+        return normalized_file
+
+    def get_context_data(self, form):
+        if self.object and form.is_valid():
+            self.set_uploaded_file(self.object, form)
+        return super().get_context_data(form)
 
     def get_form_class(self):
         # Here we were simulating the request is done through
         # a form. In this way, we can used ImageField to validate
-        # the file.
+        # the file, by its header only.
 
         this = self
 
@@ -316,6 +690,7 @@ class BaseCreateMixin(ImageFormViewMixin, BaseImageModelMixin):
             class Meta:
                 model = this.model
                 fields = (this._image_field_name,)
+                field_classes = {this._image_field_name: UploadedImageField}
 
             def __init__(self, files=None, **kwargs):
                 if files is not None:
@@ -323,6 +698,23 @@ class BaseCreateMixin(ImageFormViewMixin, BaseImageModelMixin):
                     files = {this._image_field_name: files["files[]"]}
                 return super().__init__(files=files, **kwargs)
 
+            def clean(self):
+                cleaned_data = super().clean()
+                field_name = this._image_field_name
+                uploaded_file = cleaned_data.get(field_name)
+                if getattr(uploaded_file, "image_info", None) is None:
+                    return cleaned_data
+
+                try:
+                    cleaned_data[field_name] = (
+                        this.normalize_uploaded_file(uploaded_file))
+                except Exception:
+                    # Only the header was validated
+                    self.add_error(field_name, ValidationError(
+                        self.fields[field_name].error_messages["invalid_image"],
+                        code="invalid_image"))
+                return cleaned_data
+
         return ImageForm
 
     def form_invalid(self, form):
@@ -332,23 +724,104 @@ class BaseCreateMixin(ImageFormViewMixin, BaseImageModelMixin):
 
 
 class BaseListViewMixin(BaseImageModelMixin, BaseListView):
+    """
+    :attr:`in_memory_ordering`: bool, whether the images are fetched with
+       a plain ``pk__in`` filter and ordered in Python, instead of ordered
+       by a SQL ``CASE``/``WHEN`` expression, defaults to None, which means
+       ordering in memory only when the number of requested images exceeds
+       :setting:`in_memory_ordering_threshold`.
+
+    :attr:`conditional_fetch`: bool, whether to respond ``304 Not Modified``
+       when the client already has the requested images, validated by an
+       ``ETag`` computed by :meth:`get_etag`, defaults to False. Responses
+       with pending thumbnails (see :setting:`thumbnails`) have no ``ETag``.
+
+    :attr:`stream_response`: bool, whether to stream the JSON response,
+       serializing the images window by window (of :attr:`stream_chunk_size`
+       images, ordered in memory), instead of serializing all images before
+       responding, defaults to False.
+    """
     # List view doesn't include a form
 
+    in_memory_ordering = None
+    conditional_fetch = False
+    stream_response = False
+    stream_chunk_size = 100
+
     def setup(self, request, *args, **kwargs):
         super().setup(request, *args, **kwargs)
         self._pks = self.get_and_validate_pks_from_request()
+        self._thumbnail_pending = False
+
+        # Fetching a window of the requested pks
+        self._total = self._next_offset = None
+        window = self.get_and_validate_window_from_request()
+        if window is not None:
+            offset, limit = window
+            self._total = len(self._pks)
+            self._pks = self._pks[offset:offset + limit]
+            if offset + limit < self._total:
+                self._next_offset = offset + limit
+
+    def get_pks_data_from_request(self):
+        # The pks can be sent by GET query string, or by POST (as form data,
+        # a JSON body or a packed array of unsigned 64-bit little-endian
+        # integers) in case the pks list is too long for an URL.
+        request = self.request
+        if request.method != "POST":
+            return request.GET.get("pks", None)
+
+        if request.content_type == "application/octet-stream":
+            body = request.body
+            if len(body) % 8:
+                raise SuspiciousOperation(
+                    gettext("Invalid length of packed pks: %d" % len(body)))
+            return list(struct.unpack(f"<{len(body) // 8}Q", body))
+
+        if request.content_type == "application/json":
+            data = self.get_json_data_from_request()
+            if isinstance(data, dict):
+                data = data.get("pks", None)
+            return data
+
+        return request.POST.get("pks", None)
+
+    def get_json_data_from_request(self):
+        if not hasattr(self, "_json_data"):
+            try:
+                self._json_data = json.loads(self.request.body)
+            except Exception as e:
+                raise SuspiciousOperation(
+                    gettext("Invalid JSON body: %s: %s"
+                            % (type(e).__name__, str(e))))
+        return self._json_data
+
+    def get_thumbnail_size_data_from_request(self):
+        # The thumbnail size is sent in the JSON object along with the pks,
+        # or else in the query string for POST bodies which only contain the
+        # pks, i.e., a JSON list or packed pks.
+        request = self.request
+        if request.method == "POST" and request.content_type in [
+                "application/json", "application/octet-stream"]:
+            if request.content_type == "application/json":
+                data = self.get_json_data_from_request()
+                if isinstance(data, dict):
+                    return data.get("thumbnail_size", None)
+            return request.GET.getlist("thumbnail_size") or None
+        return super().get_thumbnail_size_data_from_request()
 
     def get_and_validate_pks_from_request(self):
         # convert the request data "pks" (which is supposed to
-        # be a stringfied json string) into a list of
-        # image instance "pk".
-        pks = self.request.GET.get("pks", None)
+        # be a stringfied json string, or a list if sent by a JSON or
+        # packed POST body) into a list of image instance "pk".
+        pks = self.get_pks_data_from_request()
         if not pks:
             raise SuspiciousOperation(
                 gettext("The request doesn't contain pks data"))
 
         try:
-            pks = json.loads(unquote(pks))
+            if isinstance(pks, str):
+                pks = json.loads(unquote(pks))
             assert isinstance(pks, list)
         except Exception as e:
             raise SuspiciousOperation(
@@ -363,6 +836,81 @@ class BaseListViewMixin(BaseImageModelMixin, BaseListView):
                             % str(pk)))
         return pks
 
+    def get_and_validate_window_from_request(self):
+        # Return None if the request doesn't specify "offset" or "limit",
+        # else a tuple of (offset, limit) over the requested pks.
+        offset = self.request.GET.get("offset", None)
+        limit = self.request.GET.get("limit", None)
+        if offset is None and limit is None:
+            return None
+
+        for name, value in [("offset", offset), ("limit", limit)]:
+            if value is not None and not value.isdigit():
+                raise SuspiciousOperation(
+                    gettext("%s should be a non-negative integer, while got %s"
+                            % (name, value)))
+
+        offset = int(offset or 0)
+        if limit is None:
+            limit = len(self._pks)
+        else:
+            limit = int(limit)
+            if limit < 1:
+                raise SuspiciousOperation(
+                    gettext("limit should be a positive integer"))
+        return offset, limit
+
+    def get(self, request, *args, **kwargs):
+        # Conditional requests only make sense for GET requests
+        if not self.conditional_fetch or request.method != "GET":
+            return super().get(request, *args, **kwargs)
+
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+            # The ETag doesn't depend on whether the thumbnails are generated,
+            # so responses with thumbnail placeholders are not validated, or
+            # they would be kept by the browser after the thumbnails are
+            # generated. Streamed responses are not serialized yet here.
+            thumbnail_pending = (
+                self._thumbnail_pending
+                or (response.streaming and conf.THUMBNAIL_GENERATE_ASYNC))
+            if not thumbnail_pending:
+                response["ETag"] = etag
+
+        # Make sure the browser revalidates the response every time
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def post(self, request, *args, **kwargs):
+        return self.get(request, *args, **kwargs)
+
+    def get_etag(self):
+        """Return a quoted ETag of the response. By default, it is computed
+        from the requested pks, the thumbnail size, the crop settings and the
+        pk and image file name of each image the user can access, in one
+        query which doesn't load the full rows. The crop operations of the
+        images are included if :setting:`non_destructive_crop` is enabled.
+        """
+        rows = list(self.get_queryset().order_by().values_list(
+            "pk", self._image_field_name))
+
+        crops = []
+        if conf.NON_DESTRUCTIVE_CROP:
+            # Renditions change when crop operations are recorded
+            crops = list(apps.get_model("galleryfield", "ImageCrop").objects
+                         .filter(target_model=self.model._meta.label_lower,
+                                 object_pk__in=[pk for pk, name in rows])
+                         .order_by("pk").values_list("object_pk", "pk"))
+
+        validator = json.dumps(
+            [self._pks, self.thumbnail_size, self.disable_server_side_crop,
+             sorted(rows), crops],
+            cls=DjangoJSONEncoder)
+        return quote_etag(hashlib.md5(validator.encode()).hexdigest())
+
     def get_queryset(self):
         # We have to override this method, because currently super().get_queryset
         # doesn't accept Case in 'order_by'
@@ -376,7 +924,16 @@ class BaseListViewMixin(BaseImageModelMixin, BaseListView):
 
         return queryset.filter(pk__in=self._pks)
 
+    def use_in_memory_ordering(self):
+        if self.in_memory_ordering is None:
+            return len(self._pks) > conf.IN_MEMORY_ORDERING_THRESHOLD
+        return self.in_memory_ordering
+
     def get_ordering(self):
+        if self.use_in_memory_ordering():
+            # The queryset will be sorted in get_context_data
+            return None
+
         # Preserving the sequence while filter by (id__in=pks)
         # See https://stackoverflow.com/a/37648265/3437454
         preserved = Case(
@@ -384,14 +941,75 @@ class BaseListViewMixin(BaseImageModelMixin, BaseListView):
         return preserved
 
     def get_context_data(self, **kwargs):
-        # Return a list of serialized files
-        context = {
-            "files":  [self.get_serialized_image_data(obj)
-                       for obj in self.get_queryset()]}
+        if self.stream_response:
+            # Serialized lazily while the response is being streamed
+            context = {"files": self.iter_serialized_image_data()}
+        else:
+            objects = self.get_queryset()
+            if self.use_in_memory_ordering():
+                objects = sort_objects_by_pks(objects, self._pks)
+            objects = list(objects)
+            self.prefetch_image_data(objects)
+
+            # Return a list of serialized files
+            context = {
+                "files":  [self.get_serialized_image_data(obj)
+                           for obj in objects]}
+
+        if self._total is not None:
+            context.update({
+                "total": self._total,
+                "nextOffset": self._next_offset,
+            })
         context.update(kwargs)
 
         return context
 
+    def get_window_queryset(self, pks):
+        # The queryset of get_queryset() (with the filters of the subclasses)
+        # limited to a window of the requested pks, so that the query only
+        # carries the pks of the window.
+        requested_pks, self._pks = self._pks, pks
+        try:
+            return self.get_queryset().order_by()
+        finally:
+            self._pks = requested_pks
+
+    def prefetch_image_data(self, objects):
+        # Data needed to serialize the images is loaded for all objects in
+        # one query, rather than for each of them.
+        if conf.NON_DESTRUCTIVE_CROP:
+            prefetch_crop_operations(objects)
+
+    def iter_serialized_image_data(self):
+        # Only the first occurrence of a pk counts, as in the SQL ordering
+        pks = list(dict.fromkeys(map(int, self._pks)))
+        for i in range(0, len(pks), self.stream_chunk_size):
+            window = pks[i:i + self.stream_chunk_size]
+            objects = list(self.get_window_queryset(window).iterator())
+            self.prefetch_image_data(objects)
+            for obj in sort_objects_by_pks(objects, window):
+                yield self.get_serialized_image_data(obj)
+
+    def render_to_response(self, context, **response_kwargs):
+        if not self.stream_response:
+            return super().render_to_response(context, **response_kwargs)
+
+        return StreamingHttpResponse(
+            self.stream_json(context), content_type="application/json",
+            **response_kwargs)
+
+    def stream_json(self, context):
+        encoder = DjangoJSONEncoder()
+        files = context.pop("files")
+        yield '{"files": ['
+        for i, image_data in enumerate(files):
+            yield ("," if i else "") + encoder.encode(image_data)
+        yield "]"
+        for key, value in context.items():
+            yield f", {encoder.encode(key)}: {encoder.encode(value)}"
+        yield "}"
+
 
 class CropError(Exception):
     pass
@@ -438,66 +1056,232 @@ class BaseCropViewMixin(ImageFormViewMixin, BaseImageModelMixin, UpdateView):
                 gettext("Error while getting cropped_result: %s: %s"
                         % (type(e).__name__, str(e))))
         else:
-            try:
-                x = int(float(cropped_result['x']))
-                y = int(float(cropped_result['y']))
-                width = int(float(cropped_result['width']))
-                height = int(float(cropped_result['height']))
-                rotate = int(float(cropped_result['rotate']))
+            return get_validated_cropped_result(cropped_result)
 
-                # todo: allow show resized image in model ui
-                try:
-                    scale_x = float(cropped_result['scaleX'])
-                except KeyError:
-                    scale_x = None
-                try:
-                    scale_y = float(cropped_result['scaleY'])
-                except KeyError:
-                    scale_y = None
-            except Exception:
-                raise SuspiciousOperation(
-                    gettext('Wrong format of crop_result data.'))
+    def post(self, request, *args, **kwargs):
+        if not conf.NON_DESTRUCTIVE_CROP:
+            return super().post(request, *args, **kwargs)
+
+        # Record the crop operation rather than creating a new instance
+        self.object = self.get_object()
+        self.record_crop_operation(self.object)
+        return self.render_to_response({
+            "files": [self.get_serialized_image_data(self.object)],
+            "message": gettext("Done")})
+
+    def record_crop_operation(self, obj, cropped_result=None):
+        # Used when non_destructive_crop is enabled
+        if cropped_result is None:
+            cropped_result = self._cropped_result
+        x, y, width, height, rotate, scale_x, scale_y = cropped_result
 
-        return x, y, width, height, rotate, scale_x, scale_y
+        # Operations loaded by prefetch_crop_operations are outdated
+        vars(obj).pop(CROP_OPERATIONS_ATTR, None)
 
-    def get_cropped_uploaded_file(self, old_instance):
+        image = getattr(obj, self._image_field_name)
+        previous_operations = get_crop_operations(image)
+
+        crop_model = apps.get_model("galleryfield", "ImageCrop")
+        try:
+            with transaction.atomic():
+                crop_model.objects.create(
+                    target_model=self.model._meta.label_lower,
+                    object_pk=obj.pk, x=x, y=y, width=width, height=height,
+                    rotate=rotate)
+
+                # Render the rendition now, so that an invalid operation
+                # is not recorded.
+                get_image_rendition(image)
+        except Exception as e:
+            raise SuspiciousOperation(
+                gettext("Error while cropping the image: %s: %s"
+                        % (type(e).__name__, str(e))))
+        else:
+            # The previous rendition is replaced by the new one
+            delete_image_rendition(image, previous_operations)
+        finally:
+            self._image_memo = None
+
+    def get_cropped_uploaded_file(self, old_instance, cropped_result=None):
         # This view is put into the init method of self.form_class (i.e., ImageForm)
         # to simulate we posted a NEW image in the form to create a (cropped) NEW
         # image
         old_image = getattr(old_instance, self._image_field_name)
+        if cropped_result is None:
+            cropped_result = self._cropped_result
 
+        # Read through the storage API, the storage might not be local.
+        # The field file itself is not opened so that this can be called
+        # concurrently for the same instance.
         try:
-            new_image = Image.open(old_image.path)
+            old_image_file = old_image.storage.open(old_image.name, "rb")
         except IOError:
             raise SuspiciousOperation(
                 gettext('File not found，please re-upload the image'))
 
-        image_format = new_image.format
-
-        x, y, width, height, rotate, scale_x, scale_y = self._cropped_result
-
-        if rotate != 0:
-            # or it will raise "AttributeError: 'NoneType' object has no attribute
-            # 'mode' error in pillow 3.3.0
-            new_image = new_image.rotate(-rotate, expand=True)
+        x, y, width, height, rotate, scale_x, scale_y = cropped_result
 
-        box = (x, y, x + width, y + height)
-        new_image = new_image.crop(box)
+        # Spooled to disk for large images
+        new_image_io = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        with old_image_file:
+            try:
+                image_format = crop_image_file(
+                    old_image_file, [((x, y, x + width, y + height), rotate)],
+                    new_image_io)
+            except IOError:
+                raise SuspiciousOperation(
+                    gettext('File not found，please re-upload the image'))
 
-        new_image_io = BytesIO()
-        new_image.save(new_image_io, format=image_format)
+        size = new_image_io.tell()
+        new_image_io.seek(0)
 
-        upload_file = InMemoryUploadedFile(
+        upload_file = UploadedFile(
             file=new_image_io,
-            field_name=self._image_field_name,
             name=old_image.name,
             content_type=Image.MIME[image_format],
-            size=new_image_io.tell(),
+            size=size,
             charset=None
         )
         return upload_file
 
 
+class BaseBatchCropViewMixin(BaseCropViewMixin):
+    """
+    :attr:`max_batch_size`: int, the max number of crop operations in a
+       request, defaults to 50.
+
+    :attr:`max_workers`: int, the max number of threads cropping images
+       concurrently in a request, defaults to 4.
+    """
+    max_batch_size = 50
+    max_workers = 4
+
+    def setup(self, request, *args, **kwargs):
+        # Skipping setup of BaseCropViewMixin, which validates a single
+        # cropped_result
+        super(BaseCropViewMixin, self).setup(request, *args, **kwargs)
+        if self.disable_server_side_crop:
+            raise SuspiciousOperation(
+                gettext("Server side crop is not enabled."))
+        self._crops = self.get_and_validate_crops_from_request()
+
+    def get_and_validate_crops_from_request(self):
+        # "crops" is a stringfied json list of cropped results, each
+        # with the "pk" of the image instance to crop.
+        try:
+            crops = json.loads(self.request.POST["crops"])
+            assert isinstance(crops, list)
+        except Exception as e:
+            if isinstance(e, KeyError):
+                raise SuspiciousOperation(
+                    gettext("The request doesn't contain crops"))
+            raise SuspiciousOperation(
+                gettext("Error while getting crops: %s: %s"
+                        % (type(e).__name__, str(e))))
+
+        if not 0 < len(crops) <= self.max_batch_size:
+            raise SuspiciousOperation(
+                gettext("The number of crops should be between 1 and %d"
+                        % self.max_batch_size))
+
+        validated = []
+        for crop in crops:
+            try:
+                pk = crop["pk"]
+                assert str(pk).isdigit()
+            except Exception:
+                raise SuspiciousOperation(
+                    gettext("Each item of crops should contain an "
+                            "integer pk"))
+            validated.append((int(pk), get_validated_cropped_result(crop)))
+        return validated
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def post(self, request, *args, **kwargs):
+        objects = self.get_queryset().in_bulk(
+            {pk for pk, cropped_result in self._crops})
+
+        if conf.NON_DESTRUCTIVE_CROP:
+            files = self.record_crop_operations(objects)
+        else:
+            files = self.create_cropped_instances(objects)
+
+        return self.render_to_response(
+            {"files": files, "message": gettext("Done")})
+
+    def record_crop_operations(self, objects):
+        files = []
+        for pk, cropped_result in self._crops:
+            if pk not in objects:
+                files.append({"pk": pk, "error": gettext("Image not found")})
+                continue
+
+            try:
+                self.record_crop_operation(objects[pk], cropped_result)
+            except SuspiciousOperation as e:
+                files.append({"pk": pk, "error": str(e)})
+                continue
+            files.append(self.get_serialized_image_data(objects[pk]))
+        return files
+
+    def create_cropped_instances(self, objects):
+        # Images are cropped concurrently (Pillow releases the GIL while
+        # decoding, transforming and encoding), while the new instances
+        # are saved sequentially in the current thread.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self.get_cropped_uploaded_file,
+                                objects[pk], cropped_result)
+                if pk in objects else None
+                for pk, cropped_result in self._crops]
+
+        files = []
+        for (pk, cropped_result), future in zip(self._crops, futures):
+            if future is None:
+                files.append({"pk": pk, "error": gettext("Image not found")})
+                continue
+
+            try:
+                uploaded_file = future.result()
+            except SuspiciousOperation as e:
+                files.append({"pk": pk, "error": str(e)})
+                continue
+
+            form = self.get_form_class()(
+                instance=copy.copy(objects[pk]), uploaded_file=uploaded_file,
+                data={}, files={})
+            if not form.is_valid():
+                files.append({
+                    "pk": pk,
+                    "error": "; ".join(
+                        str(error) for errors in form.errors.values()
+                        for error in errors)})
+                continue
+
+            self.object = None
+            self.create_cropped_instance_from_form(form)
+            files.append(self.get_serialized_image_data(self.object))
+        return files
+
+    def get_form_class(self):
+        this = self
+
+        class ImageForm(forms.ModelForm):
+            class Meta:
+                model = this.model
+                fields = (this._image_field_name,)
+
+            def __init__(self, uploaded_file, **kwargs):
+                super().__init__(**kwargs)
+                self.instance.pk = None
+                self.initial = {this._image_field_name: uploaded_file}
+
+        return ImageForm
+
+
 class GalleryFormMediaMixin:
     # todo: testcase (both settings and render)
     class Media:
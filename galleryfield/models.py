@@ -10,3 +10,24 @@ class BuiltInGalleryImage(models.Model):
     creator = models.ForeignKey(
         settings.AUTH_USER_MODEL, null=False, blank=False,
         verbose_name=_('Creator'), on_delete=models.CASCADE)
+
+
+class ImageCrop(models.Model):
+    """A crop operation of an image model instance, recorded when
+    :setting:`non_destructive_crop` is enabled. The crop box is in the
+    coordinates of the image (with previous crop operations applied) rotated
+    clockwise by ``rotate`` degrees.
+    """
+    target_model = models.CharField(
+        max_length=200, verbose_name=_("Target model"))
+    object_pk = models.PositiveBigIntegerField(verbose_name=_("Object pk"))
+    x = models.IntegerField()
+    y = models.IntegerField()
+    width = models.IntegerField()
+    height = models.IntegerField()
+    rotate = models.IntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("pk",)
+        indexes = [models.Index(fields=["target_model", "object_pk"])]
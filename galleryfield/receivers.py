@@ -0,0 +1,97 @@
+from django.apps import apps
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+
+from galleryfield import conf, defaults
+from galleryfield.thumbnails import delete_image_rendition, get_crop_operations
+from galleryfield.utils import (clear_url_from_str_cache,
+                                get_image_data_cache_version_key,
+                                get_or_check_image_field)
+
+
+def invalidate_image_data_cache(sender, instance, **kwargs):
+    if conf.IMAGE_DATA_CACHE_ALIAS is None:
+        return
+
+    # Bumping the version, rather than deleting the cached data, so that
+    # data serialized before the change and cached afterwards are never read.
+    try:
+        caches[conf.IMAGE_DATA_CACHE_ALIAS].incr(
+            get_image_data_cache_version_key(sender, instance.pk))
+    except ValueError:
+        # Nothing cached for the instance
+        pass
+
+
+def invalidate_image_data_cache_of_crop(sender, instance, **kwargs):
+    # Recorded crop operations change the rendition of the image
+    try:
+        model = apps.get_model(instance.target_model)
+    except (LookupError, ValueError):
+        return
+    invalidate_image_data_cache(model, model(pk=instance.object_pk))
+
+
+def delete_image_crops(sender, instance, **kwargs):
+    # The rendition is derived from the image, it is deleted along with the
+    # crop operations.
+    image_field = get_or_check_image_field(
+        obj=sender, target_model=sender._meta.label,
+        check_id_prefix=sender.__name__, is_checking=False)
+    if image_field is not None:
+        image = getattr(instance, image_field.name)
+        delete_image_rendition(image, get_crop_operations(image))
+
+    apps.get_model("galleryfield", "ImageCrop").objects.filter(
+        target_model=sender._meta.label_lower, object_pk=instance.pk).delete()
+
+
+def register_image_data_cache_receivers():
+    # Invalidate cached serialized image data when target image model
+    # instances are saved or deleted, or their crop operations are recorded.
+    # Crop operations are deleted along with the image instances.
+    from galleryfield.fields import GalleryField
+
+    target_models = {defaults.DEFAULT_TARGET_IMAGE_MODEL}
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, GalleryField):
+                target_models.add(field.target_model)
+
+    for target_model in target_models:
+        try:
+            model = apps.get_model(target_model)
+        except (LookupError, ValueError):
+            # This will be reported by model checks
+            continue
+
+        for signal in (post_save, post_delete):
+            signal.connect(
+                invalidate_image_data_cache, sender=model,
+                dispatch_uid=(f"galleryfield-invalidate-image-data-cache-"
+                              f"{model._meta.label_lower}"))
+
+        post_delete.connect(
+            delete_image_crops, sender=model,
+            dispatch_uid=(f"galleryfield-delete-image-crops-"
+                          f"{model._meta.label_lower}"))
+
+    crop_model = apps.get_model("galleryfield", "ImageCrop")
+    for signal in (post_save, post_delete):
+        signal.connect(
+            invalidate_image_data_cache_of_crop, sender=crop_model,
+            dispatch_uid="galleryfield-invalidate-image-data-cache-of-crop")
+
+
+def invalidate_url_from_str_cache(setting, **kwargs):
+    if setting == "ROOT_URLCONF":
+        clear_url_from_str_cache()
+
+
+def register_url_cache_receivers():
+    # URLs memoized by galleryfield.utils.get_url_from_str are stale when
+    # the urlconf is changed, e.g., by override_settings in tests.
+    setting_changed.connect(
+        invalidate_url_from_str_cache,
+        dispatch_uid="galleryfield-invalidate-url-from-str-cache")
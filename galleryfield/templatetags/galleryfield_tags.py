@@ -0,0 +1,25 @@
+from django import template
+from django.template.loader import render_to_string
+
+from galleryfield import conf
+
+register = template.Library()
+
+
+@register.simple_tag
+def galleryfield_shared_script(
+        upload_template="galleryfield/upload_template.html",
+        download_template="galleryfield/download_template.html"):
+    """Render the script and the templates shared by the widgets in the page
+    which are rendered with the ``shared_script`` option. Usage::
+
+        {% load galleryfield_tags %}
+        {{ form }}
+        {% galleryfield_shared_script %}
+    """
+    return render_to_string(
+        "galleryfield/shared_script.html",
+        {"upload_template": upload_template,
+         "download_template": download_template,
+         "prompt_alert_on_window_reload_if_changed":
+             conf.PROMPT_ALERT_ON_WINDOW_RELOAD_IF_CHANGED})
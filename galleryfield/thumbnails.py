@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.files import File
+from django.db import connections
+from django.utils.module_loading import import_string
+from sorl.thumbnail import delete, get_thumbnail
+
+from galleryfield import conf
+from galleryfield.utils import crop_image_file
+
+THUMBNAIL_THREAD_POOL_MAX_WORKERS = 2
+RENDITION_DIRECTORY = "renditions"
+CROP_OPERATIONS_ATTR = "_galleryfield_crop_operations"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_thumbnail_url_cache():
+    return caches[conf.IMAGE_DATA_CACHE_ALIAS or DEFAULT_CACHE_ALIAS]
+
+
+def get_thumbnail_url_cache_key(image_name, thumbnail_size):
+    # Image names might contain characters not allowed in memcached keys
+    digest = hashlib.md5(
+        f"{image_name}:{thumbnail_size}:{conf.DEFAULT_THUMBNAIL_QUALITY}"
+        .encode()).hexdigest()
+    return f"galleryfield-thumbnail-url:{digest}"
+
+
+def get_thumbnail_pending_cache_key(image_name, thumbnail_size):
+    return (f"{get_thumbnail_url_cache_key(image_name, thumbnail_size)}"
+            f":pending")
+
+
+def prefetch_crop_operations(objects):
+    """Load the crop operations recorded for the image instances ``objects``
+    (of the same model) in one query, so that :func:`get_crop_operations`
+    doesn't query for each of them.
+    """
+    if not objects:
+        return
+
+    crop_model = apps.get_model("galleryfield", "ImageCrop")
+    operations = {obj.pk: [] for obj in objects}
+    for object_pk, *operation in crop_model.objects.filter(
+            target_model=objects[0]._meta.label_lower,
+            object_pk__in=list(operations),
+    ).order_by("pk").values_list(
+            "object_pk", "x", "y", "width", "height", "rotate"):
+        operations[object_pk].append(tuple(operation))
+
+    for obj in objects:
+        setattr(obj, CROP_OPERATIONS_ATTR, operations[obj.pk])
+
+
+def get_crop_operations(image):
+    """Return a list of ``(x, y, width, height, rotate)`` crop operations
+    recorded for the instance of ``image`` (a field file), in the order they
+    were applied.
+    """
+    operations = getattr(image.instance, CROP_OPERATIONS_ATTR, None)
+    if operations is not None:
+        # Loaded by prefetch_crop_operations
+        return list(operations)
+
+    crop_model = apps.get_model("galleryfield", "ImageCrop")
+    return [tuple(operation) for operation in crop_model.objects.filter(
+        target_model=image.instance._meta.label_lower,
+        object_pk=image.instance.pk,
+    ).order_by("pk").values_list("x", "y", "width", "height", "rotate")]
+
+
+def get_rendition_name(image_name, operations):
+    digest = hashlib.md5(
+        json.dumps([image_name, operations]).encode()).hexdigest()
+    head, tail = os.path.split(image_name)
+    stem, ext = os.path.splitext(tail)
+    return os.path.join(head, RENDITION_DIRECTORY, f"{stem}-{digest[:12]}{ext}")
+
+
+def get_rendition_cache_key(rendition_name):
+    return (f"galleryfield-rendition:"
+            f"{hashlib.md5(rendition_name.encode()).hexdigest()}")
+
+
+def render_image(image, operations):
+    """Apply the crop ``operations`` to ``image`` (a field file).
+
+    :return: A :class:`django.core.files.File` of the rendered image.
+    """
+    # Spooled to disk for large images
+    rendered_io = SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    with image.storage.open(image.name, "rb") as image_file:
+        crop_image_file(
+            image_file,
+            [((x, y, x + width, y + height), rotate)
+             for x, y, width, height, rotate in operations],
+            rendered_io)
+
+    rendered_io.seek(0)
+    return File(rendered_io)
+
+
+def get_image_rendition(image, operations=None):
+    """Return the field file of the rendition of ``image`` (a field file),
+    i.e., the image with the crop ``operations`` (defaults to those recorded
+    for its instance) applied, or ``image`` itself if there is no operations.
+
+    A rendition is rendered and saved to the storage of the image when it is
+    requested for the first time.
+    """
+    if operations is None:
+        operations = get_crop_operations(image)
+    if not operations:
+        return image
+
+    name = get_rendition_name(image.name, operations)
+    cache = get_thumbnail_url_cache()
+    cache_key = get_rendition_cache_key(name)
+
+    if not cache.get(cache_key):
+        if not image.storage.exists(name):
+            rendered = render_image(image, operations)
+            with rendered:
+                # The name might be changed by the storage if the same
+                # rendition is being saved concurrently.
+                name = image.storage.save(name, rendered)
+        cache.set(cache_key, True, None)
+
+    return image.field.attr_class(image.instance, image.field, name)
+
+
+def delete_image_rendition(image, operations):
+    """Delete the rendition of ``image`` (a field file) with the crop
+    ``operations``, along with its thumbnails, e.g., when it is replaced by
+    the rendition with a new crop operation.
+    """
+    if not operations:
+        return
+
+    name = get_rendition_name(image.name, operations)
+    get_thumbnail_url_cache().delete(get_rendition_cache_key(name))
+    delete(image.field.attr_class(image.instance, image.field, name))
+
+
+def get_image(obj, image_field_name):
+    """Return the field file of the image of ``obj`` to be displayed, which
+    is the rendition of the image if :setting:`non_destructive_crop` is
+    enabled.
+    """
+    image = getattr(obj, image_field_name)
+    if conf.NON_DESTRUCTIVE_CROP:
+        image = get_image_rendition(image)
+    return image
+
+
+def create_thumbnail(image, thumbnail_size):
+    """Generate the thumbnail of ``image`` (a field file) and cache its URL.
+
+    :return: The URL of the thumbnail.
+    """
+    url = get_thumbnail(
+        file_=image,
+        geometry_string=thumbnail_size,
+        crop="center",
+        quality=conf.DEFAULT_THUMBNAIL_QUALITY).url
+    get_thumbnail_url_cache().set(
+        get_thumbnail_url_cache_key(image.name, thumbnail_size), url, None)
+    return url
+
+
+def is_thumbnail_url_cached(image, thumbnail_size):
+    return get_thumbnail_url_cache().get(
+        get_thumbnail_url_cache_key(image.name, thumbnail_size)) is not None
+
+
+def generate_thumbnail(target_model, image_field_name, pk, thumbnail_size):
+    """Generate the thumbnail of an image instance and cache its URL. This is
+    the task scheduled by :func:`get_or_schedule_thumbnail_url`, all arguments
+    are plain values so that it can be sent to a task queue.
+    """
+    model = apps.get_model(target_model)
+    try:
+        obj = model.objects.get(pk=pk)
+    except model.DoesNotExist:
+        return
+
+    image = get_image(obj, image_field_name)
+    try:
+        create_thumbnail(image, thumbnail_size)
+    finally:
+        get_thumbnail_url_cache().delete(
+            get_thumbnail_pending_cache_key(image.name, thumbnail_size))
+
+
+def _run_and_close_connections(func, *args):
+    try:
+        func(*args)
+    finally:
+        # Connections opened in the worker thread are not handled by the
+        # request/response cycle
+        connections.close_all()
+
+
+def run_in_thread_pool(func, *args):
+    """The default task runner of :setting:`thumbnails` ``async_task_runner``,
+    which runs ``func(*args)`` in a thread pool of the current process.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=THUMBNAIL_THREAD_POOL_MAX_WORKERS,
+                thread_name_prefix="galleryfield-thumbnail")
+
+    return _executor.submit(_run_and_close_connections, func, *args)
+
+
+def get_async_task_runner():
+    if conf.THUMBNAIL_ASYNC_TASK_RUNNER is None:
+        return run_in_thread_pool
+    return import_string(conf.THUMBNAIL_ASYNC_TASK_RUNNER)
+
+
+def get_or_schedule_thumbnail_url(
+        target_model, image_field_name, obj, thumbnail_size, image=None):
+    """Return the cached thumbnail URL of the image of ``obj``. If the
+    thumbnail URL is not cached, schedule the thumbnail generation (at most
+    once for each image and size at the same time) and return None.
+
+    ``image`` is the field file returned by :func:`get_image` for ``obj``, if
+    it is already known by the caller.
+    """
+    cache = get_thumbnail_url_cache()
+    if image is None:
+        image = get_image(obj, image_field_name)
+
+    url = cache.get(get_thumbnail_url_cache_key(image.name, thumbnail_size))
+    if url is not None:
+        return url
+
+    # The pending key expires in case the task got lost
+    if cache.add(get_thumbnail_pending_cache_key(image.name, thumbnail_size),
+                 True, 300):
+        get_async_task_runner()(
+            generate_thumbnail, target_model, image_field_name, obj.pk,
+            thumbnail_size)
+
+    return None
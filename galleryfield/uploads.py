@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation, ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.translation import gettext
+
+from galleryfield import conf
+from galleryfield.utils import read_image_info
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+def parse_content_range(content_range):
+    """Parse the value of a ``Content-Range`` header sent by chunked uploads,
+    e.g., ``bytes 0-1023/4096``.
+
+    :return: a tuple of ``(start, end, total)``, where ``end`` is inclusive.
+    """
+    match = CONTENT_RANGE_RE.match(content_range.strip())
+    if match is None:
+        raise SuspiciousOperation(
+            gettext("Invalid Content-Range header: %s" % content_range))
+
+    start, end, total = map(int, match.groups())
+    if not start <= end < total:
+        raise SuspiciousOperation(
+            gettext("Invalid Content-Range header: %s" % content_range))
+    return start, end, total
+
+
+def get_chunked_upload_dir():
+    return conf.CHUNKED_UPLOAD_TEMP_DIR or os.path.join(
+        settings.FILE_UPLOAD_TEMP_DIR or tempfile.gettempdir(),
+        "galleryfield-chunks")
+
+
+def get_chunked_upload_path(key, file_name, total):
+    """Return the path of the temporary file in which the chunks of a file
+    are assembled. The file is identified by its name and total size, for
+    ``key`` (e.g., the user uploading the file).
+    """
+    digest = hashlib.md5(f"{key}:{file_name}:{total}".encode()).hexdigest()
+    return os.path.join(get_chunked_upload_dir(), f"{digest}.part")
+
+
+def get_chunked_upload_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def write_chunk(path, start, chunk):
+    """Write the uploaded file ``chunk`` at ``start`` of the file at ``path``,
+    discarding previously written data beyond ``start`` (i.e., a chunk which
+    is uploaded again).
+    """
+    if start > get_chunked_upload_size(path):
+        raise SuspiciousOperation(
+            gettext("Chunk starting at %d is out of order" % start))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "r+b" if start else "wb") as f:
+        f.seek(start)
+        f.truncate()
+        for data in chunk.chunks():
+            f.write(data)
+        return f.tell()
+
+
+def clear_stale_chunked_uploads(max_age):
+    """Remove partial chunked uploads not modified in ``max_age`` seconds.
+
+    :return: the number of removed files.
+    """
+    upload_dir = get_chunked_upload_dir()
+    try:
+        entries = list(os.scandir(upload_dir))
+    except FileNotFoundError:
+        return 0
+
+    now = time.time()
+    removed = 0
+    for entry in entries:
+        if not entry.name.endswith(".part") or not entry.is_file():
+            continue
+        try:
+            if now - entry.stat().st_mtime > max_age:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            # Finished or removed concurrently
+            continue
+    return removed
+
+
+class ChunkedUploadedFile(UploadedFile):
+    """A file assembled from the chunks of a chunked upload. Like
+    :class:`django.core.files.uploadedfile.TemporaryUploadedFile`, the file
+    on disk can be moved to the storage rather than copied.
+    """
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class UploadedImageField(forms.ImageField):
+    """An image form field validating uploaded files by their headers only,
+    rather than opening and verifying the whole file as
+    :class:`django.forms.ImageField` does. Files which are truncated or
+    corrupted after the header are rejected when the thumbnail is generated.
+
+    The :class:`galleryfield.utils.ImageInfo` read from the header is set as
+    the ``image_info`` attribute of the cleaned file, so that it is not read
+    again when the image is serialized.
+    """
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+
+        try:
+            image_info = read_image_info(f)
+        except Exception as exc:
+            raise ValidationError(
+                self.error_messages["invalid_image"],
+                code="invalid_image") from exc
+
+        f.image_info = image_info
+        f.content_type = image_info.mime_type
+        return f
@@ -15,4 +15,7 @@ urlpatterns = [
     path('crop/<int:pk>',
          login_required(image_views.BuiltInImageCropView.as_view()),
          name="galleryfield-builtingalleryimage-crop"),
+    path('batch-crop/',
+         login_required(image_views.BuiltInImageBatchCropView.as_view()),
+         name="galleryfield-builtingalleryimage-batch-crop"),
 ]
@@ -1,12 +1,19 @@
+import hashlib
 import logging
+import random
+import shutil
+from collections import namedtuple
 
 from django.apps import apps
+from django.conf import settings
 from django.core.checks import Critical, Info
 from django.core.exceptions import (AppRegistryNotReady, FieldDoesNotExist,
                                     ImproperlyConfigured)
 from django.db.models import ImageField
-from django.urls import (NoReverseMatch, Resolver404, resolve, reverse,
-                         reverse_lazy)
+from django.urls import (NoReverseMatch, Resolver404, get_script_prefix,
+                         get_urlconf, resolve, reverse, reverse_lazy)
+from django.utils.translation import get_language
+from PIL import Image, JpegImagePlugin
 
 from galleryfield import defaults
 
@@ -25,24 +32,30 @@ REQUIRED_CONF_ERROR_PATTERN = (
     "You must configure %(location)s for RELATE to run properly.")
 
 
-def convert_dict_to_plain_text(d, indent=4, no_wrap_keys=None):
-    # For items whose value are javascript regex,
-    # which should not be treated as text
-    no_wrap_keys = no_wrap_keys or []
+def convert_dict_to_js_options(d, expression_keys=None):
+    """Convert ``d`` to JSON-safe javascript options.
 
-    result = []
+    :param expression_keys: Keys of items whose values are javascript regex
+     literals or expressions, which should not be treated as text.
+    :return: A tuple of the options dict, and a dict of the javascript
+     expressions, to be evaluated on the client side.
+    """
+    expression_keys = expression_keys or []
+
+    options = {}
+    expressions = {}
     for k, v in d.items():
         if v is None:
             continue
 
-        if (v in [True, False]
-                or (isinstance(v, str) and v.lower() in ["true", "false"])):
-            v = str(v).lower()
-        elif isinstance(v, str) and k not in no_wrap_keys:
-            v = f"'{v}'"
+        if isinstance(v, str) and v.lower() in ["true", "false"]:
+            v = v.lower() == "true"
+        elif isinstance(v, str) and k in expression_keys:
+            expressions[k] = v
+            continue
 
-        result.append(" " * indent + f"{k}: {v},")
-    return "\n".join(result)
+        options[k] = v
+    return options, expressions
 
 
 def get_or_check_image_field(obj, target_model, check_id_prefix, is_checking=False):
@@ -195,6 +208,9 @@ def get_or_check_image_field(obj, target_model, check_id_prefix, is_checking=Fal
     return errors
 
 
+_url_from_str_cache = {}
+
+
 def get_url_from_str(url_str, require_urlconf_ready=False):
     """
 
@@ -209,17 +225,83 @@ def get_url_from_str(url_str, require_urlconf_ready=False):
     """
     if not url_str:
         return None
+
+    if require_urlconf_ready:
+        # Widgets resolve their URLs on each rendering, results are
+        # memoized since resolving and reversing are not cheap. Reversed
+        # URLs also depend on the active language (with i18n_patterns) and
+        # the script prefix.
+        cache_key = (get_urlconf() or settings.ROOT_URLCONF, get_language(),
+                     get_script_prefix(), str(url_str))
+        try:
+            return _url_from_str_cache[cache_key]
+        except KeyError:
+            pass
+
     try:
         resolve(url_str)
     except Resolver404:
         if not require_urlconf_ready:
             return reverse_lazy(url_str)
         try:
-            return reverse(url_str)
+            url = reverse(url_str)
         except NoReverseMatch as e:
             raise ImproperlyConfigured(
                 f"'{url_str}' is invalid: '{type(e).__name__}': '{str(e)}'.")
-    return url_str
+    else:
+        url = url_str
+
+    if require_urlconf_ready:
+        _url_from_str_cache[cache_key] = url
+    return url
+
+
+def clear_url_from_str_cache():
+    _url_from_str_cache.clear()
+
+
+def sort_objects_by_pks(objects, pks):
+    """Sort model instances in the order of ``pks`` in Python, instead of
+    ordering with a ``Case``/``When`` expression in SQL.
+
+    :param objects: An iterable of model instances, or a dict mapping pks to
+     model instances.
+    :param pks: A list of pks.
+    :return: A list of model instances. Objects not in ``pks`` are dropped,
+     and duplicated pks are only counted once.
+    """
+    if not isinstance(objects, dict):
+        objects = {obj.pk: obj for obj in objects}
+
+    return [objects[pk] for pk in dict.fromkeys(map(int, pks))
+            if pk in objects]
+
+
+def get_image_data_cache_version_key(model, pk):
+    return f"galleryfield-image-data-version:{model._meta.label_lower}:{pk}"
+
+
+def get_image_data_cache_key(model, pk, version, variant):
+    # Variants contain image names, which might contain characters not
+    # allowed in memcached keys
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return (f"galleryfield-image-data:{model._meta.label_lower}:{pk}:"
+            f"{version}:{digest}")
+
+
+def get_image_data_cache_version(cache, model, pk):
+    """Return the current version of the cached serialized data of the image
+    instance ``pk``, which is bumped when the instance is changed.
+    """
+    key = get_image_data_cache_version_key(model, pk)
+    version = cache.get(key)
+    if version is None:
+        # A random initial version, so that data cached under versions before
+        # the version key was evicted are not reused.
+        version = random.randrange(1 << 30)
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
 
 
 class InvalidThumbnailFormat(ValueError):
@@ -248,3 +330,194 @@ def get_formatted_thumbnail_size(thumbnail_size, name="thumbnail_size"):
         thumbnail_size = [s.strip() for s in thumbnail_size.lower().split("x")]
 
     return get_thumb_size_from_iterator(thumbnail_size)
+
+
+ImageInfo = namedtuple("ImageInfo", ["format", "mime_type", "width", "height"])
+
+
+def read_image_info(image_file):
+    """Read the :class:`ImageInfo` of an image from the header of
+    ``image_file`` (a file object), without decoding the pixels. The position
+    of ``image_file`` is restored.
+
+    Pillow exceptions are raised if the header is not of a supported image
+    format, or the image is too large (i.e., a decompression bomb).
+    """
+    position = image_file.tell()
+    try:
+        with Image.open(image_file) as image:
+            width, height = image.size
+            return ImageInfo(
+                image.format, Image.MIME.get(image.format), width, height)
+    finally:
+        image_file.seek(position)
+
+
+# Transposes of the cropped region for clockwise right angle rotations
+_RIGHT_ANGLE_TRANSPOSES = {
+    0: None,
+    90: Image.ROTATE_270,
+    180: Image.ROTATE_180,
+    270: Image.ROTATE_90,
+}
+
+
+def get_source_crop_box(box, size, rotate):
+    """Map the crop box in the image rotated clockwise by ``rotate`` (a right
+    angle) back to the coordinates of the image before rotation.
+    """
+    x0, y0, x1, y1 = box
+    width, height = size
+    return {
+        0: (x0, y0, x1, y1),
+        90: (y0, height - x1, y1, height - x0),
+        180: (width - x1, height - y1, width - x0, height - y0),
+        270: (width - y1, x0, width - y0, x1),
+    }[rotate]
+
+
+def crop_image(image, box, rotate):
+    """Crop ``image`` by ``box`` in the coordinates of the image rotated
+    clockwise by ``rotate`` degrees, with the rotated image expanded to hold
+    the whole image.
+
+    For right angles, the source region is cropped before being rotated, so
+    that the (expanded) rotated image of the full size is never created.
+    """
+    rotate %= 360
+    if rotate not in _RIGHT_ANGLE_TRANSPOSES:
+        return image.rotate(-rotate, expand=True).crop(box)
+
+    cropped = image.crop(get_source_crop_box(box, image.size, rotate))
+    transpose = _RIGHT_ANGLE_TRANSPOSES[rotate]
+    if transpose is not None:
+        cropped = cropped.transpose(transpose)
+    return cropped
+
+
+# EXIF tag of the orientation
+_EXIF_ORIENTATION = 0x0112
+
+# Formats which Pillow saves EXIF data and ICC profiles for
+_FORMATS_WITH_METADATA = ("JPEG", "PNG", "WEBP")
+
+
+def is_full_frame_crop(box, size, rotate):
+    return rotate % 360 == 0 and tuple(box) == (0, 0, *size)
+
+
+def get_image_save_params(source):
+    """Return the keyword arguments of ``Image.save`` for saving an image
+    transformed from ``source`` (an image opened from a file), so that the
+    quality settings, the EXIF data and the ICC profile of ``source`` are
+    kept.
+    """
+    params = {}
+    if source.format not in _FORMATS_WITH_METADATA:
+        return params
+
+    icc_profile = source.info.get("icc_profile")
+    if icc_profile:
+        params["icc_profile"] = icc_profile
+
+    exif = source.getexif()
+    if exif:
+        # Crop boxes are in the coordinates of the stored pixels, the
+        # orientation of the source doesn't apply to the result.
+        exif.pop(_EXIF_ORIENTATION, None)
+        params["exif"] = exif.tobytes()
+
+    if source.format == "JPEG":
+        params.update({
+            "qtables": source.quantization,
+            "subsampling": JpegImagePlugin.get_sampling(source),
+            "progressive": "progressive" in source.info,
+        })
+    return params
+
+
+def crop_image_file(image_file, operations, fp):
+    """Apply the crop ``operations``, a list of ``(box, rotate)`` (see
+    :func:`crop_image`), to the image read from ``image_file``, and write the
+    result to ``fp``.
+
+    Operations keeping the full frame without rotation are skipped, and the
+    source is copied as is if all of them are skipped. Otherwise, the result
+    is encoded with the parameters from :func:`get_image_save_params`.
+
+    :return: The format of the image.
+    """
+    with Image.open(image_file) as source:
+        image_format = source.format
+        cropped = source
+        for box, rotate in operations:
+            if is_full_frame_crop(box, cropped.size, rotate):
+                continue
+            cropped = crop_image(cropped, box, rotate)
+
+        if cropped is source:
+            # No need to decode and encode the image
+            image_file.seek(0)
+            shutil.copyfileobj(image_file, fp)
+        else:
+            cropped.save(
+                fp, format=image_format, **get_image_save_params(source))
+
+    return image_format
+
+
+def get_downscaled_size(size, max_width=None, max_height=None):
+    """Return ``size`` scaled down (keeping the aspect ratio) to fit in
+    ``max_width`` and ``max_height``, either of which might be None.
+    """
+    width, height = size
+    ratio = min(max_width / width if max_width else 1,
+                max_height / height if max_height else 1,
+                1)
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+def normalize_image_file(image_file, fp, size, image_format, quality=None):
+    """Resize the image read from ``image_file`` to ``size``, and write it to
+    ``fp`` encoded in ``image_format``, with ``quality`` if not None.
+
+    The EXIF data (including the orientation, which still applies to the
+    resized pixels) and the ICC profile are kept. Without ``quality``, the
+    quality settings of a JPEG source are kept for a JPEG result.
+
+    :return: False if the image was not written, i.e., an animated image,
+      which is kept as is.
+    """
+    with Image.open(image_file) as source:
+        if getattr(source, "is_animated", False):
+            return False
+
+        image = source
+        if image.size != tuple(size):
+            if image.mode in ("1", "P"):
+                # Resampling filters are not applied to these modes
+                image = image.convert("RGBA")
+            image = image.resize(size, Image.LANCZOS)
+
+        if image_format == "JPEG" and image.mode not in ("L", "RGB", "CMYK"):
+            image = image.convert("RGB")
+
+        params = {}
+        if image_format in _FORMATS_WITH_METADATA:
+            icc_profile = source.info.get("icc_profile")
+            if icc_profile:
+                params["icc_profile"] = icc_profile
+            exif = source.getexif()
+            if exif:
+                params["exif"] = exif.tobytes()
+
+        if quality is not None:
+            params["quality"] = quality
+        elif image_format == source.format == "JPEG":
+            params.update({
+                "qtables": source.quantization,
+                "subsampling": JpegImagePlugin.get_sampling(source),
+            })
+
+        image.save(fp, format=image_format, **params)
+    return True
@@ -1,14 +1,79 @@
+import copy
 import json
+from functools import lru_cache
+from urllib.parse import urlsplit
 
 from django import forms
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.http import QueryDict
+from django.urls import Resolver404, get_script_prefix, resolve
 
 from galleryfield import conf, defaults
-from galleryfield.utils import (convert_dict_to_plain_text,
+from galleryfield.utils import (convert_dict_to_js_options,
                                 get_formatted_thumbnail_size, get_url_from_str,
                                 logger)
 
+# Options of jQuery-File-Upload whose values are javascript regex literals
+# or expressions
+JQUERY_FILE_UPLOAD_UI_EXPRESSION_OPTIONS = [
+    "loadImageFileTypes", "acceptFileTypes", "disableImageResize"]
+
+
+@lru_cache(maxsize=128)
+def compile_widget_options(config):
+    """Compile the options of the widget into a JSON string, which is
+    rendered to the ``data-options`` attribute of the widget. ``config`` is
+    a JSON list of the options dicts of jQuery-File-Upload and SortableJS,
+    the max number of images, the thumbnail size, the Bootstrap version and
+    whether the widget is disabled, serialized with sorted keys, so that the
+    result is cached for each widget configuration. Values like ``True`` and
+    ``1``, which are equal in Python, don't share the cached result.
+    """
+    (ui_options, sortable_options, max_number_of_images, thumbnail_size,
+     bootstrap_version, disabled) = json.loads(config)
+
+    # See blueimp/jQuery-File-Upload
+    # https://github.com/blueimp/jQuery-File-Upload/wiki/Options
+
+    # Remove other options which we are using default but
+    # don't allow user to change
+    for option in ["fileInput", "formData"]:
+        ui_options.pop(option, None)
+
+    # Fixme: this is hardcoded
+    ui_options["paramName"] = "files[]"
+
+    # override maxNumberOfFiles
+    ui_options.pop("maxNumberOfFiles", None)
+    if max_number_of_images:
+        ui_options["maxNumberOfFiles"] = max_number_of_images
+
+    # override previewMaxWidth and previewMaxHeight
+    _width, _height = thumbnail_size.split("x")
+    ui_options.update(
+        {"previewMaxWidth": int(_width),
+         "previewMaxHeight": int(_height)
+         })
+
+    # Compatibility with Bootstrap 4 and 5
+    # https://github.com/blueimp/jQuery-File-Upload/wiki/Style-Guide#bootstrap-ui
+    if bootstrap_version > 3:
+        ui_options["showElementClass"] = "show"
+
+    ui_options, expressions = convert_dict_to_js_options(
+        ui_options, expression_keys=JQUERY_FILE_UPLOAD_UI_EXPRESSION_OPTIONS)
+
+    if disabled:
+        sortable_options["disabled"] = True
+    sortable_options, __ = convert_dict_to_js_options(sortable_options)
+
+    return json.dumps({
+        "fileupload": ui_options,
+        "expressions": expressions,
+        "sortable": sortable_options,
+    })
+
 
 class GalleryWidget(forms.HiddenInput):
     """This is the default widget used by :class:`galleryfield.fields.GalleryFormField`.
@@ -58,6 +123,25 @@ class GalleryWidget(forms.HiddenInput):
 
            * **accepted_mime_types** (`list`, `optional`) - A list of MIME types
              used to filter files when picking files with file picker, defaults to ``['image/*']``
+           * **fetch_page_size** (`int`, `optional`) - If set, existing images
+             are fetched by pages of this size, the first page immediately and
+             the others when scrolling to the end of the widget, defaults to ``None``,
+             i.e., fetching all existing images at once.
+           * **inline_initial_images** (`bool`, `optional`) - If True, existing
+             images (the first page of them if ``fetch_page_size`` is set) are
+             serialized by the fetch view when rendering, and embedded in the
+             page, instead of being fetched by an extra request. This requires
+             the current request, which is set by
+             ``form.fields["images"].widget.request = request``. Defaults to
+             ``False``.
+           * **shared_script** (`bool`, `optional`) - If True, the widget only
+             renders its markup and its configuration (in the ``data-config``
+             attribute), while the script and the templates shared by all
+             widgets in the page are rendered once by the
+             ``{% galleryfield_shared_script %}`` template tag, which must be
+             put after the form. Overriding the ``GALLERY_WIDGET_JS`` block and
+             the upload/download templates of the widget don't apply in this
+             case. Defaults to ``False``.
     :type options: dict, optional
     :param jquery_file_upload_ui_options: The default template is using 
            blueimp/jQuery-File-Upload package to render the ui and dealing with
@@ -193,15 +277,6 @@ class GalleryWidget(forms.HiddenInput):
                    "value": str(ju_settings["maxNumberOfFiles"])}
             )
 
-        if ("singleFileUploads" in ju_settings
-                and str(ju_settings["singleFileUploads"]).lower() == "false"):
-            logger.warning(
-                "%(obj)s: 'singleFileUploads=False' in "
-                "'jquery_file_upload_ui_options' is not allowed and will be "
-                "ignored."
-                % {"obj": self.__class__.__name__}
-            )
-
         if "previewMaxWidth" in ju_settings or "previewMaxHeight" in ju_settings:
             logger.warning(
                 "%(obj)s: 'previewMaxWidth' and 'previewMaxHeight' in "
@@ -251,6 +326,8 @@ class GalleryWidget(forms.HiddenInput):
         # init stage, because we should allow the widget be changed after the form
         # is initialized. So, we have to do this before rendering the widget,
         # and throw the error if any.
+        # The URLs of the default views are memoized by get_url_from_str,
+        # so the check is cheap for widgets rendered many times.
 
         target_image_model = getattr(self, "image_model", None)
 
@@ -313,51 +390,96 @@ class GalleryWidget(forms.HiddenInput):
     def is_hidden(self):
         return False
 
-    def get_stringfied_jquery_file_upload_ui_options(self):
-        # See blueimp/jQuery-File-Upload
-        # https://github.com/blueimp/jQuery-File-Upload/wiki/Options
-
-        # We copy the options as the actual context used in rendering
-        # so as to avoid logger warnings
-        ui_options = self.jquery_file_upload_ui_options.copy()
-
-        # Remove the option (i.e., use default False)
-        ui_options.pop("singleFileUploads", None)
-
-        # Remove other options which we are using default but
-        # don't allow user to change
-        for option in ["fileInput", "formData"]:
-            ui_options.pop(option, None)
-
-        # Fixme: this is hardcoded
-        ui_options["paramName"] = "files[]"
-
-        # override maxNumberOfFiles
-        ui_options.pop("maxNumberOfFiles", None)
-        max_number_of_images = (
-            getattr(self, "max_number_of_images", None))
-
-        if max_number_of_images:
-            ui_options["maxNumberOfFiles"] = max_number_of_images
+    def get_widget_options_json(self):
+        return compile_widget_options(json.dumps([
+            self.jquery_file_upload_ui_options,
+            self.jquery_file_upload_ui_sortable_options,
+            getattr(self, "max_number_of_images", None),
+            self.thumbnail_size,
+            conf.BOOTSTRAP_VERSION,
+            self._disabled,
+        ], sort_keys=True))
+
+    @staticmethod
+    def get_widget_config_json(context):
+        """The configuration of the widget instance read by the widget script,
+        rendered to the ``data-config`` attribute of the widget.
+        """
+        return json.dumps({
+            "name": context["name"],
+            "csrfCookieName": context["csrfCookieName"],
+            "pks": context.get("pks"),
+            "fetchUrl": context.get("fetch_url") and str(context["fetch_url"]),
+            "fetchPageSize": context.get("fetch_page_size"),
+            "pendingThumbnailsFetchUrl": (
+                context.get("pending_thumbnails_fetch_url")
+                and str(context["pending_thumbnails_fetch_url"])),
+            "initialImagesId": context.get("initial_images_id"),
+            "inlinedCount": context.get("inlined_count"),
+        })
+
+    def get_inline_initial_images(self, pks):
+        """Serialize the images of ``pks`` by calling the view of
+        :attr:`fetch_url` in process, with the permissions of the current
+        request (see the ``inline_initial_images`` option).
+
+        :return: The result of the view, or None if it is not available, in
+          which case the images are fetched by the browser.
+        """
+        request = getattr(self, "request", None)
+        if request is None:
+            return None
+
+        path = urlsplit(str(self.fetch_url)).path
+
+        # The reversed URL includes the script prefix, which is not expected
+        # by resolve()
+        path_info = path
+        script_prefix = get_script_prefix()
+        if path.startswith(script_prefix):
+            path_info = "/" + path[len(script_prefix):]
 
-        # override previewMaxWidth and previewMaxHeight
-
-        _width, _height = self.thumbnail_size.split("x")
-        ui_options.update(
-            {"previewMaxWidth": int(_width),
-             "previewMaxHeight": int(_height)
-             })
-
-        # Compatibility with Bootstrap 4 and 5
-        # https://github.com/blueimp/jQuery-File-Upload/wiki/Style-Guide#bootstrap-ui
+        try:
+            match = resolve(path_info)
+        except Resolver404:
+            return None
+
+        query = QueryDict(mutable=True)
+        query["pks"] = json.dumps(pks)
+        query.setlist("thumbnail_size", self.thumbnail_size.split("x"))
+
+        fetch_request = copy.copy(request)
+        fetch_request.method = "GET"
+        fetch_request.path = path
+        fetch_request.path_info = path_info
+        fetch_request.GET = query
+        fetch_request.META = dict(
+            request.META, REQUEST_METHOD="GET", QUERY_STRING=query.urlencode(),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        fetch_request.resolver_match = match
+
+        # The validators of the page request don't apply to the images
+        for key in ["HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE"]:
+            fetch_request.META.pop(key, None)
+
+        # The view is called without the middlewares, which would otherwise
+        # convert the exceptions (e.g., PermissionDenied for invalid pks of a
+        # bound form) into error responses.
+        try:
+            response = match.func(fetch_request, *match.args, **match.kwargs)
+        except Exception as e:
+            logger.warning(
+                "%(obj)s: failed to inline the initial images: %(error)s"
+                % {"obj": self.__class__.__name__,
+                   "error": f"{type(e).__name__}: {str(e)}"})
+            return None
 
-        if conf.BOOTSTRAP_VERSION > 3:
-            ui_options["showElementClass"] = "show"
+        if response.status_code != 200:
+            return None
 
-        return convert_dict_to_plain_text(
-            ui_options, indent=16,
-            no_wrap_keys=["loadImageFileTypes", "acceptFileTypes",
-                          "disableImageResize"])
+        if response.streaming:
+            return json.loads(b"".join(response.streaming_content))
+        return json.loads(response.content)
 
     def render(self, name, value, attrs=None, renderer=None):
         self.set_and_check_urls()
@@ -378,6 +500,21 @@ class GalleryWidget(forms.HiddenInput):
         if value:
             context["pks"] = json.loads(value)
             context["fetch_url"] = self.fetch_url
+            context["fetch_page_size"] = self.options.get("fetch_page_size")
+
+            if self.options.get("inline_initial_images") and self.fetch_url:
+                inlined_pks = context["pks"][
+                    :context["fetch_page_size"] or None]
+                initial_images = self.get_inline_initial_images(inlined_pks)
+                if initial_images is not None:
+                    context.update({
+                        "initial_images": initial_images,
+                        "initial_images_id": f"id-{name}-initial-images",
+                        "inlined_count": len(inlined_pks),
+                    })
+
+        if conf.THUMBNAIL_GENERATE_ASYNC:
+            context["pending_thumbnails_fetch_url"] = self.fetch_url
 
         _context = self.get_context(name, value, attrs)
 
@@ -393,18 +530,12 @@ class GalleryWidget(forms.HiddenInput):
             })
         context["widget"] = _context["widget"]
 
-        context["jquery_fileupload_ui_options"] = (
-            self.get_stringfied_jquery_file_upload_ui_options())
-
-        sortable_options = self.jquery_file_upload_ui_sortable_options.copy()
-
-        if self._disabled:
-            sortable_options["disabled"] = True
-
-        context["jquery_fileupload_ui_sortable_options"] = (
-            convert_dict_to_plain_text(sortable_options, indent=16)
-        )
+        context["widget_options"] = self.get_widget_options_json()
 
         context["csrfCookieName"] = getattr(settings, "CSRF_COOKIE_NAME")
+        context["widget_config"] = self.get_widget_config_json(context)
+
+        if self.options.get("shared_script"):
+            context["shared_script"] = True
 
         return renderer.render(template_name=self.template, context=context)
@@ -521,6 +521,53 @@ class CheckThumbnails(CheckSettingsBase):
         self.assertCheckMessages([
             "django-galleryfield-thumbnails.E003"])
 
+    VALID_CONF_ASYNC = {
+        "thumbnails": {
+            "generate_async": True,
+            "async_task_runner": "galleryfield.thumbnails.run_in_thread_pool",
+        },
+    }
+
+    INVALID_CONF_ASYNC_NOT_BOOL = {
+        "thumbnails": {
+            "generate_async": "true",
+        },
+    }
+
+    INVALID_CONF_ASYNC_TASK_RUNNER_NOT_IMPORTABLE = {
+        "thumbnails": {
+            "async_task_runner": "galleryfield.thumbnails.not_exist",
+        },
+    }
+
+    INVALID_CONF_ASYNC_TASK_RUNNER_NOT_CALLABLE = {
+        "thumbnails": {
+            "async_task_runner":
+                "galleryfield.thumbnails.THUMBNAIL_THREAD_POOL_MAX_WORKERS",
+        },
+    }
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_ASYNC)
+    def test_valid_config_async(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_ASYNC_NOT_BOOL)
+    def test_invalid_config_async_not_bool(self):
+        self.assertCheckMessages([
+            "django-galleryfield-thumbnails.E006"])
+
+    @override_settings(
+        DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_ASYNC_TASK_RUNNER_NOT_IMPORTABLE)
+    def test_invalid_config_async_task_runner_not_importable(self):
+        self.assertCheckMessages([
+            "django-galleryfield-thumbnails.E007"])
+
+    @override_settings(
+        DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_ASYNC_TASK_RUNNER_NOT_CALLABLE)
+    def test_invalid_config_async_task_runner_not_callable(self):
+        self.assertCheckMessages([
+            "django-galleryfield-thumbnails.E007"])
+
 
 """
     jquery_file_upload_ui_options: {},
@@ -551,13 +598,13 @@ class CheckJqueryFileUploadUiOptions(CheckSettingsBase):
         }
     }
 
-    WARN_CONF_SINGLE_FILE_UPLOADS_FALSE = {
+    NO_WARN_CONF_SINGLE_FILE_UPLOADS_FALSE = {
         "jquery_file_upload_ui_options": {
             "singleFileUploads": False
         }
     }
 
-    WARN_CONF_SINGLE_FILE_UPLOADS_FALSE_STRING = {
+    NO_WARN_CONF_SINGLE_FILE_UPLOADS_FALSE_STRING = {
         "jquery_file_upload_ui_options": {
             "singleFileUploads": "false"
         }
@@ -611,16 +658,14 @@ class CheckJqueryFileUploadUiOptions(CheckSettingsBase):
             ["django-galleryfield-jquery_file_upload_ui_options.W001"])
 
     @override_settings(
-        DJANGO_GALLERY_FIELD_CONFIG=WARN_CONF_SINGLE_FILE_UPLOADS_FALSE)
-    def test_warn_single_upload_false_1(self):
-        self.assertCheckMessages(
-            ["django-galleryfield-jquery_file_upload_ui_options.W002"])
+        DJANGO_GALLERY_FIELD_CONFIG=NO_WARN_CONF_SINGLE_FILE_UPLOADS_FALSE)
+    def test_single_upload_false_1(self):
+        self.assertCheckMessages([])
 
     @override_settings(
-        DJANGO_GALLERY_FIELD_CONFIG=WARN_CONF_SINGLE_FILE_UPLOADS_FALSE_STRING)
-    def test_warn_single_upload_false_2(self):
-        self.assertCheckMessages(
-            ["django-galleryfield-jquery_file_upload_ui_options.W002"])
+        DJANGO_GALLERY_FIELD_CONFIG=NO_WARN_CONF_SINGLE_FILE_UPLOADS_FALSE_STRING)
+    def test_single_upload_false_2(self):
+        self.assertCheckMessages([])
 
     @override_settings(DJANGO_GALLERY_FIELD_CONFIG=WARN_CONF_PREVIEW_MAX_HEIGHT)
     def test_warn_preview_max_height(self):
@@ -715,3 +760,226 @@ class CheckPromptAlert(CheckSettingsBase):
     def test_invalid_config1(self):
         self.assertCheckMessages([
             "django-galleryfield-prompt_alert_if_changed_on_window_reload.E001"])
+
+
+"""
+    "in_memory_ordering_threshold": 100,
+"""
+
+
+class CheckInMemoryOrderingThreshold(CheckSettingsBase):
+    msg_id_prefix = "django-galleryfield-in_memory_ordering_threshold"
+
+    VALID_CONF_None = {"in_memory_ordering_threshold": None}
+
+    VALID_CONF_int = {"in_memory_ordering_threshold": 0}
+
+    INVALID_CONF_NOT_int = {"in_memory_ordering_threshold": "100"}
+
+    INVALID_CONF_negative = {"in_memory_ordering_threshold": -1}
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_None)
+    def test_valid_config1(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_int)
+    def test_valid_config2(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_NOT_int)
+    def test_invalid_config1(self):
+        self.assertCheckMessages([
+            "django-galleryfield-in_memory_ordering_threshold.E001"])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_negative)
+    def test_invalid_config2(self):
+        self.assertCheckMessages([
+            "django-galleryfield-in_memory_ordering_threshold.E001"])
+
+
+"""
+    "image_data_cache": {
+        "alias": "default",
+        "timeout": 3600,
+    },
+"""
+
+
+class CheckImageDataCache(CheckSettingsBase):
+    msg_id_prefix = "django-galleryfield-image_data_cache"
+
+    VALID_CONF_None = {"image_data_cache": None}
+
+    VALID_CONF = {"image_data_cache": {"alias": "default", "timeout": 60}}
+
+    VALID_CONF_timeout_None = {"image_data_cache": {"timeout": None}}
+
+    INVALID_CONF_NOT_dict = {"image_data_cache": "default"}
+
+    INVALID_CONF_unknown_alias = {"image_data_cache": {"alias": "foo"}}
+
+    INVALID_CONF_timeout_not_int = {"image_data_cache": {"timeout": "60"}}
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_None)
+    def test_valid_config1(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF)
+    def test_valid_config2(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_timeout_None)
+    def test_valid_config3(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_NOT_dict)
+    def test_invalid_config1(self):
+        self.assertCheckMessages([
+            "django-galleryfield-image_data_cache.E001"])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_unknown_alias)
+    def test_invalid_config2(self):
+        self.assertCheckMessages([
+            "django-galleryfield-image_data_cache.E002"])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_timeout_not_int)
+    def test_invalid_config3(self):
+        self.assertCheckMessages([
+            "django-galleryfield-image_data_cache.E003"])
+
+
+"""
+    "non_destructive_crop": False,
+"""
+
+
+class CheckNonDestructiveCrop(CheckSettingsBase):
+    msg_id_prefix = "django-galleryfield-non_destructive_crop"
+
+    VALID_CONF_None = {"non_destructive_crop": None}
+
+    VALID_CONF_bool = {"non_destructive_crop": True}
+
+    INVALID_CONF_NOT_bool = {"non_destructive_crop": "True"}
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_None)
+    def test_valid_config1(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_bool)
+    def test_valid_config2(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_NOT_bool)
+    def test_invalid_config1(self):
+        self.assertCheckMessages([
+            "django-galleryfield-non_destructive_crop.E001"])
+
+
+"""
+    "chunked_upload": {
+        "temp_dir": None,
+        "expiration": 86400,
+    },
+"""
+
+
+class CheckChunkedUpload(CheckSettingsBase):
+    msg_id_prefix = "django-galleryfield-chunked_upload"
+
+    VALID_CONF_None = {"chunked_upload": None}
+
+    VALID_CONF = {"chunked_upload": {"temp_dir": "/tmp/chunks",
+                                     "expiration": 3600}}
+
+    INVALID_CONF_NOT_dict = {"chunked_upload": "/tmp/chunks"}
+
+    INVALID_CONF_temp_dir_not_str = {"chunked_upload": {"temp_dir": 1}}
+
+    INVALID_CONF_expiration_not_positive = {
+        "chunked_upload": {"expiration": 0}}
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_None)
+    def test_valid_config1(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF)
+    def test_valid_config2(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_NOT_dict)
+    def test_invalid_config1(self):
+        self.assertCheckMessages([
+            "django-galleryfield-chunked_upload.E001"])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_temp_dir_not_str)
+    def test_invalid_config2(self):
+        self.assertCheckMessages([
+            "django-galleryfield-chunked_upload.E002"])
+
+    @override_settings(
+        DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_expiration_not_positive)
+    def test_invalid_config3(self):
+        self.assertCheckMessages([
+            "django-galleryfield-chunked_upload.E003"])
+
+
+class CheckUploadNormalization(CheckSettingsBase):
+    msg_id_prefix = "django-galleryfield-upload_normalization"
+
+    VALID_CONF_None = {"upload_normalization": None}
+
+    VALID_CONF = {"upload_normalization": {"max_width": 2048,
+                                           "max_height": 2048,
+                                           "format": "webp",
+                                           "quality": 85}}
+
+    INVALID_CONF_NOT_dict = {"upload_normalization": 2048}
+
+    INVALID_CONF_max_width_not_positive = {
+        "upload_normalization": {"max_width": 0}}
+
+    INVALID_CONF_max_height_not_int = {
+        "upload_normalization": {"max_height": "2048"}}
+
+    INVALID_CONF_format_unknown = {
+        "upload_normalization": {"format": "foo"}}
+
+    INVALID_CONF_quality_out_of_range = {
+        "upload_normalization": {"quality": 101}}
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF_None)
+    def test_valid_config1(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=VALID_CONF)
+    def test_valid_config2(self):
+        self.assertCheckMessages([])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_NOT_dict)
+    def test_invalid_config1(self):
+        self.assertCheckMessages([
+            "django-galleryfield-upload_normalization.E001"])
+
+    @override_settings(
+        DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_max_width_not_positive)
+    def test_invalid_config2(self):
+        self.assertCheckMessages([
+            "django-galleryfield-upload_normalization.E002"])
+
+    @override_settings(
+        DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_max_height_not_int)
+    def test_invalid_config3(self):
+        self.assertCheckMessages([
+            "django-galleryfield-upload_normalization.E002"])
+
+    @override_settings(DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_format_unknown)
+    def test_invalid_config4(self):
+        self.assertCheckMessages([
+            "django-galleryfield-upload_normalization.E003"])
+
+    @override_settings(
+        DJANGO_GALLERY_FIELD_CONFIG=INVALID_CONF_quality_out_of_range)
+    def test_invalid_config5(self):
+        self.assertCheckMessages([
+            "django-galleryfield-upload_normalization.E004"])
@@ -0,0 +1,189 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+
+from galleryfield.management.commands.galleryfield_warm_thumbnails import (
+    InlineExecutor, _init_worker)
+from galleryfield.models import ImageCrop
+from galleryfield.thumbnails import get_image, is_thumbnail_url_cached
+from tests import factories
+from tests.mixins import UserCreateMixin
+from tests.utils import remove_upload_directory, test_media_root
+
+
+@override_settings(MEDIA_ROOT=test_media_root)
+class WarmThumbnailsCommandTest(UserCreateMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):  # noqa
+        super().setUpTestData()
+        cls.user = cls.create_user()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        remove_upload_directory()
+
+    def call_command(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            "galleryfield_warm_thumbnails", *args, stdout=stdout,
+            stderr=StringIO(), **kwargs)
+        return stdout.getvalue()
+
+    def test_warm_thumbnails(self):
+        images = factories.BuiltInGalleryImageFactory.create_batch(
+            creator=self.user, size=5)
+
+        output = self.call_command("--size", "60x60", "--size", "80", chunk_size=2)
+        self.assertIn("Done: 5 images, 10 thumbnails generated, 0 errors", output)
+        self.assertIn(f"Resume with --start-after={images[-1].pk}", output)
+
+        for image in images:
+            for size in ["60x60", "80x80"]:
+                self.assertTrue(is_thumbnail_url_cached(image.image, size))
+
+    def test_warm_thumbnails_renditions(self):
+        images = factories.BuiltInGalleryImageFactory.create_batch(
+            creator=self.user, size=2)
+        ImageCrop.objects.create(
+            target_model="galleryfield.builtingalleryimage",
+            object_pk=images[0].pk, x=0, y=0, width=40, height=60)
+
+        with mock.patch("galleryfield.conf.NON_DESTRUCTIVE_CROP", True):
+            output = self.call_command()
+            self.assertIn("Done: 2 images, 2 thumbnails generated", output)
+            rendition = get_image(images[0], "image")
+
+        self.assertIn("/renditions/", rendition.name)
+        self.assertTrue(is_thumbnail_url_cached(rendition, "120x120"))
+        self.assertFalse(is_thumbnail_url_cached(images[0].image, "120x120"))
+        self.assertTrue(is_thumbnail_url_cached(images[1].image, "120x120"))
+
+    def test_warm_thumbnails_custom_model(self):
+        images = factories.CustomImageFactory.create_batch(user=self.user, size=2)
+
+        output = self.call_command(model="demo_custom.CustomImage")
+        self.assertIn("Done: 2 images, 2 thumbnails generated", output)
+        for image in images:
+            self.assertTrue(is_thumbnail_url_cached(image.photo, "120x120"))
+
+    def test_warm_thumbnails_start_after(self):
+        images = factories.BuiltInGalleryImageFactory.create_batch(
+            creator=self.user, size=5)
+
+        output = self.call_command(start_after=images[2].pk)
+        self.assertIn("Done: 2 images, 2 thumbnails generated", output)
+        self.assertFalse(is_thumbnail_url_cached(images[2].image, "120x120"))
+        self.assertTrue(is_thumbnail_url_cached(images[3].image, "120x120"))
+
+    def test_warm_thumbnails_missing_only(self):
+        images = factories.BuiltInGalleryImageFactory.create_batch(
+            creator=self.user, size=3)
+        self.call_command(start_after=images[0].pk)
+
+        with mock.patch(
+                "galleryfield.management.commands.galleryfield_warm_thumbnails"
+                ".create_thumbnail") as mock_create:
+            output = self.call_command(missing_only=True)
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertIn("Done: 3 images, 1 thumbnails generated", output)
+
+    def test_warm_thumbnails_error(self):
+        factories.BuiltInGalleryImageFactory.create_batch(
+            creator=self.user, size=2)
+
+        with mock.patch(
+                "galleryfield.management.commands.galleryfield_warm_thumbnails"
+                ".create_thumbnail", side_effect=RuntimeError("my error")):
+            output = self.call_command()
+        self.assertIn("Done: 2 images, 0 thumbnails generated, 2 errors", output)
+
+    def test_warm_thumbnails_workers(self):
+        images = factories.BuiltInGalleryImageFactory.create_batch(
+            creator=self.user, size=5)
+
+        # Spawned worker processes can't access the in-memory test database,
+        # the chunks are processed in the current process.
+        with mock.patch(
+                "galleryfield.management.commands.galleryfield_warm_thumbnails"
+                ".ProcessPoolExecutor",
+                side_effect=lambda **kwargs: InlineExecutor()) as mock_pool:
+            output = self.call_command(workers=2, chunk_size=2)
+
+        kwargs = mock_pool.call_args.kwargs
+        self.assertEqual(kwargs["max_workers"], 2)
+        self.assertIs(kwargs["initializer"], _init_worker)
+        self.assertEqual(kwargs["mp_context"].get_start_method(), "spawn")
+
+        self.assertIn("Done: 5 images, 5 thumbnails generated, 0 errors", output)
+        self.assertIn(f"Resume with --start-after={images[-1].pk}", output)
+        for image in images:
+            self.assertTrue(is_thumbnail_url_cached(image.image, "120x120"))
+
+    def test_warm_thumbnails_invalid_options(self):
+        for kwargs in [{"model": "not_exist.Model"},
+                       {"model": "galleryfield.NotExist"},
+                       {"sizes": ["abc"]},
+                       {"chunk_size": 0},
+                       {"workers": 0}]:
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(CommandError):
+                    self.call_command(**kwargs)
+
+
+class ClearChunkedUploadsCommandTest(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        patcher = mock.patch(
+            "galleryfield.conf.CHUNKED_UPLOAD_TEMP_DIR", self.temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_partial_file(self, name, age):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(b"x")
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def call_command(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            "galleryfield_clear_chunked_uploads", *args, stdout=stdout,
+            **kwargs)
+        return stdout.getvalue()
+
+    def test_clear_chunked_uploads(self):
+        stale = self.create_partial_file("a.part", 2 * 86400)
+        fresh = self.create_partial_file("b.part", 60)
+        other = self.create_partial_file("c.txt", 2 * 86400)
+
+        output = self.call_command()
+        self.assertIn("Removed 1 stale chunked uploads", output)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertTrue(os.path.exists(other))
+
+        output = self.call_command(max_age=30)
+        self.assertIn("Removed 1 stale chunked uploads", output)
+        self.assertFalse(os.path.exists(fresh))
+
+    def test_clear_chunked_uploads_no_dir(self):
+        shutil.rmtree(self.temp_dir)
+        output = self.call_command()
+        self.assertIn("Removed 0 stale chunked uploads", output)
+
+    def test_clear_chunked_uploads_invalid_max_age(self):
+        with self.assertRaises(CommandError):
+            self.call_command(max_age=-1)
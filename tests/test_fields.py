@@ -1,3 +1,4 @@
+import json
 import random
 from unittest import mock
 
@@ -10,7 +11,9 @@ from django.test import TestCase
 from django.test.utils import isolate_apps, override_settings
 
 from demo.models import DemoGallery
-from galleryfield.fields import GalleryField, GalleryFormField
+from galleryfield.fields import (GalleryField, GalleryFormField,
+                                _order_queryset_in_memory,
+                                prefetch_gallery_images)
 from galleryfield.widgets import GalleryWidget
 from tests import factories
 from tests.factories import DemoGalleryFactory
@@ -134,6 +137,33 @@ class GalleryFormFieldTest(TestCase):
         with self.assertRaisesMessage(ValidationError, msg):
             field.clean(form_data)
 
+    def test_gallery_form_field_clean_some_images_not_exist(self):
+        images = factories.BuiltInGalleryImageFactory.create_batch(
+            size=5, creator=self.user)
+        pks = [image.pk for image in images]
+        random.shuffle(pks)
+        field = GalleryFormField()
+
+        with self.assertNumQueries(1):
+            cleaned = field.clean(pks[:2] + [1000] + pks[2:] + [1001])
+        self.assertEqual(cleaned, pks)
+
+    def test_gallery_form_field_validated_pks_reused(self):
+        images = factories.BuiltInGalleryImageFactory.create_batch(
+            size=3, creator=self.user)
+        pks = [image.pk for image in images]
+
+        form = DemoTestGalleryModelForm(data={"images": json.dumps(pks)})
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+            self.assertEqual(form.changed_data, ["images"])
+
+        # Validated pks are not shared with other form instances
+        images[0].delete()
+        form = DemoTestGalleryModelForm(data={"images": json.dumps(pks)})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["images"], pks[1:])
+
     def test_gallery_form_field_clean(self):
         image = factories.BuiltInGalleryImageFactory(creator=self.user)
         field = GalleryFormField()
@@ -362,6 +392,143 @@ class GalleryFormFieldTest(TestCase):
         self.assertEqual(form.cleaned_data["images"], image_pks)
 
 
+class PrefetchGalleryImagesTest(TestCase):
+    def setUp(self) -> None:
+        factories.UserFactory.reset_sequence()
+        factories.BuiltInGalleryImageFactory.reset_sequence()
+        factories.DemoGalleryFactory.reset_sequence()
+        self.user = factories.UserFactory()
+        super().setUp()
+
+    def test_prefetch(self):
+        for _i in range(3):
+            factories.DemoGalleryFactory.create(
+                creator=self.user, number_of_images=4, shuffle=True)
+
+        with self.assertNumQueries(2):
+            galleries = prefetch_gallery_images(
+                DemoGallery.objects.all(), "images")
+
+            for gallery in galleries:
+                self.assertEqual(
+                    [obj.pk for obj in gallery.images.objects.all()],
+                    list(gallery.images))
+                self.assertEqual(
+                    gallery.images.objects.first().pk, gallery.images[0])
+
+    def test_prefetch_skip_non_exist_and_duplicated_pks(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2)
+        pks = list(gallery.images)
+        gallery.images = [pks[1], 1000, pks[0], pks[1]]
+        gallery.save()
+
+        gallery, = prefetch_gallery_images(
+            DemoGallery.objects.all(), "images")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [obj.pk for obj in gallery.images.objects],
+                [pks[1], pks[0]])
+
+    def test_prefetch_null_value(self):
+        gallery = factories.DemoGalleryFactory.create(creator=self.user)
+        gallery.images = None
+        gallery.save()
+
+        with self.assertNumQueries(1):
+            gallery, = prefetch_gallery_images(
+                DemoGallery.objects.all(), "images")
+            self.assertEqual(list(gallery.images.objects.all()), [])
+
+    def test_prefetch_not_gallery_field(self):
+        factories.DemoGalleryFactory.create(creator=self.user)
+
+        with self.assertRaises(ValueError):
+            prefetch_gallery_images(DemoGallery.objects.all(), "owner")
+
+
+class GalleryImagesInMemoryOrderingTest(TestCase):
+    def setUp(self) -> None:
+        factories.UserFactory.reset_sequence()
+        factories.BuiltInGalleryImageFactory.reset_sequence()
+        factories.DemoGalleryFactory.reset_sequence()
+        self.user = factories.UserFactory()
+        self.gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5, shuffle=True)
+        super().setUp()
+
+    def assertGalleryOrdering(self, gallery):  # noqa
+        gallery = DemoGallery.objects.get(pk=gallery.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [obj.pk for obj in gallery.images.objects.all()],
+                list(gallery.images))
+
+    def test_in_memory_ordering(self):
+        field = DemoGallery._meta.get_field("images")
+        with mock.patch.object(field, "in_memory_ordering", True):
+            self.assertGalleryOrdering(self.gallery)
+
+    def test_in_memory_ordering_false(self):
+        field = DemoGallery._meta.get_field("images")
+        with mock.patch.object(field, "in_memory_ordering", False):
+            with mock.patch("galleryfield.conf.IN_MEMORY_ORDERING_THRESHOLD", 2):
+                self.assertGalleryOrdering(self.gallery)
+
+    def test_in_memory_ordering_threshold(self):
+        with mock.patch("galleryfield.conf.IN_MEMORY_ORDERING_THRESHOLD", 2):
+            with mock.patch(
+                    "galleryfield.fields._order_queryset_in_memory",
+                    wraps=_order_queryset_in_memory) as mock_order:
+                self.assertGalleryOrdering(self.gallery)
+                self.assertEqual(mock_order.call_count, 1)
+
+        with mock.patch(
+                "galleryfield.fields._order_queryset_in_memory") as mock_order:
+            self.assertGalleryOrdering(self.gallery)
+            self.assertEqual(mock_order.call_count, 0)
+
+    def test_in_memory_ordering_queryset(self):
+        field = DemoGallery._meta.get_field("images")
+        # Not in the order of pks
+        pks = sorted(self.gallery.images, reverse=True)
+        DemoGallery.objects.filter(pk=self.gallery.pk).update(images=pks)
+
+        for in_memory_ordering in [True, False]:
+            with self.subTest(in_memory_ordering=in_memory_ordering):
+                with mock.patch.object(
+                        field, "in_memory_ordering", in_memory_ordering):
+                    gallery = DemoGallery.objects.get(pk=self.gallery.pk)
+                    objects = gallery.images.objects
+
+                    with self.assertNumQueries(1):
+                        self.assertEqual(objects.count(), 5)
+                    with self.assertNumQueries(1):
+                        self.assertTrue(objects.exists())
+                    self.assertEqual(objects.first().pk, pks[0])
+                    self.assertEqual(objects.last().pk, pks[-1])
+                    self.assertEqual(
+                        [obj.pk for obj in objects[1:3]], pks[1:3])
+                    self.assertEqual(
+                        [obj.pk for obj in objects.filter(pk__in=pks[2:])],
+                        pks[2:])
+                    self.assertEqual(
+                        [obj.pk for obj in objects.reverse()], pks[::-1])
+                    self.assertEqual(
+                        [obj.pk for obj in objects.order_by("pk")],
+                        sorted(pks))
+
+    def test_deconstruct(self):
+        field = GalleryField(in_memory_ordering=True)
+        name, path, args, kwargs = field.deconstruct()
+        self.assertEqual(kwargs["in_memory_ordering"], True)
+
+        field = GalleryField()
+        name, path, args, kwargs = field.deconstruct()
+        self.assertNotIn("in_memory_ordering", kwargs)
+
+
 class GalleryFieldCheckTest(TestCase):
     def test_field_checks_valid(self):
 
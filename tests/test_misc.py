@@ -1,13 +1,26 @@
+from io import BytesIO
+from unittest import mock
+
 from django.core.exceptions import ImproperlyConfigured
 from django.test import SimpleTestCase
-from django.urls import NoReverseMatch, reverse
+from django.test.utils import override_settings
+from django.urls import (NoReverseMatch, get_script_prefix, reverse,
+                         set_script_prefix)
+from django.utils import translation
+from PIL import Image, ImageCms, JpegImagePlugin
 
-from galleryfield.utils import get_url_from_str
+from galleryfield.utils import (clear_url_from_str_cache, crop_image,
+                                crop_image_file, get_downscaled_size,
+                                get_url_from_str, normalize_image_file)
 
 
 class GetUrlFromStrTest(SimpleTestCase):
     # Test galleryfield.utils.get_url_from_str
 
+    def setUp(self):
+        super().setUp()
+        clear_url_from_str_cache()
+
     def test_None(self):
         self.assertIsNone(get_url_from_str(None))
         self.assertIsNone(get_url_from_str(""))
@@ -42,3 +55,195 @@ class GetUrlFromStrTest(SimpleTestCase):
             get_url_from_str("/foo/bar", require_urlconf_ready=True)
         self.assertIn("is not a valid view function or pattern name",
                       cm.exception.args[0])
+
+    def test_memoized_when_urlconf_ready(self):
+        url_name = "galleryfield-builtingalleryimage-upload"
+        with mock.patch("galleryfield.utils.reverse", wraps=reverse) as mock_reverse:
+            for __ in range(3):
+                self.assertEqual(
+                    get_url_from_str(url_name, require_urlconf_ready=True),
+                    reverse(url_name))
+        self.assertEqual(mock_reverse.call_count, 1)
+
+    def test_memoized_by_urlconf(self):
+        url_name = "galleryfield-builtingalleryimage-upload"
+        get_url_from_str(url_name, require_urlconf_ready=True)
+
+        with override_settings(ROOT_URLCONF="tests.urls_for_tests_empty"):
+            with self.assertRaises(ImproperlyConfigured):
+                get_url_from_str(url_name, require_urlconf_ready=True)
+
+        with mock.patch("galleryfield.utils.reverse", wraps=reverse) as mock_reverse:
+            get_url_from_str(url_name, require_urlconf_ready=True)
+        self.assertEqual(mock_reverse.call_count, 1)
+
+    @override_settings(ROOT_URLCONF="tests.urls_for_tests_i18n",
+                       LANGUAGES=[("en", "English"), ("fr", "French")])
+    def test_memoized_by_language(self):
+        url_name = "galleryfield-builtingalleryimage-upload"
+        for language in ["en", "fr", "en"]:
+            with translation.override(language):
+                self.assertEqual(
+                    get_url_from_str(url_name, require_urlconf_ready=True),
+                    f"/{language}/image-handler/upload/")
+
+    def test_memoized_by_script_prefix(self):
+        url_name = "galleryfield-builtingalleryimage-upload"
+        url = get_url_from_str(url_name, require_urlconf_ready=True)
+
+        prefix = get_script_prefix()
+        set_script_prefix("/prefix/")
+        try:
+            self.assertEqual(
+                get_url_from_str(url_name, require_urlconf_ready=True),
+                "/prefix" + url)
+        finally:
+            set_script_prefix(prefix)
+
+        self.assertEqual(
+            get_url_from_str(url_name, require_urlconf_ready=True), url)
+
+
+class CropImageTest(SimpleTestCase):
+    @staticmethod
+    def get_image():
+        # An image with distinct pixels so that any misplacement is detected
+        image = Image.new("RGB", (40, 30))
+        image.putdata([(i % 256, i // 256, (i * 7) % 256)
+                       for i in range(40 * 30)])
+        return image
+
+    def test_crop_image_same_as_rotating_whole_image(self):
+        image = self.get_image()
+        for rotate in [0, 90, 180, 270, -90, -180, -270, 360, 450, 45, -30]:
+            for box in [(0, 0, 10, 20), (5, 3, 25, 28), (0, 0, 40, 40),
+                        (-5, -5, 10, 10), (20, 10, 50, 45)]:
+                with self.subTest(rotate=rotate, box=box):
+                    expected = image.rotate(-rotate, expand=True).crop(box)
+                    cropped = crop_image(image, box, rotate)
+                    self.assertEqual(cropped.size, expected.size)
+                    self.assertEqual(cropped.tobytes(), expected.tobytes())
+
+    def test_crop_image_right_angle_not_rotating_whole_image(self):
+        image = self.get_image()
+        with mock.patch.object(
+                Image.Image, "rotate", side_effect=AssertionError):
+            for rotate in [0, 90, 180, 270, -90]:
+                with self.subTest(rotate=rotate):
+                    crop_image(image, (0, 0, 10, 20), rotate)
+
+    def get_jpeg_file(self, **kwargs):
+        exif = Image.Exif()
+        exif[0x010f] = "Foo"  # Make
+        exif[0x0112] = 6  # Orientation
+        icc_profile = ImageCms.ImageCmsProfile(
+            ImageCms.createProfile("sRGB")).tobytes()
+
+        image_file = BytesIO()
+        self.get_image().save(
+            image_file, format="JPEG", exif=exif.tobytes(),
+            icc_profile=icc_profile, **kwargs)
+        image_file.seek(0)
+        return image_file
+
+    def test_crop_image_file_full_frame(self):
+        image_file = self.get_jpeg_file()
+        result = BytesIO()
+        with mock.patch.object(
+                Image.Image, "save", side_effect=AssertionError):
+            image_format = crop_image_file(
+                image_file, [((0, 0, 40, 30), 0), ((0, 0, 40, 30), 360)],
+                result)
+        self.assertEqual(image_format, "JPEG")
+        self.assertEqual(result.getvalue(), image_file.getvalue())
+
+    def test_crop_image_file_keep_jpeg_settings(self):
+        image_file = self.get_jpeg_file(quality=50, subsampling=0)
+        with Image.open(image_file) as source:
+            quantization = source.quantization
+            icc_profile = source.info["icc_profile"]
+
+        for operations in [[((0, 0, 30, 40), 90)],
+                           [((5, 5, 20, 20), 0), ((0, 0, 15, 15), 180)]]:
+            with self.subTest(operations=operations):
+                result = BytesIO()
+                crop_image_file(image_file, operations, result)
+                result.seek(0)
+                with Image.open(result) as cropped:
+                    self.assertEqual(cropped.quantization, quantization)
+                    self.assertEqual(JpegImagePlugin.get_sampling(cropped), 0)
+                    self.assertEqual(cropped.info["icc_profile"], icc_profile)
+                    exif = cropped.getexif()
+                    self.assertEqual(exif[0x010f], "Foo")
+                    self.assertNotIn(0x0112, exif)
+
+    def test_crop_image_file_png(self):
+        image_file = BytesIO()
+        self.get_image().save(image_file, format="PNG")
+        image_file.seek(0)
+
+        result = BytesIO()
+        self.assertEqual(
+            crop_image_file(image_file, [((0, 0, 10, 20), 90)], result), "PNG")
+        result.seek(0)
+        with Image.open(result) as cropped:
+            self.assertEqual(cropped.size, (10, 20))
+
+
+class NormalizeImageTest(SimpleTestCase):
+    def test_get_downscaled_size(self):
+        for size, max_width, max_height, expected in [
+                ((400, 300), None, None, (400, 300)),
+                ((400, 300), 200, None, (200, 150)),
+                ((400, 300), None, 150, (200, 150)),
+                ((400, 300), 200, 100, (133, 100)),
+                ((400, 300), 800, 600, (400, 300)),
+                ((4000, 1), 100, None, (100, 1))]:
+            with self.subTest(size=size, max_width=max_width,
+                              max_height=max_height):
+                self.assertEqual(
+                    get_downscaled_size(size, max_width, max_height), expected)
+
+    def test_normalize_image_file_keep_jpeg_settings(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation
+        image_file = BytesIO()
+        Image.new("RGB", (40, 30)).save(
+            image_file, format="JPEG", quality=50, exif=exif.tobytes())
+        image_file.seek(0)
+        with Image.open(image_file) as source:
+            quantization = source.quantization
+
+        result = BytesIO()
+        self.assertTrue(
+            normalize_image_file(image_file, result, (20, 15), "JPEG"))
+        result.seek(0)
+        with Image.open(result) as normalized:
+            self.assertEqual(normalized.size, (20, 15))
+            self.assertEqual(normalized.quantization, quantization)
+            self.assertEqual(normalized.getexif()[0x0112], 6)
+
+    def test_normalize_image_file_convert_format(self):
+        image_file = BytesIO()
+        Image.new("RGBA", (40, 30)).save(image_file, format="PNG")
+        image_file.seek(0)
+
+        result = BytesIO()
+        self.assertTrue(normalize_image_file(
+            image_file, result, (40, 30), "JPEG", quality=60))
+        result.seek(0)
+        with Image.open(result) as normalized:
+            self.assertEqual(normalized.format, "JPEG")
+            self.assertEqual(normalized.mode, "RGB")
+
+    def test_normalize_image_file_animated(self):
+        image_file = BytesIO()
+        frames = [Image.new("RGB", (40, 30), color) for color in ["red", "blue"]]
+        frames[0].save(image_file, format="GIF", save_all=True,
+                       append_images=frames[1:])
+        image_file.seek(0)
+
+        result = BytesIO()
+        self.assertFalse(
+            normalize_image_file(image_file, result, (20, 15), "GIF"))
+        self.assertEqual(result.getvalue(), b"")
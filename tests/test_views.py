@@ -1,21 +1,32 @@
 import json
 import os
+import shutil
+import struct
+import tempfile
+from io import BytesIO
 from unittest import mock
 
 from django.contrib.staticfiles.finders import find
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, SuspiciousOperation
-from django.test import RequestFactory, TestCase
-from django.test.utils import override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import (RequestFactory, TestCase, skipIfDBFeature,
+                         skipUnlessDBFeature)
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from django.utils.http import urlencode
+from PIL import Image
 
 from galleryfield import defaults
 from galleryfield import image_views as built_in_views
-from galleryfield.models import BuiltInGalleryImage
+from galleryfield.mixins import BaseImageModelMixin
+from galleryfield.models import BuiltInGalleryImage, ImageCrop
+from galleryfield.utils import get_formatted_thumbnail_size, read_image_info
 from tests import factories
 from tests.mixins import UserCreateMixin
-from tests.utils import (get_upload_file_path, remove_upload_directory,
-                         test_media_root)
+from tests.utils import (FakeRemoteStorage, get_upload_file_path,
+                         remove_upload_directory, test_media_root)
 
 
 class ViewTestMixin(UserCreateMixin):
@@ -127,6 +138,64 @@ class GalleryWidgetUploadViewTest(ViewTestMixin, TestCase):
         self.assertEqual(resp.status_code, 200, resp.content)
         self.assertEqual(BuiltInGalleryImage.objects.count(), 1)
 
+    def test_upload_image_header_read_once(self):
+        image_path = find("demo/screen_upload.png")
+        with mock.patch("galleryfield.uploads.read_image_info",
+                        wraps=read_image_info) as mock_read_image_info:
+            with mock.patch("PIL.PngImagePlugin.PngImageFile.verify"
+                            ) as mock_verify:
+                with mock.patch(
+                        "django.core.files.storage.FileSystemStorage.size"
+                ) as mock_storage_size:
+                    resp = self.demo_upload_file(self.user, image_path)
+
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(mock_read_image_info.call_count, 1)
+        mock_verify.assert_not_called()
+        mock_storage_size.assert_not_called()
+
+        file = json.loads(resp.content)["files"][0]
+        self.assertEqual(file["size"], os.path.getsize(image_path))
+        self.assertIn("cropUrl", file)
+
+    def test_upload_cropable_by_image_format(self):
+        self.c.force_login(self.user)
+        gif_io = BytesIO()
+        Image.new("RGB", (20, 10)).save(gif_io, format="GIF")
+        uploaded_file = SimpleUploadedFile(
+            "not_a_png.png", gif_io.getvalue(), content_type="image/png")
+
+        resp = self.c.post(
+            self.get_demo_upload_url(), data={"files[]": uploaded_file},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertNotIn("cropUrl", json.loads(resp.content)["files"][0])
+
+    def test_upload_cropable_mpo(self):
+        # Multi-picture JPEGs are detected as MPO by Pillow
+        self.c.force_login(self.user)
+        mpo_io = BytesIO()
+        Image.new("RGB", (20, 10)).save(
+            mpo_io, format="MPO", save_all=True,
+            append_images=[Image.new("RGB", (20, 10))])
+        mpo_io.seek(0)
+        self.assertEqual(read_image_info(mpo_io).mime_type, "image/mpo")
+        uploaded_file = SimpleUploadedFile(
+            "photo.jpg", mpo_io.getvalue(), content_type="image/jpeg")
+
+        resp = self.c.post(
+            self.get_demo_upload_url(), data={"files[]": uploaded_file},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        file = json.loads(resp.content)["files"][0]
+        self.assertIn("cropUrl", file)
+
+        # The same as fetched later
+        resp = self.c.get(
+            self.get_demo_fetch_url(params={"pks": [file["pk"]]}),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertIn("cropUrl", json.loads(resp.content)["files"][0])
+
     def test_upload_fail_not_xml_request(self):
         resp = self.demo_upload_file(self.user, find("demo/screen_upload.png"),
                                      xml_request=False)
@@ -139,6 +208,138 @@ class GalleryWidgetUploadViewTest(ViewTestMixin, TestCase):
         self.assertEqual(resp.status_code, 302)
         self.assertEqual(BuiltInGalleryImage.objects.count(), 0)
 
+    def upload_multiple_files(self, paths):
+        self.c.force_login(self.user)
+        fps = [open(path, "rb") for path in paths]
+        try:
+            return self.c.post(
+                self.get_demo_upload_url(), data={"files[]": fps},
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        finally:
+            for fp in fps:
+                fp.close()
+
+    def test_upload_multiple_files(self):
+        image_path = find("demo/screen_upload.png")
+        resp = self.upload_multiple_files([image_path] * 3)
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        files = json.loads(resp.content)["files"]
+        self.assertEqual(len(files), 3)
+        self.assertEqual(
+            [file["pk"] for file in files],
+            list(BuiltInGalleryImage.objects.order_by("pk")
+                 .values_list("pk", flat=True)))
+        for file in files:
+            self.assertNotIn("error", file)
+        for image in BuiltInGalleryImage.objects.all():
+            self.assertEqual(image.creator, self.user)
+            self.assertTrue(os.path.isfile(image.image.path))
+
+    def assert_uploaded_files_stored(self, files):
+        # The files are committed to the storage, and the returned pks are
+        # those of the saved instances
+        images = BuiltInGalleryImage.objects.order_by("pk")
+        self.assertEqual(
+            [file["pk"] for file in files],
+            [image.pk for image in images])
+        for file, image in zip(files, images):
+            self.assertTrue(image.image.storage.exists(image.image.name))
+            self.assertEqual(file["url"], image.image.url)
+
+    @skipUnlessDBFeature("can_return_rows_from_bulk_insert")
+    def test_upload_multiple_files_bulk_create(self):
+        manager = BuiltInGalleryImage._default_manager
+        image_path = find("demo/screen_upload.png")
+        with mock.patch.object(
+                manager, "bulk_create",
+                wraps=manager.bulk_create) as mock_bulk_create:
+            resp = self.upload_multiple_files([image_path] * 2)
+
+        self.assertEqual(mock_bulk_create.call_count, 1)
+        self.assertEqual(len(mock_bulk_create.call_args[0][0]), 2)
+        self.assert_uploaded_files_stored(json.loads(resp.content)["files"])
+
+    @skipIfDBFeature("can_return_rows_from_bulk_insert")
+    def test_upload_multiple_files_without_bulk_create(self):
+        # The pks of bulk created objects are not available
+        manager = BuiltInGalleryImage._default_manager
+        image_path = find("demo/screen_upload.png")
+        with mock.patch.object(
+                manager, "bulk_create",
+                wraps=manager.bulk_create) as mock_bulk_create:
+            resp = self.upload_multiple_files([image_path] * 2)
+
+        mock_bulk_create.assert_not_called()
+        self.assert_uploaded_files_stored(json.loads(resp.content)["files"])
+
+    def test_upload_multiple_files_partially_invalid(self):
+        resp = self.upload_multiple_files(
+            [find("demo/screen_upload.png"),
+             get_upload_file_path("test_file.pdf"),
+             find("demo/screen_upload.png")])
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        files = json.loads(resp.content)["files"]
+        self.assertNotIn("error", files[0])
+        self.assertEqual(files[1]["name"], "test_file.pdf")
+        self.assertIn("Upload a valid image", files[1]["error"])
+        self.assertNotIn("error", files[2])
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 2)
+
+    def test_upload_multiple_files_default_create_instances(self):
+        image_path = find("demo/screen_upload.png")
+        with mock.patch.object(
+                built_in_views.BuiltInImageCreateView,
+                "create_instances_from_forms",
+                built_in_views.ImageCreateView.create_instances_from_forms):
+            resp = self.upload_multiple_files([image_path] * 2)
+        self.assertEqual(len(json.loads(resp.content)["files"]), 2)
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 2)
+
+    def test_upload_concurrency_limited(self):
+        cache.clear()
+        key = (f"galleryfield-concurrent-uploads:"
+               f"galleryfield.builtingalleryimage:user-{self.user.pk}")
+
+        # Other requests of the user are being handled
+        cache.set(key, 8)
+        resp = self.demo_upload_file(self.user, find("demo/screen_upload.png"))
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "1")
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 0)
+        self.assertEqual(cache.get(key), 8)
+
+        # Other users are not limited
+        another_user = self.create_user()
+        resp = self.demo_upload_file(
+            another_user, find("demo/screen_upload.png"))
+        self.assertEqual(resp.status_code, 200)
+
+        cache.set(key, 7)
+        resp = self.demo_upload_file(self.user, find("demo/screen_upload.png"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(cache.get(key), 7)
+
+        # The slot is released even if the request failed
+        with mock.patch.object(
+                built_in_views.BuiltInImageCreateView,
+                "create_instance_from_form", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.demo_upload_file(
+                    self.user, find("demo/screen_upload.png"))
+        self.assertEqual(cache.get(key), 7)
+
+    def test_upload_concurrency_not_limited(self):
+        with mock.patch.object(
+                built_in_views.BuiltInImageCreateView,
+                "max_concurrent_uploads", None):
+            with mock.patch("galleryfield.mixins.caches") as mock_caches:
+                resp = self.demo_upload_file(
+                    self.user, find("demo/screen_upload.png"))
+        self.assertEqual(resp.status_code, 200)
+        mock_caches.__getitem__.assert_not_called()
+
     def test_cbv_target_model_not_configured(self):
         file = get_upload_file_path("test_file.pdf")
 
@@ -286,6 +487,448 @@ class GalleryWidgetFetchViewTest(ViewTestMixin, TestCase):
         self.c.force_login(another_user)
         self.assertEqual(len(get_fetched_result()), 0)
 
+    def test_fetch_in_memory_ordering(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5,
+            shuffle=True)
+
+        for in_memory_ordering in [True, False, None]:
+            with self.subTest(in_memory_ordering=in_memory_ordering):
+                request = self.factory.get(
+                    self.get_demo_fetch_url(
+                        params={"pks": list(gallery.images)}),
+                    HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+                request.user = self.user
+
+                with mock.patch(
+                        "galleryfield.conf.IN_MEMORY_ORDERING_THRESHOLD", 2):
+                    resp = built_in_views.BuiltInImageListView.as_view(
+                        in_memory_ordering=in_memory_ordering)(request)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(
+                    [file["pk"] for file in json.loads(resp.content)["files"]],
+                    list(gallery.images))
+
+    def test_fetch_image_data_cache(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=3,
+            shuffle=True)
+
+        def fetch():
+            request = self.factory.get(
+                self.get_demo_fetch_url(
+                    params={"pks": list(gallery.images)}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            request.user = self.user
+            resp = built_in_views.BuiltInImageListView.as_view()(request)
+            self.assertEqual(resp.status_code, 200)
+            return json.loads(resp.content)["files"]
+
+        from galleryfield.mixins import get_thumbnail as _get_thumbnail
+
+        with mock.patch("galleryfield.conf.IMAGE_DATA_CACHE_ALIAS", "default"):
+            with mock.patch(
+                    "galleryfield.mixins.get_thumbnail",
+                    wraps=_get_thumbnail) as mock_get_thumb:
+                files = fetch()
+                self.assertEqual(mock_get_thumb.call_count, 3)
+
+                mock_get_thumb.reset_mock()
+                self.assertEqual(fetch(), files)
+                self.assertEqual(mock_get_thumb.call_count, 0)
+
+                # Saving an instance invalidates the cache of that instance
+                gallery.images.objects.first().save()
+                mock_get_thumb.reset_mock()
+                self.assertEqual(fetch(), files)
+                self.assertEqual(mock_get_thumb.call_count, 1)
+
+        # The cache is not used when not configured
+        with mock.patch(
+                "galleryfield.mixins.get_thumbnail",
+                wraps=_get_thumbnail) as mock_get_thumb:
+            self.assertEqual(fetch(), files)
+            self.assertEqual(mock_get_thumb.call_count, 3)
+
+    def test_fetch_image_data_cache_invalidated_while_serializing(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=1)
+        image = gallery.images.objects.first()
+
+        def fetch():
+            request = self.factory.get(
+                self.get_demo_fetch_url(params={"pks": [image.pk]}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            request.user = self.user
+            resp = built_in_views.BuiltInImageListView.as_view()(request)
+            self.assertEqual(resp.status_code, 200)
+            return json.loads(resp.content)["files"]
+
+        _serialize = BaseImageModelMixin._get_serialized_image_data
+
+        def serialize_and_save(view, obj):
+            # The instance is saved after it was serialized and before the
+            # result is cached
+            image_data = _serialize(view, obj)
+            BuiltInGalleryImage.objects.get(pk=obj.pk).save()
+            return image_data
+
+        with mock.patch("galleryfield.conf.IMAGE_DATA_CACHE_ALIAS", "default"):
+            with mock.patch.object(
+                    BaseImageModelMixin, "_get_serialized_image_data",
+                    autospec=True, side_effect=serialize_and_save):
+                fetch()
+
+            with mock.patch.object(
+                    BaseImageModelMixin, "_get_serialized_image_data",
+                    autospec=True, side_effect=_serialize) as mock_serialize:
+                fetch()
+                self.assertEqual(mock_serialize.call_count, 1)
+
+                # Cached from now on
+                fetch()
+                self.assertEqual(mock_serialize.call_count, 1)
+
+    def test_fetch_generate_thumbnails_async(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=3,
+            shuffle=True)
+
+        def fetch():
+            request = self.factory.get(
+                self.get_demo_fetch_url(
+                    params={"pks": list(gallery.images)}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            request.user = self.user
+            resp = built_in_views.BuiltInImageListView.as_view()(request)
+            self.assertEqual(resp.status_code, 200)
+            return json.loads(resp.content)["files"]
+
+        tasks = []
+
+        def deferred_runner(func, *args):
+            tasks.append((func, args))
+
+        with mock.patch("galleryfield.conf.THUMBNAIL_GENERATE_ASYNC", True), \
+                mock.patch("galleryfield.thumbnails.get_async_task_runner",
+                           return_value=deferred_runner), \
+                mock.patch("galleryfield.mixins.get_thumbnail") as mock_get_thumb:
+            files = fetch()
+            self.assertEqual(mock_get_thumb.call_count, 0)
+            self.assertEqual(len(tasks), 3)
+            for file in files:
+                self.assertTrue(file["thumbnailPending"])
+                self.assertEqual(file["thumbnailUrl"], "/static/img/loading.gif")
+
+            # Pending thumbnails are not scheduled again
+            fetch()
+            self.assertEqual(len(tasks), 3)
+
+            for func, args in tasks:
+                func(*args)
+
+            files = fetch()
+            self.assertEqual(len(tasks), 3)
+            for file in files:
+                self.assertNotIn("thumbnailPending", file)
+                self.assertNotEqual(
+                    file["thumbnailUrl"], "/static/img/loading.gif")
+
+    def test_fetch_generate_thumbnails_async_conditional(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=3,
+            shuffle=True)
+
+        def fetch(**kwargs):
+            request = self.factory.get(
+                self.get_demo_fetch_url(
+                    params={"pks": list(gallery.images)}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest", **kwargs)
+            request.user = self.user
+            return built_in_views.BuiltInImageListView.as_view(
+                conditional_fetch=True)(request)
+
+        tasks = []
+
+        def deferred_runner(func, *args):
+            tasks.append((func, args))
+
+        with mock.patch("galleryfield.conf.THUMBNAIL_GENERATE_ASYNC", True), \
+                mock.patch("galleryfield.thumbnails.get_async_task_runner",
+                           return_value=deferred_runner):
+            resp = fetch()
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(json.loads(resp.content)["files"][0][
+                "thumbnailPending"])
+            self.assertFalse(resp.has_header("ETag"))
+
+            for func, args in tasks:
+                func(*args)
+
+            resp = fetch()
+            self.assertEqual(resp.status_code, 200)
+            for file in json.loads(resp.content)["files"]:
+                self.assertNotIn("thumbnailPending", file)
+            etag = resp["ETag"]
+
+            self.assertEqual(fetch(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_fetch_stream_response(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5,
+            shuffle=True)
+        # Not accessible by the user
+        other_image = factories.BuiltInGalleryImageFactory.create(
+            creator=self.create_user())
+
+        pks = list(gallery.images)
+        pks = pks[:2] + [other_image.pk] + pks[2:] + [pks[0]]
+
+        def fetch(**initkwargs):
+            request = self.factory.get(
+                self.get_demo_fetch_url(params={"pks": pks}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            request.user = self.user
+            return built_in_views.BuiltInImageListView.as_view(
+                **initkwargs)(request)
+
+        expected = json.loads(fetch().content)
+
+        for stream_chunk_size in [1, 2, 100]:
+            with self.subTest(stream_chunk_size=stream_chunk_size):
+                resp = fetch(
+                    stream_response=True, stream_chunk_size=stream_chunk_size)
+                self.assertEqual(resp.status_code, 200)
+                self.assertTrue(resp.streaming)
+                self.assertEqual(resp["Content-Type"], "application/json")
+                content = b"".join(resp.streaming_content)
+                self.assertEqual(json.loads(content), expected)
+                self.assertEqual(
+                    [file["pk"] for file in expected["files"]],
+                    list(gallery.images))
+
+        # Each window query only carries the pks of the window, while still
+        # filtered by the user
+        resp = fetch(stream_response=True, stream_chunk_size=2)
+        with CaptureQueriesContext(connection) as captured:
+            content = b"".join(resp.streaming_content)
+        self.assertEqual(json.loads(content), expected)
+        image_queries = [query["sql"] for query in captured.captured_queries
+                         if "galleryfield_builtingalleryimage" in query["sql"]]
+        self.assertEqual(len(image_queries), 3)
+        for sql, window in zip(
+                image_queries, [pks[:2], [pks[2], pks[3]], pks[4:6]]):
+            self.assertIn(
+                "IN (%s)" % ", ".join(str(pk) for pk in window), sql)
+            self.assertIn("creator_id", sql)
+            self.assertEqual(sql.count(" IN ("), 1)
+
+    def test_fetch_window(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5,
+            shuffle=True)
+        pks = list(gallery.images)
+        self.c.force_login(self.user)
+
+        def fetch(**params):
+            resp = self.c.get(self.get_demo_fetch_url(
+                params={"pks": pks, **params}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            self.assertEqual(resp.status_code, 200)
+            return json.loads(resp.content)
+
+        for params, expected_pks, expected_next_offset in [
+                ({"offset": 0, "limit": 2}, pks[:2], 2),
+                ({"offset": 2, "limit": 2}, pks[2:4], 4),
+                ({"offset": 4, "limit": 2}, pks[4:], None),
+                ({"offset": 3}, pks[3:], None),
+                ({"limit": 3}, pks[:3], 3),
+                ({"offset": 10, "limit": 2}, [], None)]:
+            with self.subTest(params=params):
+                result = fetch(**params)
+                self.assertEqual(
+                    [file["pk"] for file in result["files"]], expected_pks)
+                self.assertEqual(result["total"], 5)
+                self.assertEqual(result["nextOffset"], expected_next_offset)
+
+        result = fetch()
+        self.assertNotIn("total", result)
+        self.assertNotIn("nextOffset", result)
+
+    def test_fetch_window_invalid(self):
+        for params in [{"offset": -1}, {"offset": "a"}, {"limit": 0},
+                       {"limit": "1.5"}]:
+            with self.subTest(params=params):
+                request = self.factory.get(
+                    self.get_demo_fetch_url(params={"pks": [1], **params}),
+                    HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+                request.user = self.user
+                with self.assertRaises(SuspiciousOperation):
+                    built_in_views.BuiltInImageListView.as_view()(request)
+
+    def test_fetch_conditional(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=3,
+            shuffle=True)
+        self.c.force_login(self.user)
+
+        def fetch(thumbnail_size=120, **kwargs):
+            return self.c.get(self.get_demo_fetch_url(
+                params={"pks": list(gallery.images),
+                        "thumbnail_size": thumbnail_size}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest", **kwargs)
+
+        resp = fetch()
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+        self.assertIn("no-cache", resp["Cache-Control"])
+
+        with self.assertNumQueries(3):
+            # 2 queries for the session and the user
+            resp = fetch(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        resp = fetch(thumbnail_size=80, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+        # Another user can't access those images
+        self.c.force_login(self.create_user())
+        resp = fetch(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.content)["files"], [])
+
+        self.c.force_login(self.user)
+        image = gallery.images.objects.first()
+        image.image.name = "images/foo.jpg"
+        image.save()
+        resp = fetch(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_fetch_not_conditional(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=3,
+            shuffle=True)
+
+        request = self.factory.get(
+            self.get_demo_fetch_url(
+                params={"pks": list(gallery.images)}),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        request.user = self.user
+
+        resp = built_in_views.BuiltInImageListView.as_view(
+            conditional_fetch=False)(request)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.has_header("ETag"))
+
+    def test_fetch_post(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5,
+            shuffle=True)
+        pks = list(gallery.images)
+        self.c.force_login(self.user)
+
+        for data, content_type in [
+                ({"pks": json.dumps(pks)}, None),
+                ({"pks": json.dumps(pks), "thumbnail_size": "80x60"}, None),
+                (json.dumps(pks), "application/json"),
+                (json.dumps({"pks": pks}), "application/json"),
+                (struct.pack(f"<{len(pks)}Q", *pks), "application/octet-stream")]:
+            with self.subTest(data=data, content_type=content_type):
+                kwargs = {}
+                if content_type is not None:
+                    kwargs["content_type"] = content_type
+                resp = self.c.post(
+                    self.get_demo_fetch_url(), data=data,
+                    HTTP_X_REQUESTED_WITH="XMLHttpRequest", **kwargs)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(
+                    [file["pk"] for file in json.loads(resp.content)["files"]],
+                    pks)
+
+                # Conditional fetch doesn't apply to POST requests
+                self.assertFalse(resp.has_header("ETag"))
+
+    def test_fetch_post_thumbnail_size(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2,
+            shuffle=True)
+        pks = list(gallery.images)
+        self.c.force_login(self.user)
+
+        # Bodies with only the pks take the thumbnail size from query string
+        query = "?thumbnail_size=80&thumbnail_size=60"
+
+        from galleryfield.mixins import get_thumbnail as _get_thumbnail
+
+        for data, content_type, query_string in [
+                ({"pks": json.dumps(pks), "thumbnail_size": "80x60"},
+                 None, ""),
+                (json.dumps({"pks": pks, "thumbnail_size": [80, 60]}),
+                 "application/json", ""),
+                (json.dumps({"pks": pks, "thumbnail_size": "80x60"}),
+                 "application/json", query.replace("80", "90")),
+                (json.dumps(pks), "application/json", query),
+                (struct.pack(f"<{len(pks)}Q", *pks),
+                 "application/octet-stream", query)]:
+            with self.subTest(data=data, content_type=content_type):
+                kwargs = {}
+                if content_type is not None:
+                    kwargs["content_type"] = content_type
+                with mock.patch(
+                        "galleryfield.mixins.get_thumbnail",
+                        wraps=_get_thumbnail) as mock_get_thumb:
+                    resp = self.c.post(
+                        self.get_demo_fetch_url() + query_string, data=data,
+                        HTTP_X_REQUESTED_WITH="XMLHttpRequest", **kwargs)
+                self.assertEqual(resp.status_code, 200)
+                self.assertEqual(mock_get_thumb.call_count, 2)
+                for call in mock_get_thumb.call_args_list:
+                    self.assertEqual(call.kwargs["geometry_string"], "80x60")
+
+        # Defaults to the configured size
+        with mock.patch(
+                "galleryfield.mixins.get_thumbnail",
+                wraps=_get_thumbnail) as mock_get_thumb:
+            self.c.post(
+                self.get_demo_fetch_url(), data=json.dumps(pks),
+                content_type="application/json",
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(
+            mock_get_thumb.call_args.kwargs["geometry_string"],
+            get_formatted_thumbnail_size(defaults.DEFAULT_THUMBNAIL_SIZE))
+
+    def test_fetch_post_invalid(self):
+        for data, content_type in [
+                ({"pks": json.dumps(["a"])}, None),
+                ({}, None),
+                ("[1, ", "application/json"),
+                (json.dumps({"pk": [1]}), "application/json"),
+                (json.dumps(["a"]), "application/json"),
+                (b"\x01\x00\x00", "application/octet-stream")]:
+            with self.subTest(data=data, content_type=content_type):
+                kwargs = {}
+                if content_type is not None:
+                    kwargs["content_type"] = content_type
+                request = self.factory.post(
+                    self.get_demo_fetch_url(), data=data,
+                    HTTP_X_REQUESTED_WITH="XMLHttpRequest", **kwargs)
+                request.user = self.user
+                with self.assertRaises(SuspiciousOperation):
+                    built_in_views.BuiltInImageListView.as_view()(request)
+
     def test_fetch_thumbnail_size_list(self):
         gallery = factories.DemoGalleryFactory.create(
             creator=self.user, number_of_images=5,
@@ -669,6 +1312,30 @@ class GalleryWidgetCropViewTest(ViewTestMixin, TestCase):
                            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
         self.assertEqual(resp.status_code, 200, resp.content)
 
+    def test_crop_remote_storage(self):
+        field = BuiltInGalleryImage._meta.get_field("image")
+        with mock.patch.object(field, "storage", FakeRemoteStorage()):
+            pk = self.get_demo_crop_pk(0)
+            with self.assertRaises(NotImplementedError):
+                BuiltInGalleryImage.objects.get(pk=pk).image.path
+
+            data = self.get_default_crop_post_data()
+            self.c.force_login(self.user)
+            resp = self.c.post(
+                self.get_demo_crop_url(pk), data=data,
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            self.assertEqual(resp.status_code, 200)
+
+            file = json.loads(resp.content)["files"][0]
+            self.assertNotIn("error", file)
+            self.assertIn("cropUrl", file)
+            self.assertIn("thumbnailUrl", file)
+
+            new_image = BuiltInGalleryImage.objects.get(pk=file["pk"]).image
+            self.assertEqual(file["name"], os.path.basename(new_image.name))
+            with new_image.open("rb"), Image.open(new_image) as image:
+                self.assertEqual(image.size, (400, 810))
+
     def test_crop_io_error(self):
         # no actual image file
         gallery = factories.DemoGalleryFactory.create(creator=self.user)
@@ -814,3 +1481,483 @@ class GalleryWidgetCropViewTest(ViewTestMixin, TestCase):
                         "2 ints, e.g, [80, 60] or (80, 60).")
 
         self.assertIn(expected_msg, cm.exception.args[0])
+
+
+@override_settings(MEDIA_ROOT=test_media_root)
+class GalleryWidgetBatchCropViewTest(ViewTestMixin, TestCase):
+    @staticmethod
+    def get_batch_crop_url():
+        return reverse(defaults.DEFAULT_BATCH_CROP_URL_NAME)
+
+    @staticmethod
+    def get_crops(pks, **kwargs):
+        crops = []
+        for pk in pks:
+            crop = {"pk": pk, "x": 10, "y": 10, "width": 40,
+                    "height": 60, "rotate": 90}
+            crop.update(kwargs)
+            crops.append(crop)
+        return crops
+
+    def batch_crop(self, crops, user=None):
+        self.c.force_login(user or self.user)
+        return self.c.post(
+            self.get_batch_crop_url(), data={"crops": json.dumps(crops)},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def test_batch_crop_success(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=3)
+        pks = list(gallery.images) + [gallery.images[0]]
+
+        resp = self.batch_crop(self.get_crops(pks))
+        self.assertEqual(resp.status_code, 200)
+
+        files = json.loads(resp.content)["files"]
+        self.assertEqual(len(files), 4)
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 7)
+
+        new_pks = [file["pk"] for file in files]
+        self.assertEqual(len(set(new_pks) - set(pks)), 4)
+        for file, pk in zip(files, pks):
+            self.assertNotIn("error", file)
+            new_instance = BuiltInGalleryImage.objects.get(pk=file["pk"])
+            self.assertEqual(new_instance.creator, self.user)
+            self.assertEqual(
+                (new_instance.image.width, new_instance.image.height),
+                (40, 60))
+
+        # The original instances are untouched
+        for pk in pks:
+            self.assertTrue(BuiltInGalleryImage.objects.filter(pk=pk).exists())
+
+    def test_batch_crop_not_permitted_or_not_exist(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2)
+        pks = list(gallery.images)
+
+        another_user = self.create_user()
+        resp = self.batch_crop(
+            self.get_crops(pks + [100]), user=another_user)
+        self.assertEqual(resp.status_code, 200)
+        files = json.loads(resp.content)["files"]
+        self.assertEqual([file["pk"] for file in files], pks + [100])
+        for file in files:
+            self.assertIn("error", file)
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 2)
+
+        # Superuser can crop images of other users
+        resp = self.batch_crop(self.get_crops(pks), user=self.superuser)
+        for file in json.loads(resp.content)["files"]:
+            self.assertNotIn("error", file)
+
+    def test_batch_crop_io_error(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2)
+        os.remove(gallery.images.objects.first().image.path)
+
+        resp = self.batch_crop(self.get_crops(list(gallery.images)))
+        self.assertEqual(resp.status_code, 200)
+        files = json.loads(resp.content)["files"]
+        self.assertIn("error", files[0])
+        self.assertNotIn("error", files[1])
+
+    def test_batch_crop_invalid(self):
+        self.c.force_login(self.user)
+        for data in [{},
+                     {"crops": "not json"},
+                     {"crops": json.dumps({"pk": 1})},
+                     {"crops": json.dumps([])},
+                     {"crops": json.dumps(self.get_crops([1] * 51))},
+                     {"crops": json.dumps(self.get_crops(["a"]))},
+                     {"crops": json.dumps(self.get_crops([1], x="a"))}]:
+            with self.subTest(data=data):
+                resp = self.c.post(
+                    self.get_batch_crop_url(), data=data,
+                    HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+                self.assertEqual(resp.status_code, 400)
+
+    def test_batch_crop_disabled(self):
+        request = self.factory.post(
+            self.get_batch_crop_url(),
+            data={"crops": json.dumps(self.get_crops([1]))},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        request.user = self.user
+        with self.assertRaises(SuspiciousOperation):
+            built_in_views.BuiltInImageBatchCropView.as_view(
+                disable_server_side_crop=True)(request)
+
+
+@override_settings(MEDIA_ROOT=test_media_root)
+@mock.patch("galleryfield.conf.NON_DESTRUCTIVE_CROP", True)
+class NonDestructiveCropViewTest(ViewTestMixin, TestCase):
+    def crop(self, pk, **kwargs):
+        cropped_result = {
+            "x": 200, "y": 200, "width": 400, "height": 810, "rotate": -90}
+        cropped_result.update(kwargs)
+        self.c.force_login(self.user)
+        return self.c.post(
+            self.get_demo_crop_url(pk),
+            data=self._get_crop_post_data(
+                cropped_result=json.dumps(cropped_result)),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def fetch(self, pks, **kwargs):
+        self.c.force_login(self.user)
+        return self.c.get(
+            self.get_demo_fetch_url(params={"pks": pks}),
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest", **kwargs)
+
+    @staticmethod
+    def get_rendition_size(file):
+        image = BuiltInGalleryImage.objects.get(pk=file["pk"]).image
+        name = file["url"][len(image.storage.base_url):]
+        with image.storage.open(name, "rb") as f, Image.open(f) as rendition:
+            return rendition.size
+
+    def test_crop(self):
+        pk = self.get_demo_crop_pk(0)
+        image = BuiltInGalleryImage.objects.get(pk=pk).image
+        original_size = (image.width, image.height)
+
+        resp = self.crop(pk)
+        self.assertEqual(resp.status_code, 200)
+        file = json.loads(resp.content)["files"][0]
+        self.assertNotIn("error", file)
+        self.assertEqual(file["pk"], pk)
+        self.assertIn("/renditions/", file["url"])
+        self.assertEqual(self.get_rendition_size(file), (400, 810))
+
+        # No new instance nor new file of the instance
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 5)
+        self.assertEqual(ImageCrop.objects.count(), 1)
+        image = BuiltInGalleryImage.objects.get(pk=pk).image
+        self.assertEqual((image.width, image.height), original_size)
+
+        # Crop operations are applied on the previous ones
+        resp = self.crop(pk, x=0, y=0, width=100, height=200, rotate=0)
+        new_file = json.loads(resp.content)["files"][0]
+        self.assertNotEqual(new_file["url"], file["url"])
+        self.assertNotEqual(new_file["thumbnailUrl"], file["thumbnailUrl"])
+        self.assertEqual(self.get_rendition_size(new_file), (100, 200))
+
+        resp = self.fetch([pk])
+        self.assertEqual(json.loads(resp.content)["files"], [new_file])
+
+    @staticmethod
+    def get_storage_names(file):
+        # The names of the rendition and its thumbnail in the storage
+        storage = BuiltInGalleryImage.objects.get(pk=file["pk"]).image.storage
+        return storage, [file[key][len(storage.base_url):]
+                         for key in ["url", "thumbnailUrl"]]
+
+    def test_crop_previous_rendition_deleted(self):
+        pk = self.get_demo_crop_pk(0)
+        file = json.loads(self.crop(pk).content)["files"][0]
+        storage, names = self.get_storage_names(file)
+        for name in names:
+            self.assertTrue(storage.exists(name))
+
+        new_file = json.loads(self.crop(
+            pk, x=0, y=0, width=100, height=200, rotate=0).content)["files"][0]
+        for name in names:
+            self.assertFalse(storage.exists(name))
+        storage, new_names = self.get_storage_names(new_file)
+        for name in new_names:
+            self.assertTrue(storage.exists(name))
+
+        resp = self.fetch([pk])
+        self.assertEqual(json.loads(resp.content)["files"], [new_file])
+
+    def test_rendition_deleted_with_image(self):
+        pk = self.get_demo_crop_pk(0)
+        file = json.loads(self.crop(pk).content)["files"][0]
+        storage, names = self.get_storage_names(file)
+
+        BuiltInGalleryImage.objects.get(pk=pk).delete()
+        for name in names:
+            self.assertFalse(storage.exists(name))
+
+    def test_fetch_crop_operations_queried_once(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5)
+        pks = list(gallery.images)
+        self.crop(pks[1])
+
+        def count_crop_queries(**initkwargs):
+            request = self.factory.get(
+                self.get_demo_fetch_url(params={"pks": pks}),
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+            request.user = self.user
+            with CaptureQueriesContext(connection) as captured:
+                resp = built_in_views.BuiltInImageListView.as_view(
+                    conditional_fetch=False, **initkwargs)(request)
+                files = json.loads(b"".join(resp.streaming_content)
+                                   if resp.streaming else resp.content)["files"]
+            self.assertEqual([file["pk"] for file in files], pks)
+            self.assertIn("/renditions/", files[1]["url"])
+            return len([query for query in captured.captured_queries
+                        if "galleryfield_imagecrop" in query["sql"]])
+
+        self.assertEqual(count_crop_queries(), 1)
+        self.assertEqual(
+            count_crop_queries(stream_response=True, stream_chunk_size=2), 3)
+
+        with mock.patch("galleryfield.conf.THUMBNAIL_GENERATE_ASYNC", True), \
+                mock.patch("galleryfield.thumbnails.get_async_task_runner",
+                           return_value=lambda func, *args: None):
+            self.assertEqual(count_crop_queries(), 1)
+
+    def test_crop_rendered_once(self):
+        pk = self.get_demo_crop_pk(0)
+        self.crop(pk)
+
+        with mock.patch("galleryfield.thumbnails.render_image") as mock_render:
+            self.fetch([pk])
+        mock_render.assert_not_called()
+
+    def test_crop_invalid_operation(self):
+        pk = self.get_demo_crop_pk(0)
+
+        resp = self.crop(pk, width=-10)
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(ImageCrop.objects.count(), 0)
+
+    def test_crop_image_data_cache_invalidated(self):
+        pk = self.get_demo_crop_pk(0)
+        with override_settings(CACHES={
+                "default": {
+                    "BACKEND":
+                        "django.core.cache.backends.locmem.LocMemCache"}}):
+            with mock.patch("galleryfield.conf.IMAGE_DATA_CACHE_ALIAS",
+                            "default"):
+                url = json.loads(self.fetch([pk]).content)["files"][0]["url"]
+                self.crop(pk)
+                new_url = (
+                    json.loads(self.fetch([pk]).content)["files"][0]["url"])
+        self.assertNotEqual(url, new_url)
+
+    def test_crop_conditional_fetch(self):
+        pk = self.get_demo_crop_pk(0)
+        etag = self.fetch([pk])["ETag"]
+
+        self.crop(pk)
+        resp = self.fetch([pk], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+
+    def test_crops_deleted_with_image(self):
+        pk = self.get_demo_crop_pk(0)
+        self.crop(pk)
+        BuiltInGalleryImage.objects.get(pk=pk).delete()
+        self.assertEqual(ImageCrop.objects.count(), 0)
+
+    def test_batch_crop(self):
+        gallery = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2)
+        pks = list(gallery.images)
+        crops = [{"pk": pk, "x": 10, "y": 10, "width": 40, "height": 60,
+                  "rotate": 90} for pk in pks + [pks[0]]]
+
+        self.c.force_login(self.user)
+        resp = self.c.post(
+            reverse(defaults.DEFAULT_BATCH_CROP_URL_NAME),
+            data={"crops": json.dumps(crops)},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(resp.status_code, 200)
+
+        files = json.loads(resp.content)["files"]
+        self.assertEqual([file["pk"] for file in files], pks + [pks[0]])
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 2)
+        self.assertEqual(ImageCrop.objects.count(), 3)
+        self.assertEqual(self.get_rendition_size(files[1]), (40, 60))
+        self.assertEqual(self.get_rendition_size(files[2]), (40, 60))
+        self.assertNotEqual(files[0]["url"], files[2]["url"])
+
+
+@override_settings(MEDIA_ROOT=test_media_root)
+class ChunkedUploadViewTest(ViewTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        patcher = mock.patch(
+            "galleryfield.conf.CHUNKED_UPLOAD_TEMP_DIR", self.temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with open(find("demo/screen_upload.png"), "rb") as f:
+            self.content = f.read()
+        self.c.force_login(self.user)
+
+    def upload_chunk(self, start, end, content=None, name="screen_upload.png"):
+        total = len(self.content)
+        if content is None:
+            content = self.content[start:end + 1]
+        return self.c.post(
+            self.get_demo_upload_url(),
+            data={"files[]": SimpleUploadedFile(name, content, "image/png")},
+            HTTP_CONTENT_RANGE=f"bytes {start}-{end}/{total}",
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def get_uploaded_size(self, name="screen_upload.png"):
+        resp = self.c.get(
+            self.get_demo_upload_url(),
+            data={"file": name, "size": len(self.content)},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(resp.status_code, 200)
+        return json.loads(resp.content)["file"]["size"]
+
+    def test_chunked_upload(self):
+        total = len(self.content)
+        chunk_size = total // 3 + 1
+        self.assertEqual(self.get_uploaded_size(), 0)
+
+        for start in range(0, total, chunk_size):
+            end = min(start + chunk_size, total) - 1
+            resp = self.upload_chunk(start, end)
+            self.assertEqual(resp.status_code, 200, resp.content)
+            if end + 1 < total:
+                self.assertEqual(resp["Range"], f"bytes=0-{end}")
+                self.assertEqual(self.get_uploaded_size(), end + 1)
+                self.assertEqual(BuiltInGalleryImage.objects.count(), 0)
+
+        file = json.loads(resp.content)["files"][0]
+        self.assertNotIn("error", file)
+        image = BuiltInGalleryImage.objects.get(pk=file["pk"])
+        self.assertEqual(image.creator, self.user)
+        with image.image.open("rb"):
+            self.assertEqual(image.image.read(), self.content)
+
+        # The partial file was removed
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_chunked_upload_resend_chunk(self):
+        self.upload_chunk(0, 99)
+        self.upload_chunk(100, 199, content=b"x" * 100)
+
+        # The second chunk is uploaded again
+        self.upload_chunk(100, 199)
+        self.assertEqual(self.get_uploaded_size(), 200)
+        resp = self.upload_chunk(200, len(self.content) - 1)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 1)
+
+    def test_chunked_upload_separated_by_user(self):
+        self.upload_chunk(0, 99)
+        self.c.force_login(self.create_user())
+        self.assertEqual(self.get_uploaded_size(), 0)
+        resp = self.upload_chunk(100, 199)
+        self.assertEqual(resp.status_code, 400)
+
+    def test_chunked_upload_invalid_image(self):
+        total = len(self.content)
+        self.upload_chunk(0, total - 2)
+        resp = self.upload_chunk(total - 1, total - 1, content=b"x")
+        self.assertEqual(resp.status_code, 200)
+
+        resp = self.upload_chunk(0, total - 1, content=b"x" * total)
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("image", json.loads(resp.content)["errors"])
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_chunked_upload_invalid(self):
+        total = len(self.content)
+        for content_range, content in [
+                ("bytes 0-99", b"x" * 100),
+                ("bytes 100-99/1000", b"x" * 100),
+                ("bytes 0-99/100", b"x" * 10),
+                ("bytes 100-199/1000", b"x" * 100),
+                (f"bytes 0-99/{200 * 1024 ** 2}", b"x" * 100)]:
+            with self.subTest(content_range=content_range):
+                resp = self.c.post(
+                    self.get_demo_upload_url(),
+                    data={"files[]": SimpleUploadedFile("a.png", content)},
+                    HTTP_CONTENT_RANGE=content_range,
+                    HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+                self.assertEqual(resp.status_code, 400)
+
+        resp = self.c.post(
+            self.get_demo_upload_url(),
+            HTTP_CONTENT_RANGE=f"bytes 0-99/{total}",
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(resp.status_code, 400)
+
+        resp = self.c.get(
+            self.get_demo_upload_url(), data={"file": "a.png"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(resp.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=test_media_root)
+class UploadNormalizationTest(ViewTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.image_path = find("demo/screen_upload.png")
+
+    def patch_conf(self, **kwargs):
+        for key, value in kwargs.items():
+            patcher = mock.patch(
+                f"galleryfield.conf.UPLOAD_NORMALIZATION_{key.upper()}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def upload(self):
+        resp = self.demo_upload_file(self.user, self.image_path)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return json.loads(resp.content)["files"][0]
+
+    def test_not_normalized(self):
+        with mock.patch(
+                "galleryfield.mixins.normalize_image_file") as mock_normalize:
+            self.upload()
+        mock_normalize.assert_not_called()
+
+        image = BuiltInGalleryImage.objects.get()
+        with open(self.image_path, "rb") as f:
+            self.assertEqual(image.image.read(), f.read())
+
+    def test_within_limits_not_normalized(self):
+        self.patch_conf(max_width=2000, max_height=2000, quality=50)
+        with mock.patch(
+                "galleryfield.mixins.normalize_image_file") as mock_normalize:
+            self.upload()
+        mock_normalize.assert_not_called()
+
+    def test_downscale(self):
+        self.patch_conf(max_width=300, max_height=300)
+        file = self.upload()
+
+        image = BuiltInGalleryImage.objects.get()
+        self.assertTrue(image.image.name.endswith(".png"))
+        self.assertEqual(file["size"], image.image.size)
+        with Image.open(image.image.path) as stored:
+            self.assertEqual(stored.format, "PNG")
+            self.assertEqual(stored.size, (300, 211))
+
+    def test_convert_format(self):
+        self.patch_conf(max_width=600, format="JPEG", quality=70)
+        file = self.upload()
+
+        image = BuiltInGalleryImage.objects.get()
+        self.assertTrue(image.image.name.endswith(".jpg"))
+        self.assertTrue(file["name"].endswith(".jpg"))
+        self.assertIn("cropUrl", file)
+        with Image.open(image.image.path) as stored:
+            self.assertEqual(stored.format, "JPEG")
+            self.assertEqual(stored.size, (600, 423))
+
+    def test_corrupted_image(self):
+        self.patch_conf(max_width=300)
+        with open(self.image_path, "rb") as f:
+            # A valid header with truncated pixel data
+            uploaded_file = SimpleUploadedFile(
+                "truncated.png", f.read(1000), content_type="image/png")
+
+        self.c.force_login(self.user)
+        resp = self.c.post(
+            self.get_demo_upload_url(), data={"files[]": uploaded_file},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(resp.status_code, 400, resp.content)
+        self.assertIn("Upload a valid image",
+                      json.loads(resp.content)["errors"]["image"][0])
+        self.assertEqual(BuiltInGalleryImage.objects.count(), 0)
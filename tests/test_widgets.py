@@ -1,23 +1,36 @@
 import json
+import re
+from html import unescape
 from importlib import reload
 from unittest import mock
 
 from django import forms
-from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.db import connection
 from django.forms.renderers import DjangoTemplates
-from django.test import SimpleTestCase, TestCase, override_settings
-from django.urls import reverse
+from django.template import Context, Template
+from django.contrib.auth.models import AnonymousUser
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_script_prefix, reverse, set_script_prefix
+from django.utils.html import escape
 
 import galleryfield
 from galleryfield import conf, defaults
 from galleryfield.fields import GalleryFormField
 from galleryfield.utils import get_formatted_thumbnail_size
-from galleryfield.widgets import GalleryWidget
+from galleryfield.widgets import GalleryWidget, compile_widget_options
 from tests import factories
 from tests.test_fields import DemoTestGalleryModelForm
 
 
 class GalleryWidgetTestMixin:
+    @staticmethod
+    def rendered_option(key, value):
+        # Options are rendered as JSON in the data-options attribute
+        return escape(f'"{key}": {json.dumps(value)}')
+
     @staticmethod
     def _get_rendered_field_html(field, print_output=False):
         class Form(forms.Form):
@@ -118,7 +131,8 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
             jquery_file_upload_ui_options={"maxNumberOfFiles": 0})
 
         setattr(f.widget, "max_number_of_images", max_number_of_file)
-        expected_string = "maxNumberOfFiles: %i" % max_number_of_file
+        expected_string = self.rendered_option(
+            "maxNumberOfFiles", max_number_of_file)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
 
     def test_gallery_widget_thumbnail_size(self):
@@ -126,25 +140,26 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
         f.widget = GalleryWidget()
         expected_value = get_formatted_thumbnail_size(
                 conf.DEFAULT_THUMBNAIL_SIZE).split("x")[0]
-        expected_string = f"previewMaxWidth: {expected_value}"
+        expected_string = self.rendered_option(
+            "previewMaxWidth", int(expected_value))
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
 
         f.widget = GalleryWidget(thumbnail_size=130)
-        expected_string = "previewMaxWidth: 130"
+        expected_string = self.rendered_option("previewMaxWidth", 130)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
-        expected_string = "previewMaxHeight: 130"
+        expected_string = self.rendered_option("previewMaxHeight", 130)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
 
         f.widget = GalleryWidget(thumbnail_size=(135, 250))
-        expected_string = "previewMaxWidth: 135"
+        expected_string = self.rendered_option("previewMaxWidth", 135)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
-        expected_string = "previewMaxHeight: 250"
+        expected_string = self.rendered_option("previewMaxHeight", 250)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
 
         f.widget = GalleryWidget(thumbnail_size="130x260")
-        expected_string = "previewMaxWidth: 130"
+        expected_string = self.rendered_option("previewMaxWidth", 130)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
-        expected_string = "previewMaxHeight: 260"
+        expected_string = self.rendered_option("previewMaxHeight", 260)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
 
     def test_set_thumbnail_size_after_gallery_widget_init(self):
@@ -152,15 +167,15 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
 
         f.widget = GalleryWidget(thumbnail_size=130)
         f.widget.thumbnail_size = 250
-        expected_string = "previewMaxWidth: 250"
+        expected_string = self.rendered_option("previewMaxWidth", 250)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
-        expected_string = "previewMaxHeight: 250"
+        expected_string = self.rendered_option("previewMaxHeight", 250)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
 
         f.widget.thumbnail_size = "111x222"
-        expected_string = "previewMaxWidth: 111"
+        expected_string = self.rendered_option("previewMaxWidth", 111)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
-        expected_string = "previewMaxHeight: 222"
+        expected_string = self.rendered_option("previewMaxHeight", 222)
         self.check_in_html(f.widget, "image", '', strict=True, html=expected_string)
 
     def test_gallery_widget_jquery_upload_options_None(self):
@@ -349,7 +364,7 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
         }
         self._render_widget(f.widget, "image")
 
-        expected_string = "autoUpload: true"
+        expected_string = '"autoUpload": true'
         self.assertIn(
             expected_string,
             str(mock_render.call_args),
@@ -390,14 +405,11 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
                     "singleFileUploads": value
                 }
 
-                expected_message = ("'singleFileUploads=False' in "
-                                    "'jquery_file_upload_ui_options' is not "
-                                    "allowed and will be ignored.")
-
-                # self.assertEqual(mock_log.call_count, 1, list(mock_log.call_args))
-                self.assertIn(expected_message, str(mock_log.call_args))
+                # Multiple files can be uploaded in one request
+                self.assertNotIn("singleFileUploads",
+                                 str(mock_log.call_args_list))
                 self._render_widget(f.widget, "image")
-                self.assertNotIn(
+                self.assertIn(
                     "singleFileUploads",
                     str(mock_render.call_args),
                 )
@@ -415,8 +427,8 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
                   {"previewMaxHeight": 150}]
 
         expected_rendered_values = [
-            "previewMaxWidth: 120",
-            "previewMaxHeight: 180"]
+            '"previewMaxWidth": 120',
+            '"previewMaxHeight": 180']
 
         for i, value in enumerate(values):
             with self.subTest(value=value):
@@ -436,6 +448,60 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
                 mock_render.reset_mock()
                 mock_log.reset_mock()
 
+    def get_rendered_widget_options(self, widget):
+        output = self._render_widget(widget, "image")
+        match = re.search(r'data-options="([^"]*)"', output)
+        return json.loads(unescape(match.group(1)))
+
+    def test_widget_options_json(self):
+        f = GalleryFormField(target_model=defaults.DEFAULT_TARGET_IMAGE_MODEL)
+        f.widget.jquery_file_upload_ui_options = {
+            "autoUpload": "True", "limitConcurrentUploads": 1}
+
+        options = self.get_rendered_widget_options(f.widget)
+        self.assertIs(options["fileupload"]["autoUpload"], True)
+        self.assertEqual(options["fileupload"]["limitConcurrentUploads"], 1)
+        self.assertNotIn("acceptFileTypes", options["fileupload"])
+        self.assertEqual(
+            options["expressions"]["acceptFileTypes"],
+            defaults.JQUERY_FILE_UPLOAD_UI_DEFAULT_OPTIONS["acceptFileTypes"])
+        self.assertEqual(
+            options["sortable"],
+            defaults.JQUERY_FILE_UPLOAD_UI_DEFAULT_SORTABLE_OPTIONS)
+
+    def test_widget_options_json_cached(self):
+        compile_widget_options.cache_clear()
+        for __ in range(3):
+            f = GalleryFormField(target_model=defaults.DEFAULT_TARGET_IMAGE_MODEL)
+            self._render_widget(f.widget, "image")
+        cache_info = compile_widget_options.cache_info()
+        self.assertEqual(cache_info.misses, 1)
+        self.assertEqual(cache_info.hits, 2)
+
+        f.widget.thumbnail_size = "60x60"
+        options = self.get_rendered_widget_options(f.widget)
+        self.assertEqual(options["fileupload"]["previewMaxWidth"], 60)
+        self.assertEqual(compile_widget_options.cache_info().misses, 2)
+
+    def test_widget_options_json_unhashable(self):
+        f = GalleryFormField(target_model=defaults.DEFAULT_TARGET_IMAGE_MODEL)
+        f.widget.jquery_file_upload_ui_options = {
+            "formAcceptCharset": ["utf-8"]}
+        options = self.get_rendered_widget_options(f.widget)
+        self.assertEqual(options["fileupload"]["formAcceptCharset"], ["utf-8"])
+
+    def test_widget_options_json_cached_bool_and_int(self):
+        compile_widget_options.cache_clear()
+        for value in [True, 1, False, 0]:
+            with self.subTest(value=value):
+                f = GalleryFormField(
+                    target_model=defaults.DEFAULT_TARGET_IMAGE_MODEL)
+                f.widget.jquery_file_upload_ui_options = {"maxChunkSize": value}
+                options = self.get_rendered_widget_options(f.widget)
+                self.assertIs(
+                    type(options["fileupload"]["maxChunkSize"]), type(value))
+        self.assertEqual(compile_widget_options.cache_info().misses, 4)
+
     def test_widget_set_jquery_file_upload_ui_sortable_options_None_get_default(self):  # noqa
         f = GalleryFormField(target_model=defaults.DEFAULT_TARGET_IMAGE_MODEL)
 
@@ -464,14 +530,14 @@ class GalleryWidgetTest(GalleryWidgetTestMixin, SimpleTestCase):
         }
         self._render_widget(f.widget, "image")
 
-        expected_string = "delay: 400"
+        expected_string = '"delay": 400'
         self.assertIn(
             expected_string,
             str(mock_render.call_args),
         )
 
         self.assertIn(
-            "disabled: false",
+            '"disabled": false',
             str(mock_render.call_args),
         )
 
@@ -489,7 +555,7 @@ class GalleryWidgetConfTest(GalleryWidgetTestMixin, SimpleTestCase):
 
         f = GalleryFormField(target_model=defaults.DEFAULT_TARGET_IMAGE_MODEL)
         self._render_widget(f.widget, "image")
-        expected_string = "showElementClass: 'show'"
+        expected_string = '"showElementClass": "show"'
         self.assertIn(
             expected_string,
             str(mock_render.call_args),
@@ -518,6 +584,7 @@ class GalleryWidgetTestExtra(TestCase):
         factories.BuiltInGalleryImageFactory.reset_sequence()
         factories.DemoGalleryFactory.reset_sequence()
         self.user = factories.UserFactory()
+        self.fetch_url = reverse(defaults.DEFAULT_FETCH_URL_NAME)
         super().setUp()
 
     def test_no_fetch_url(self):
@@ -527,16 +594,244 @@ class GalleryWidgetTestExtra(TestCase):
 
         form = DemoTestGalleryModelForm(instance=gallery_obj)
 
-        rendered_js_content = "// fetching existing images"
-        rendered_js_instance_data = f"({pks})"
-        self.assertIn(rendered_js_content, form.as_table())
-        self.assertIn(rendered_js_instance_data, form.as_table())
+        config = self.get_widget_config(form.as_table())
+        self.assertEqual(config["pks"], pks)
+        self.assertEqual(config["fetchUrl"], self.fetch_url)
 
         # now we set fetch_url=None to the widget
         form.fields["images"].widget.fetch_url = None
 
-        self.assertNotIn(rendered_js_content, form.as_table())
-        self.assertNotIn(rendered_js_instance_data, form.as_table())
+        config = self.get_widget_config(form.as_table())
+        self.assertIsNone(config["fetchUrl"])
+
+    def test_fetch_page_size(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5, shuffle=True)
+
+        form = DemoTestGalleryModelForm(instance=gallery_obj)
+
+        config = self.get_widget_config(form.as_table())
+        self.assertIsNone(config["fetchPageSize"])
+
+        widget = form.fields["images"].widget
+        widget.options = dict(widget.options, fetch_page_size=2)
+        config = self.get_widget_config(form.as_table())
+        self.assertEqual(config["fetchPageSize"], 2)
+
+    def get_inline_form(self, gallery_obj, **options):
+        form = DemoTestGalleryModelForm(instance=gallery_obj)
+        widget = form.fields["images"].widget
+        widget.options = dict(widget.options, inline_initial_images=True,
+                              **options)
+        widget.request = RequestFactory().get("/", HTTP_IF_NONE_MATCH="*")
+        widget.request.user = self.user
+        return form
+
+    def get_inlined_images(self, html):
+        match = re.search(
+            r'<script id="id-images-initial-images" '
+            r'type="application/json">(.*?)</script>', html)
+        return json.loads(match.group(1))
+
+    def test_inline_initial_images(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5, shuffle=True)
+        pks = list(gallery_obj.images)
+
+        form = self.get_inline_form(gallery_obj)
+        with CaptureQueriesContext(connection) as captured:
+            html = form.as_table()
+
+        # The images are queried in a batch (besides the ETag query of the
+        # built-in fetch view), rather than one by one
+        image_queries = [query for query in captured.captured_queries
+                         if "galleryfield_builtingalleryimage" in query["sql"]]
+        self.assertEqual(len(image_queries), 2)
+
+        config = self.get_widget_config(html)
+        self.assertEqual(config["initialImagesId"], "id-images-initial-images")
+        files = self.get_inlined_images(html)["files"]
+        self.assertEqual([file["pk"] for file in files], pks)
+        for file in files:
+            self.assertIn("thumbnailUrl", file)
+
+    def test_inline_initial_images_first_page(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5, shuffle=True)
+        pks = list(gallery_obj.images)
+
+        html = self.get_inline_form(gallery_obj, fetch_page_size=2).as_table()
+        self.assertEqual(
+            [file["pk"] for file in self.get_inlined_images(html)["files"]],
+            pks[:2])
+        self.assertEqual(self.get_widget_config(html)["inlinedCount"], 2)
+
+    def test_inline_initial_images_script_prefix(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2, shuffle=True)
+        pks = list(gallery_obj.images)
+
+        # e.g., deployed with SCRIPT_NAME or FORCE_SCRIPT_NAME
+        prefix = get_script_prefix()
+        set_script_prefix("/prefix/")
+        try:
+            html = self.get_inline_form(gallery_obj).as_table()
+        finally:
+            set_script_prefix(prefix)
+
+        config = self.get_widget_config(html)
+        self.assertEqual(config["fetchUrl"], "/prefix" + self.fetch_url)
+        self.assertEqual(config["initialImagesId"], "id-images-initial-images")
+        self.assertEqual(
+            [file["pk"] for file in self.get_inlined_images(html)["files"]],
+            pks)
+
+    def test_inline_initial_images_not_available(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2, shuffle=True)
+        pks = list(gallery_obj.images)
+
+        # No request
+        form = DemoTestGalleryModelForm(instance=gallery_obj)
+        widget = form.fields["images"].widget
+        widget.options = dict(widget.options, inline_initial_images=True)
+        html = form.as_table()
+        self.assert_fetched_by_browser(html, pks)
+
+        # Not permitted by the fetch view
+        form = self.get_inline_form(gallery_obj)
+        form.fields["images"].widget.request.user = AnonymousUser()
+        html = form.as_table()
+        self.assert_fetched_by_browser(html, pks)
+
+    def get_widget_config(self, html):
+        match = re.search(r'data-config="(.*?)"', html)
+        return json.loads(unescape(match.group(1)))
+
+    def assert_fetched_by_browser(self, html, pks):
+        config = self.get_widget_config(html)
+        self.assertEqual(config["pks"], pks)
+        self.assertEqual(config["fetchUrl"], self.fetch_url)
+        self.assertIsNone(config["initialImagesId"])
+        self.assertNotIn("id-images-initial-images", html)
+
+    def test_form_submit_button_block_overridden(self):
+        form = DemoTestGalleryModelForm()
+        widget = form.fields["images"].widget
+        html = form.as_table()
+        self.assertIn("default_before_submit", html)
+        self.assertNotIn("customized before_submit", html)
+
+        widget.template = "tests/widget_custom_submit.html"
+        html = form.as_table()
+        self.assertIn("$.fn.galleryWidget", html)
+        self.assertIn("// customized before_submit", html)
+
+        with mock.patch(
+                "galleryfield.conf.PROMPT_ALERT_ON_WINDOW_RELOAD_IF_CHANGED",
+                False):
+            self.assertNotIn("customized before_submit", form.as_table())
+
+    def test_shared_script(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=5, shuffle=True)
+        pks = list(gallery_obj.images)
+
+        form = DemoTestGalleryModelForm(instance=gallery_obj)
+        widget = form.fields["images"].widget
+        html = form.as_table()
+        self.assertIn("$.fn.galleryWidget", html)
+        self.assertIn('$("#id-images-gallery-widget").galleryWidget()', html)
+        self.assertIn('id="blueimp-gallery"', html)
+
+        widget.options = dict(
+            widget.options, shared_script=True, fetch_page_size=2)
+        html = form.as_table()
+        self.assertNotIn("<script", html)
+        self.assertNotIn('id="blueimp-gallery"', html)
+        self.assertIn("edit-modal", html)
+
+        config = self.get_widget_config(html)
+        self.assertEqual(config["name"], "images")
+        self.assertEqual(config["pks"], pks)
+        self.assertEqual(config["fetchUrl"], self.fetch_url)
+        self.assertEqual(config["fetchPageSize"], 2)
+        self.assertIsNone(config["pendingThumbnailsFetchUrl"])
+        self.assertIsNone(config["initialImagesId"])
+
+    def test_shared_script_inline_initial_images(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2, shuffle=True)
+        pks = list(gallery_obj.images)
+
+        html = self.get_inline_form(gallery_obj, shared_script=True).as_table()
+        config = self.get_widget_config(html)
+        self.assertEqual(config["initialImagesId"], "id-images-initial-images")
+        self.assertEqual(config["inlinedCount"], 2)
+        self.assertEqual(
+            [file["pk"] for file in self.get_inlined_images(html)["files"]],
+            pks)
+
+    def test_shared_script_template_tag(self):
+        html = Template(
+            "{% load galleryfield_tags %}{% galleryfield_shared_script %}"
+        ).render(Context())
+        self.assertEqual(html.count('id="blueimp-gallery"'), 1)
+        self.assertIn('<script id="template-upload"', html)
+        self.assertIn('<script id="template-download"', html)
+        self.assertIn("$.fn.galleryWidget", html)
+        self.assertIn("beforeunload", html)
+
+        with mock.patch(
+                "galleryfield.conf.PROMPT_ALERT_ON_WINDOW_RELOAD_IF_CHANGED",
+                False):
+            html = Template(
+                "{% load galleryfield_tags %}"
+                "{% galleryfield_shared_script "
+                "download_template='demo_custom/custom_download_template.html' %}"
+            ).render(Context())
+        self.assertNotIn("beforeunload", html)
+        self.assertIn("added_datetime", html)
+
+    def test_inline_initial_images_view_exception(self):
+        gallery_obj = factories.DemoGalleryFactory.create(
+            creator=self.user, number_of_images=2, shuffle=True)
+        pks = list(gallery_obj.images)
+
+        # A bound form re-rendered with invalid pks, for which the fetch
+        # view raises SuspiciousOperation
+        form = DemoTestGalleryModelForm(
+            data={"images": '["a"]'}, instance=gallery_obj)
+        widget = form.fields["images"].widget
+        widget.options = dict(widget.options, inline_initial_images=True)
+        widget.request = RequestFactory().get("/")
+        widget.request.user = self.user
+        self.assertFalse(form.is_valid())
+
+        html = form.as_table()
+        self.assert_fetched_by_browser(html, ["a"])
+
+        form = self.get_inline_form(gallery_obj)
+        with mock.patch(
+                "galleryfield.mixins.BaseListViewMixin.get",
+                side_effect=PermissionDenied):
+            html = form.as_table()
+        self.assert_fetched_by_browser(html, pks)
+
+    def test_poll_pending_thumbnails(self):
+        form = DemoTestGalleryModelForm()
+
+        config = self.get_widget_config(form.as_table())
+        self.assertIsNone(config["pendingThumbnailsFetchUrl"])
+
+        with mock.patch("galleryfield.conf.THUMBNAIL_GENERATE_ASYNC", True):
+            config = self.get_widget_config(form.as_table())
+            self.assertEqual(
+                config["pendingThumbnailsFetchUrl"], self.fetch_url)
+
+            form.fields["images"].widget.fetch_url = None
+            config = self.get_widget_config(form.as_table())
+            self.assertIsNone(config["pendingThumbnailsFetchUrl"])
 
     def test_no_crop_disabled(self):
         gallery_obj = factories.DemoGalleryFactory.create(
@@ -3,6 +3,7 @@ import shutil
 import tempfile
 
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage
 
 FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'resource')
 test_media_root = os.path.join(tempfile.gettempdir(), "galleryfield_media")
@@ -27,3 +28,35 @@ def remove_upload_directory():
     # to prevent file collisions
     shutil.rmtree(get_upload_directory(), ignore_errors=True)
     shutil.rmtree(get_thumbnail_directory(), ignore_errors=True)
+
+
+class FakeRemoteStorage(Storage):
+    """A stand-in of remote (e.g., object store) storages, which stores files
+    locally but doesn't support :meth:`path`."""
+
+    def __init__(self, location=None, base_url=None):
+        self._storage = FileSystemStorage(location=location, base_url=base_url)
+
+    def _open(self, name, mode="rb"):
+        return self._storage._open(name, mode)
+
+    def _save(self, name, content):
+        return self._storage._save(name, content)
+
+    def get_available_name(self, name, max_length=None):
+        return self._storage.get_available_name(name, max_length=max_length)
+
+    def delete(self, name):
+        self._storage.delete(name)
+
+    def exists(self, name):
+        return self._storage.exists(name)
+
+    def listdir(self, path):
+        return self._storage.listdir(path)
+
+    def size(self, name):
+        return self._storage.size(name)
+
+    def url(self, name):
+        return self._storage.url(name)